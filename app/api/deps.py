@@ -3,7 +3,11 @@ from typing import Annotated
 
 import redis.asyncio as redis
 from fastapi import Depends, Request
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.services.analytics import AnalyticsEngine
+from app.services.ingestion_queue import IngestionQueue
+from app.services.recommendations import CoViewRecommender
 
 
 def get_redis_connection(request: Request) -> redis.Redis:
@@ -19,5 +23,25 @@ async def get_pg_connection(request: Request) -> AsyncGenerator[AsyncSession]:
         raise e
 
 
+def get_session_factory(request: Request) -> async_sessionmaker:
+    return request.app.state.session_factory
+
+
+def get_ingestion_queue(request: Request) -> IngestionQueue:
+    return request.app.state.ingestion_queue
+
+
+def get_analytics_engine(request: Request) -> AnalyticsEngine:
+    return request.app.state.analytics
+
+
+def get_recommender(request: Request) -> CoViewRecommender:
+    return request.app.state.recommender
+
+
 RedisConnectionDep = Annotated[redis.Redis, Depends(get_redis_connection)]
 DBSessionDep = Annotated[AsyncSession, Depends(get_pg_connection)]
+SessionFactoryDep = Annotated[async_sessionmaker, Depends(get_session_factory)]
+IngestionQueueDep = Annotated[IngestionQueue, Depends(get_ingestion_queue)]
+AnalyticsDep = Annotated[AnalyticsEngine, Depends(get_analytics_engine)]
+RecommenderDep = Annotated[CoViewRecommender, Depends(get_recommender)]
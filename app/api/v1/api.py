@@ -1,7 +1,9 @@
 from fastapi import APIRouter
 
 from app.api.v1.endpoints import (
+    analytics,
     customer_insights,
+    events,
     game,
     genre,
     ingestion,
@@ -19,3 +21,5 @@ api_router.include_router(publisher.publisher_router)
 api_router.include_router(genre.genre_router)
 api_router.include_router(session_insights.session_router)
 api_router.include_router(game.game_router)
+api_router.include_router(events.events_router)
+api_router.include_router(analytics.analytics_router)
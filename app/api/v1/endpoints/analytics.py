@@ -0,0 +1,111 @@
+from collections.abc import Awaitable
+from datetime import date, datetime, time, timedelta
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException, Query, Response, status
+from pydantic import NaiveDatetime
+
+from app.api.deps import AnalyticsDep
+from app.services.analytics import (
+    TOP_GENRES_PER_WEEK,
+    FunnelReport,
+    GenreWeeksReport,
+    PlatformShareReport,
+    ReportPeriod,
+)
+from app.services.exceptions import InvalidReportRange, NoArchive
+
+DEFAULT_REPORT_DAYS = 28
+
+# The archived timestamps have no time zone
+Since = Annotated[NaiveDatetime | None, Query(description="Inclusive lower bound")]
+Until = Annotated[NaiveDatetime | None, Query(description="Exclusive upper bound")]
+
+analytics_router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+REPORT_RESPONSES = {
+    status.HTTP_400_BAD_REQUEST: {"description": "since is not before until"},
+    status.HTTP_404_NOT_FOUND: {"description": "No event archive to report on"},
+}
+
+
+def report_range(
+    since: datetime | None,
+    until: datetime | None,
+) -> tuple[datetime, datetime]:
+    """
+    Default to the DEFAULT_REPORT_DAYS days up to tonight's midnight, a bound
+    that only moves once a day so the reports stay cached
+    """
+    if until is None:
+        until = datetime.combine(date.today() + timedelta(days=1), time())
+    if since is None:
+        since = until - timedelta(days=DEFAULT_REPORT_DAYS)
+    return since, until
+
+
+async def report_response(report: Awaitable[str]) -> Response:
+    try:
+        content = await report
+    except InvalidReportRange as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except NoArchive as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    return Response(content=content, media_type="application/json")
+
+
+@analytics_router.get(
+    "/top-genres",
+    response_model=GenreWeeksReport,
+    responses=REPORT_RESPONSES,
+)
+async def top_genres(
+    analytics: AnalyticsDep,
+    since: Since = None,
+    until: Until = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = TOP_GENRES_PER_WEEK,
+) -> Response:
+    """
+    Most viewed genres of each week, read from the event archive.
+
+    Covers the events archived so far, see the watermark of the report.
+    """
+    since, until = report_range(since, until)
+    return await report_response(analytics.top_genres(since, until, limit))
+
+
+@analytics_router.get(
+    "/platform-share",
+    response_model=PlatformShareReport,
+    responses=REPORT_RESPONSES,
+)
+async def platform_share(
+    analytics: AnalyticsDep,
+    since: Since = None,
+    until: Until = None,
+    period: ReportPeriod = "week",
+) -> Response:
+    """Share of the events of each platform per day, week or month"""
+    since, until = report_range(since, until)
+    return await report_response(analytics.platform_share(since, until, period))
+
+
+@analytics_router.get(
+    "/funnel",
+    response_model=FunnelReport,
+    responses=REPORT_RESPONSES,
+)
+async def conversion_funnel(
+    analytics: AnalyticsDep,
+    since: Since = None,
+    until: Until = None,
+    game_id: int | None = None,
+) -> Response:
+    """
+    Sessions viewing a game, then adding it to the cart, then buying it.
+
+    Each step counts the sessions that reached it after the previous one,
+    for the same game.
+    """
+    since, until = report_range(since, until)
+    return await report_response(analytics.conversion_funnel(since, until, game_id))
@@ -1,13 +1,13 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Response
 
-from app.api.deps import DBSessionDep
+from app.api.deps import DBSessionDep, RedisConnectionDep, SessionFactoryDep
+from app.core.config import settings
 from app.schemas.customer_insights import CustomerInsightResponse
 from app.services.customer_insights_service import (
-    get_user_preferences,
-    get_recent_interests,
-    get_platform_usage,
-    calculate_engagement_score
+    compute_customer_insights,
+    compute_customer_insights_concurrently,
 )
+from app.services.insights_cache import get_or_compute_insights
 
 insights_router = APIRouter(tags=["Customer Insights"])
 
@@ -15,33 +15,41 @@ insights_router = APIRouter(tags=["Customer Insights"])
 @insights_router.get(
     "/customer/insights",
     response_model=CustomerInsightResponse,
-    description="Generate personalized customer insights including genre preferences"
+    description="Generate personalized customer insights including genre preferences",
 )
 async def get_customer_insights(
     db: DBSessionDep,
+    session_factory: SessionFactoryDep,
+    redis_client: RedisConnectionDep,
     user_id: int = Query(..., description="User ID to analyze"),
-) -> CustomerInsightResponse:
+) -> CustomerInsightResponse | Response:
     """
     Generate personalized insights for a customer based on their web events.
-    
+
     This endpoint analyzes:
     - User preferences (platform, filters, viewing time)
     - Genre preferences based on viewing history
     - Recent interests with associated genres
     - Platform usage statistics
     - Overall engagement score
-    
+
     Returns a comprehensive analysis of the user's behavior and preferences.
+    By default all of it is computed by a single SQL statement. With
+    INSIGHTS_QUERY_MODE=concurrent the sub-queries run in parallel instead.
+
+    The serialized response is cached in Redis until new events of the user
+    are ingested or INSIGHTS_CACHE_TTL expires.
     """
-    preferences = await get_user_preferences(db, user_id)
-    recent_interests = await get_recent_interests(db, user_id)
-    platform_usage = await get_platform_usage(db, user_id)
-    engagement_score = await calculate_engagement_score(db, user_id)
-
-    return CustomerInsightResponse(
-        user_id=user_id,
-        preferences=preferences,
-        recent_interests=recent_interests,
-        platform_usage=platform_usage,
-        engagement_score=engagement_score
-    )
+
+    async def compute() -> CustomerInsightResponse:
+        if settings.INSIGHTS_QUERY_MODE == "concurrent":
+            return await compute_customer_insights_concurrently(
+                session_factory,
+                user_id,
+            )
+        return await compute_customer_insights(db, user_id)
+
+    if settings.INSIGHTS_CACHE_TTL <= 0:
+        return await compute()
+    payload = await get_or_compute_insights(redis_client, user_id, compute)
+    return Response(content=payload, media_type="application/json")
@@ -0,0 +1,71 @@
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from pydantic import NaiveDatetime
+
+from app.api.deps import SessionFactoryDep
+from app.services.event_export import (
+    EXPORT_MEDIA_TYPES,
+    EventExportFilter,
+    ExportFormat,
+    export_query,
+    stream_export,
+)
+from app.services.exceptions import InvalidExportFilter
+
+events_router = APIRouter(prefix="/events", tags=["Events"])
+
+
+@events_router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "description": "The matching events, streamed",
+            "content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()},
+        },
+        status.HTTP_400_BAD_REQUEST: {"description": "Missing or empty filter"},
+    },
+)
+async def export_web_events(
+    session_factory: SessionFactoryDep,
+    user_id: int | None = None,
+    session_id: str | None = None,
+    since: Annotated[
+        NaiveDatetime | None,
+        Query(description="Inclusive lower bound, without a time zone"),
+    ] = None,
+    until: Annotated[
+        NaiveDatetime | None,
+        Query(description="Exclusive upper bound, without a time zone"),
+    ] = None,
+    export_format: Annotated[ExportFormat, Query(alias="format")] = "ndjson",
+) -> StreamingResponse:
+    """
+    Stream raw web events of a user, a session or a time range.
+
+    Rows are read from a server-side cursor and sent in chunks, ordered by
+    timestamp, as NDJSON or as CSV with a header line. Memory use does not
+    depend on the number of rows.
+    """
+    filters = EventExportFilter(
+        user_id=user_id,
+        session_id=session_id,
+        since=since,
+        until=until,
+    )
+    try:
+        query = export_query(filters)
+    except InvalidExportFilter as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    return StreamingResponse(
+        stream_export(session_factory, query, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="web_events.{export_format}"'
+            ),
+        },
+    )
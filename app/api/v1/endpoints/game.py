@@ -1,14 +1,25 @@
-from app.api.deps import DBSessionDep
-from app.schemas.game import GameCreate, GameResponse, GameUpdate
-from app.services.exceptions import DuplicateEntry, NoGame
+from fastapi import APIRouter, HTTPException, Query, Response, status
+
+from app.api.deps import DBSessionDep, RecommenderDep
+from app.api.responses import json_response
+from app.core.config import settings
+from app.schemas.game import GameCreate, GameInDB, GameResponse, GameUpdate
+from app.schemas.recommendations import Recommendations, RecommendationsResponse
+from app.schemas.response_base import PageResponse
+from app.services.exceptions import (
+    DuplicateEntry,
+    InvalidCursor,
+    NoGame,
+    RecommendationsNotReady,
+)
 from app.services.game_service import (
+    GameSort,
     create_game,
     delete_game,
     get_game,
     get_games,
     update_game,
 )
-from fastapi import APIRouter, HTTPException, Query, status
 
 game_router = APIRouter(prefix="/games", tags=["Games"])
 
@@ -17,13 +28,16 @@ game_router = APIRouter(prefix="/games", tags=["Games"])
 async def create_new_game(
     game: GameCreate,
     db: DBSessionDep,
-) -> GameResponse:
+) -> Response:
     try:
         db_game = await create_game(db, game)
-        return GameResponse(
-            status="success",
-            data=db_game,
-            message="Game created successfully",
+        return json_response(
+            GameResponse(
+                status="success",
+                data=db_game,
+                message="Game created successfully",
+            ),
+            status.HTTP_201_CREATED,
         )
     except DuplicateEntry as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
@@ -33,29 +47,63 @@ async def create_new_game(
 async def read_game(
     game_id: int,
     db: DBSessionDep,
-) -> GameResponse:
+) -> Response:
     try:
         db_game = await get_game(db, game_id)
-        return GameResponse(
-            status="success",
-            data=db_game,
-            message="Game retrieved successfully",
+        return json_response(
+            GameResponse(
+                status="success",
+                data=db_game,
+                message="Game retrieved successfully",
+            ),
         )
     except NoGame as e:
         raise HTTPException(status_code=404, detail=str(e)) from e
 
 
-@game_router.get("", response_model=list[GameResponse])
+@game_router.get("", response_model=PageResponse[GameInDB])
 async def read_games(
     db: DBSessionDep,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1),
-) -> list[GameResponse]:
-    games = await get_games(db, skip, limit)
-    return [
-        GameResponse(status="success", data=game, message="Game retrieved successfully")
-        for game in games
-    ]
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    sort: GameSort = "id",
+) -> Response:
+    try:
+        page = await get_games(db, skip, limit, cursor, sort)
+        return json_response(
+            PageResponse[GameInDB](
+                status="success",
+                data=list(page.items),
+                message="Games retrieved successfully",
+                next_cursor=page.next_cursor,
+            ),
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+@game_router.get("/{game_id}/similar", response_model=RecommendationsResponse)
+async def read_similar_games(
+    game_id: int,
+    recommender: RecommenderDep,
+    limit: int = Query(10, ge=1, le=settings.RECOMMENDATIONS_TOP_K),
+) -> Response:
+    """
+    Games most often viewed in the same sessions or bought in the same orders,
+    best first, served from memory. Empty for a game nobody viewed yet.
+    """
+    try:
+        games = recommender.similar_games(game_id, limit)
+        return json_response(
+            RecommendationsResponse(
+                status="success",
+                data=Recommendations(games=games),
+                message="Similar games retrieved successfully",
+            ),
+        )
+    except RecommendationsNotReady as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
 
 
 @game_router.put("/{game_id}", response_model=GameResponse)
@@ -63,13 +111,15 @@ async def update_existing_game(
     game_id: int,
     game: GameUpdate,
     db: DBSessionDep,
-) -> GameResponse:
+) -> Response:
     try:
         db_game = await update_game(db, game_id, game)
-        return GameResponse(
-            status="success",
-            data=db_game,
-            message="Game updated successfully",
+        return json_response(
+            GameResponse(
+                status="success",
+                data=db_game,
+                message="Game updated successfully",
+            ),
         )
     except NoGame as e:
         raise HTTPException(status_code=404, detail=str(e)) from e
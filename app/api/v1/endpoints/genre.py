@@ -1,14 +1,18 @@
+from fastapi import APIRouter, HTTPException, Query, Response, status
+
 from app.api.deps import DBSessionDep
-from app.schemas.genre import GenreCreate, GenreResponse, GenreUpdate
-from app.services.exceptions import DuplicateEntry, NoGenre
+from app.api.responses import json_response
+from app.schemas.genre import GenreCreate, GenreInDB, GenreResponse, GenreUpdate
+from app.schemas.response_base import PageResponse
+from app.services.exceptions import DuplicateEntry, InvalidCursor, NoGenre
 from app.services.genre_service import (
+    GenreSort,
     create_genre,
     delete_genre,
     get_genre,
     get_genres,
     update_genre,
 )
-from fastapi import APIRouter, HTTPException, Query, status
 
 genre_router = APIRouter(prefix="/genres", tags=["Genres"])
 
@@ -21,13 +25,16 @@ genre_router = APIRouter(prefix="/genres", tags=["Genres"])
 async def create_new_genre(
     genre: GenreCreate,
     db: DBSessionDep,
-) -> GenreResponse:
+) -> Response:
     try:
         db_genre = await create_genre(db, genre)
-        return GenreResponse(
-            status="success",
-            data=db_genre,
-            message="Genre created successfully",
+        return json_response(
+            GenreResponse(
+                status="success",
+                data=db_genre,
+                message="Genre created successfully",
+            ),
+            status.HTTP_201_CREATED,
         )
     except DuplicateEntry as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
@@ -37,33 +44,42 @@ async def create_new_genre(
 async def read_genre(
     genre_id: int,
     db: DBSessionDep,
-) -> GenreResponse:
+) -> Response:
     try:
         db_genre = await get_genre(db, genre_id)
-        return GenreResponse(
-            status="success",
-            data=db_genre,
-            message="Genre retrieved successfully",
+        return json_response(
+            GenreResponse(
+                status="success",
+                data=db_genre,
+                message="Genre retrieved successfully",
+            ),
         )
     except NoGenre as e:
         raise HTTPException(status_code=404, detail=str(e)) from e
 
 
-@genre_router.get("", response_model=list[GenreResponse])
+@genre_router.get("", response_model=PageResponse[GenreInDB])
 async def read_genres(
     db: DBSessionDep,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1),
-) -> list[GenreResponse]:
-    genres = await get_genres(db, skip, limit)
-    return [
-        GenreResponse(
-            status="success",
-            data=genre,
-            message="Genre retrieved successfully",
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    sort: GenreSort = "id",
+) -> Response:
+    try:
+        page = await get_genres(db, skip, limit, cursor, sort)
+        return json_response(
+            PageResponse[GenreInDB](
+                status="success",
+                data=list(page.items),
+                message="Genres retrieved successfully",
+                next_cursor=page.next_cursor,
+            ),
         )
-        for genre in genres
-    ]
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except NoGenre as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
 
 
 @genre_router.put("/{genre_id}", response_model=GenreResponse)
@@ -71,13 +87,15 @@ async def update_existing_genre(
     genre_id: int,
     genre: GenreUpdate,
     db: DBSessionDep,
-) -> GenreResponse:
+) -> Response:
     try:
         db_genre = await update_genre(db, genre_id, genre)
-        return GenreResponse(
-            status="success",
-            data=db_genre,
-            message="Genre updated successfully",
+        return json_response(
+            GenreResponse(
+                status="success",
+                data=db_genre,
+                message="Genre updated successfully",
+            ),
         )
     except NoGenre as e:
         raise HTTPException(status_code=404, detail=str(e)) from e
@@ -1,16 +1,28 @@
-from fastapi import status, Body
+from collections.abc import AsyncIterator
 from uuid import uuid4
 
-from fastapi.background import BackgroundTasks
+import orjson
+from fastapi import Body, HTTPException, Request, status
 from fastapi.routing import APIRouter
-from loguru import logger
+from pydantic import ValidationError
 
-from app.api.deps import DBSessionDep, RedisConnectionDep
-from app.schemas.ingestion import IngestionResponse, IngestionSchema
-from app.services.ingestion_service import ingest_data_service
+from app.api.deps import IngestionQueueDep
+from app.core.config import settings
+from app.metrics import track_ingest_stage
+from app.schemas.ingestion import (
+    IngestionBatchResponse,
+    IngestionItemError,
+    IngestionResponse,
+    IngestionSchema,
+    ingestion_adapter,
+)
+from app.services.exceptions import QueueFull
+from app.services.ingestion_queue import IngestionQueue
 
 ingestion_router = APIRouter(tags=["Ingestion"])
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 
 @ingestion_router.post(
     "/ingest",
@@ -18,43 +30,199 @@ ingestion_router = APIRouter(tags=["Ingestion"])
     status_code=status.HTTP_202_ACCEPTED,
     responses={
         status.HTTP_202_ACCEPTED: {"description": "Data ingestion request accepted"},
-        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE: {"description": "Payload too large"},
-        status.HTTP_422_UNPROCESSABLE_ENTITY: {"description": "Invalid input data"},
+        status.HTTP_413_CONTENT_TOO_LARGE: {"description": "Payload too large"},
+        status.HTTP_422_UNPROCESSABLE_CONTENT: {"description": "Invalid input data"},
+        status.HTTP_503_SERVICE_UNAVAILABLE: {"description": "Ingestion queue full"},
     },
 )
 async def ingest_data(
-    background_tasks: BackgroundTasks,
-    redis_client: RedisConnectionDep,
-    postgres_session: DBSessionDep,
+    ingestion_queue: IngestionQueueDep,
     data: IngestionSchema = Body(..., max_size=1024 * 1024),  # 1MB limit
 ) -> IngestionResponse:
     """
     Ingest user activity data.
 
-    This endpoint queues the data for processing in a background task.
-    The response is immediate while processing continues asynchronously.
+    This endpoint hands the data to the ingestion queue. With the default
+    stream backend that is a single append to a Redis Stream, and the
+    ingestion worker stores the event afterwards.
 
     Args:
         data: The user activity data to ingest
-        background_tasks: FastAPI background tasks handler
-        redis_client: Redis connection for caching recent views
-        postgres_session: Database session for persistent storage
+        ingestion_queue: Queue stage in front of the ingestion services
 
     Returns:
         IngestionResponse: A response indicating the request was accepted
     """
+    await _publish(ingestion_queue, [data])
+    return IngestionResponse(
+        status="accepted",
+        message="Data ingestion successfully queued",
+        request_id=uuid4(),
+    )
+
+
+@ingestion_router.post(
+    "/ingest/batch",
+    response_model=IngestionBatchResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={
+        status.HTTP_202_ACCEPTED: {"description": "Valid events accepted"},
+        status.HTTP_400_BAD_REQUEST: {"description": "Malformed JSON body"},
+        status.HTTP_413_CONTENT_TOO_LARGE: {
+            "description": "Too many events, body or NDJSON line too large",
+        },
+        status.HTTP_422_UNPROCESSABLE_CONTENT: {"description": "Body is not an array"},
+        status.HTTP_503_SERVICE_UNAVAILABLE: {"description": "Ingestion queue full"},
+    },
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {
+                        "type": "array",
+                        "items": {"$ref": "#/components/schemas/IngestionSchema"},
+                    },
+                },
+                NDJSON_MEDIA_TYPE: {
+                    "schema": {"$ref": "#/components/schemas/IngestionSchema"},
+                },
+            },
+        },
+    },
+)
+async def ingest_batch(
+    request: Request,
+    ingestion_queue: IngestionQueueDep,
+) -> IngestionBatchResponse:
+    """
+    Ingest many user activity events in one request.
+
+    The body is either a JSON array of events or an `application/x-ndjson`
+    stream with one event per line, which is validated while it is read.
+    Invalid events are reported by position and do not reject the rest of
+    the batch. Valid events are queued together in one call.
+
+    Bodies are read up to a size limit, INGEST_MAX_BODY_BYTES for a JSON
+    array and INGEST_MAX_LINE_BYTES per NDJSON line, beyond which the
+    request is refused with 413 before the rest is buffered.
+
+    Args:
+        request: The incoming request, read as a stream for NDJSON bodies
+        ingestion_queue: Queue stage in front of the ingestion services
+
+    Returns:
+        IngestionBatchResponse: Accepted and rejected counts with item errors
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith(NDJSON_MEDIA_TYPE):
+        items = _iter_ndjson_lines(request.stream(), settings.INGEST_MAX_LINE_BYTES)
+    else:
+        body = await _read_body(request, settings.INGEST_MAX_BODY_BYTES)
+        items = _iter_json_array(body)
 
-    async def wrapped_ingestion_task(data, redis_client, postgres_session):
+    events: list[IngestionSchema] = []
+    errors: list[IngestionItemError] = []
+    index = 0
+    async for item in items:
+        if index >= settings.INGEST_MAX_BATCH_EVENTS:
+            raise _too_large(f"Batch exceeds {settings.INGEST_MAX_BATCH_EVENTS} events")
         try:
-            await ingest_data_service(data, redis_client, postgres_session)
-        except Exception as e:
-            logger.exception(f"Error ingesting data: {e}")
+            if isinstance(item, bytes):
+                events.append(ingestion_adapter.validate_json(item))
+            else:
+                events.append(ingestion_adapter.validate_python(item))
+        except ValidationError as e:
+            errors.append(
+                IngestionItemError(
+                    index=index,
+                    errors=e.errors(
+                        include_url=False,
+                        include_context=False,
+                        include_input=False,
+                    ),
+                ),
+            )
+        index += 1
 
-    background_tasks.add_task(
-        wrapped_ingestion_task, data, redis_client, postgres_session
-    )
-    return IngestionResponse(
+    await _publish(ingestion_queue, events)
+    return IngestionBatchResponse(
         status="accepted",
-        message="Data ingestion successfully queued",
+        message=f"{len(events)} events queued, {len(errors)} rejected",
         request_id=uuid4(),
-    )
\ No newline at end of file
+        accepted=len(events),
+        rejected=len(errors),
+        errors=errors,
+    )
+
+
+async def _publish(
+    ingestion_queue: IngestionQueue,
+    events: list[IngestionSchema],
+) -> None:
+    try:
+        with track_ingest_stage("publish", len(events)):
+            await ingestion_queue.publish(events)
+    except QueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        ) from e
+
+
+def _too_large(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+        detail=detail,
+    )
+
+
+async def _read_body(request: Request, max_bytes: int) -> bytes:
+    """Read the whole body, refusing it as soon as it exceeds `max_bytes`"""
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_bytes:
+        raise _too_large(f"Body exceeds {max_bytes} bytes")
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise _too_large(f"Body exceeds {max_bytes} bytes")
+    return bytes(body)
+
+
+async def _iter_json_array(body: bytes) -> AsyncIterator[object]:
+    try:
+        items = orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Malformed JSON body: {e}",
+        ) from e
+    if not isinstance(items, list):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail="Expected a JSON array of events",
+        )
+    for item in items:
+        yield item
+
+
+async def _iter_ndjson_lines(
+    chunks: AsyncIterator[bytes],
+    max_line_bytes: int,
+) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if len(line) > max_line_bytes:
+                raise _too_large(f"NDJSON line exceeds {max_line_bytes} bytes")
+            if line.strip():
+                yield line
+        # An unterminated line only grows, refuse it before buffering more
+        if len(buffer) > max_line_bytes:
+            raise _too_large(f"NDJSON line exceeds {max_line_bytes} bytes")
+    if buffer.strip():
+        yield buffer
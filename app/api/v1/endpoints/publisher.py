@@ -1,14 +1,23 @@
+from fastapi import APIRouter, HTTPException, Query, Response, status
+
 from app.api.deps import DBSessionDep
-from app.schemas.publisher import PublisherCreate, PublisherResponse, PublisherUpdate
-from app.services.exceptions import DuplicateEntry, NoPublisher
+from app.api.responses import json_response
+from app.schemas.publisher import (
+    PublisherCreate,
+    PublisherInDB,
+    PublisherResponse,
+    PublisherUpdate,
+)
+from app.schemas.response_base import PageResponse
+from app.services.exceptions import DuplicateEntry, InvalidCursor, NoPublisher
 from app.services.publisher_service import (
+    PublisherSort,
     create_publisher,
     delete_publisher,
     get_publisher,
     get_publishers,
     update_publisher,
 )
-from fastapi import APIRouter, HTTPException, Query, status
 
 publisher_router = APIRouter(prefix="/publishers", tags=["Publishers"])
 
@@ -21,13 +30,16 @@ publisher_router = APIRouter(prefix="/publishers", tags=["Publishers"])
 async def create_new_publisher(
     publisher: PublisherCreate,
     db: DBSessionDep,
-) -> PublisherResponse:
+) -> Response:
     try:
         db_publisher = await create_publisher(db, publisher)
-        return PublisherResponse(
-            status="success",
-            data=db_publisher,
-            message="Publisher created successfully",
+        return json_response(
+            PublisherResponse(
+                status="success",
+                data=db_publisher,
+                message="Publisher created successfully",
+            ),
+            status.HTTP_201_CREATED,
         )
     except DuplicateEntry as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
@@ -37,33 +49,42 @@ async def create_new_publisher(
 async def read_publisher(
     publisher_id: int,
     db: DBSessionDep,
-) -> PublisherResponse:
+) -> Response:
     try:
         db_publisher = await get_publisher(db, publisher_id)
-        return PublisherResponse(
-            status="success",
-            data=db_publisher,
-            message="Publisher retrieved successfully",
+        return json_response(
+            PublisherResponse(
+                status="success",
+                data=db_publisher,
+                message="Publisher retrieved successfully",
+            ),
         )
     except NoPublisher as e:
         raise HTTPException(status_code=404, detail=str(e)) from e
 
 
-@publisher_router.get("", response_model=list[PublisherResponse])
+@publisher_router.get("", response_model=PageResponse[PublisherInDB])
 async def read_publishers(
     db: DBSessionDep,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1),
-) -> list[PublisherResponse]:
-    publishers = await get_publishers(db, skip, limit)
-    return [
-        PublisherResponse(
-            status="success",
-            data=publisher,
-            message="Publisher retrieved successfully",
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    sort: PublisherSort = "id",
+) -> Response:
+    try:
+        page = await get_publishers(db, skip, limit, cursor, sort)
+        return json_response(
+            PageResponse[PublisherInDB](
+                status="success",
+                data=list(page.items),
+                message="Publishers retrieved successfully",
+                next_cursor=page.next_cursor,
+            ),
         )
-        for publisher in publishers
-    ]
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except NoPublisher as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
 
 
 @publisher_router.put("/{publisher_id}", response_model=PublisherResponse)
@@ -71,13 +92,15 @@ async def update_existing_publisher(
     publisher_id: int,
     publisher: PublisherUpdate,
     db: DBSessionDep,
-) -> PublisherResponse:
+) -> Response:
     try:
         db_publisher = await update_publisher(db, publisher_id, publisher)
-        return PublisherResponse(
-            status="success",
-            data=db_publisher,
-            message="Publisher updated successfully",
+        return json_response(
+            PublisherResponse(
+                status="success",
+                data=db_publisher,
+                message="Publisher updated successfully",
+            ),
         )
     except NoPublisher as e:
         raise HTTPException(status_code=404, detail=str(e)) from e
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Path, HTTPException, status
+from fastapi import APIRouter, HTTPException, Path, status
+
 from app.api.deps import RedisConnectionDep
-from app.services.ingestion_service import get_session_insights
 from app.schemas.session_insights import SessionInsights, SessionInsightsResponse
+from app.services.ingestion_service import get_session_insights
 
 session_router = APIRouter(tags=["Session Insights"])
 
@@ -1,14 +1,28 @@
-from app.api.deps import DBSessionDep
-from app.schemas.user import UserCreate, UserResponse, UserUpdate
-from app.services.exceptions import DuplicateEntry, NoUser
+from fastapi import APIRouter, HTTPException, Query, Response, status
+
+from app.api.deps import DBSessionDep, RecommenderDep, RedisConnectionDep
+from app.api.responses import json_response
+from app.schemas.last_viewed import LastViewedGamesResponse
+from app.schemas.recommendations import Recommendations, RecommendationsResponse
+from app.schemas.response_base import PageResponse
+from app.schemas.user import User, UserCreate, UserResponse, UserUpdate
+from app.services.exceptions import (
+    DuplicateEntry,
+    InvalidCursor,
+    NoLastViewed,
+    NoUser,
+    RecommendationsNotReady,
+)
+from app.services.ingestion_service import MAX_LAST_VIEWED
+from app.services.retrieve_last_viewed import get_last_viewed
 from app.services.user_service import (
+    UserSort,
     create_user,
     delete_user,
     get_user_by_id,
     get_users,
     update_user,
 )
-from fastapi import APIRouter, HTTPException, Query, status
 
 user_router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -17,13 +31,16 @@ user_router = APIRouter(prefix="/users", tags=["Users"])
 async def create_new_user(
     user: UserCreate,
     db: DBSessionDep,
-) -> UserResponse:
+) -> Response:
     try:
         db_user = await create_user(db, user)
-        return UserResponse(
-            status="success",
-            data=db_user,
-            message="User created successfully",
+        return json_response(
+            UserResponse(
+                status="success",
+                data=db_user,
+                message="User created successfully",
+            ),
+            status.HTTP_201_CREATED,
         )
     except DuplicateEntry as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
@@ -33,13 +50,15 @@ async def create_new_user(
 async def read_user(
     user_id: int,
     db: DBSessionDep,
-) -> UserResponse:
+) -> Response:
     try:
         user = await get_user_by_id(user_id, db)
-        return UserResponse(
-            status="success",
-            data=user,
-            message="User retrieved successfully",
+        return json_response(
+            UserResponse(
+                status="success",
+                data=user,
+                message="User retrieved successfully",
+            ),
         )
     except NoUser as e:
         raise HTTPException(
@@ -48,17 +67,88 @@ async def read_user(
         ) from e
 
 
-@user_router.get("", response_model=list[UserResponse])
+@user_router.get("/{user_id}/last-viewed", response_model=LastViewedGamesResponse)
+async def read_last_viewed(
+    user_id: int,
+    redis_client: RedisConnectionDep,
+    limit: int = Query(MAX_LAST_VIEWED, ge=1, le=MAX_LAST_VIEWED),
+) -> Response:
+    """Games the user viewed last, most recent first, served from Redis only"""
+    try:
+        last_viewed = await get_last_viewed(user_id, redis_client, stop=limit - 1)
+        return json_response(
+            LastViewedGamesResponse(
+                status="success",
+                data=last_viewed,
+                message="Last viewed games retrieved successfully",
+            ),
+        )
+    except NoLastViewed as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        ) from e
+
+
+@user_router.get("/{user_id}/recommendations", response_model=RecommendationsResponse)
+async def read_recommendations(
+    user_id: int,
+    redis_client: RedisConnectionDep,
+    recommender: RecommenderDep,
+    limit: int = Query(10, ge=1, le=100),
+) -> Response:
+    """
+    Games similar to the ones the user viewed last, which are left out.
+
+    The last viewed games come from Redis and their neighbors from the
+    in-memory co-view model, no query reaches the database.
+    """
+    try:
+        last_viewed = await get_last_viewed(
+            user_id,
+            redis_client,
+            stop=MAX_LAST_VIEWED - 1,
+        )
+        games = recommender.recommend(
+            [int(game_id) for game_id in last_viewed.last_viewed_games],
+            limit,
+        )
+        return json_response(
+            RecommendationsResponse(
+                status="success",
+                data=Recommendations(games=games),
+                message="Recommendations retrieved successfully",
+            ),
+        )
+    except NoLastViewed as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        ) from e
+    except RecommendationsNotReady as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+
+
+@user_router.get("", response_model=PageResponse[User])
 async def read_users(
     db: DBSessionDep,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1),
-) -> list[UserResponse]:
-    users = await get_users(db, skip, limit)
-    return [
-        UserResponse(status="success", data=user, message="User retrieved successfully")
-        for user in users
-    ]
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    sort: UserSort = "id",
+) -> Response:
+    try:
+        page = await get_users(db, skip, limit, cursor, sort)
+        return json_response(
+            PageResponse[User](
+                status="success",
+                data=list(page.items),
+                message="Users retrieved successfully",
+                next_cursor=page.next_cursor,
+            ),
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
 
 
 @user_router.put("/{user_id}", response_model=UserResponse)
@@ -66,13 +156,15 @@ async def update_existing_user(
     user_id: int,
     user: UserUpdate,
     db: DBSessionDep,
-) -> UserResponse:
+) -> Response:
     try:
         db_user = await update_user(db, user_id, user)
-        return UserResponse(
-            status="success",
-            data=db_user,
-            message="User updated successfully",
+        return json_response(
+            UserResponse(
+                status="success",
+                data=db_user,
+                message="User updated successfully",
+            ),
         )
     except NoUser as e:
         raise HTTPException(status_code=404, detail=str(e)) from e
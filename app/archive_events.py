@@ -0,0 +1,51 @@
+"""
+Append the web events added since the last run to the Parquet archive.
+
+Run it periodically, e.g. hourly from cron. Each run exports the new rows,
+one file per month they belong to, and rewrites the catalog tables:
+
+    python -m app.archive_events --archive-dir /data/archive
+
+The archive is read with app.services.event_archive.EventArchive.
+"""
+
+import argparse
+import asyncio
+from pathlib import Path
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.logging import set_logger
+from app.db.postgres_pool import create_engine_pg, create_session_factory
+from app.services.event_archive import ARCHIVE_BATCH_SIZE, export_archive
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--archive-dir",
+        type=Path,
+        default=Path(settings.EVENT_ARCHIVE_DIR),
+    )
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    return parser.parse_args()
+
+
+async def run_archive(archive_dir: Path, batch_size: int) -> None:
+    engine = create_engine_pg()
+    try:
+        async with create_session_factory(engine)() as session:
+            run = await export_archive(session, archive_dir, batch_size)
+        logger.success(
+            f"Archived {run.rows} web events, ids {run.exported_after + 1} to "
+            f"{run.exported_through}, in {len(run.files)} files",
+        )
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    set_logger()
+    args = parse_args()
+    asyncio.run(run_archive(args.archive_dir, args.batch_size))
@@ -0,0 +1,32 @@
+"""
+Rebuild the per-user rollups read by customer insights from web_events.
+
+Run it once after migrating an existing database, or whenever events were
+loaded without going through ingestion (e.g. the seed script):
+
+    python -m app.backfill_aggregates
+"""
+
+import asyncio
+
+from loguru import logger
+
+from app.core.logging import set_logger
+from app.db.postgres_pool import create_engine_pg, create_session_factory
+from app.services.event_aggregates import backfill_event_aggregates
+
+
+async def run_backfill() -> None:
+    engine = create_engine_pg()
+    try:
+        async with create_session_factory(engine)() as session:
+            logger.info("Rebuilding user event aggregates")
+            await backfill_event_aggregates(session)
+        logger.success("User event aggregates rebuilt")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    set_logger()
+    asyncio.run(run_backfill())
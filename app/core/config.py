@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -39,6 +40,179 @@ class Settings(BaseSettings):
         description="Redis connection string",
     )
 
+    # Ingestion Settings
+    INGEST_BATCH_SIZE: int = Field(
+        default=500,
+        alias="INGEST_BATCH_SIZE",
+        description="Maximum number of events written to PostgreSQL per batch",
+    )
+    INGEST_FLUSH_INTERVAL: float = Field(
+        default=0.5,
+        alias="INGEST_FLUSH_INTERVAL",
+        description="Seconds to wait for a batch to fill before flushing it",
+    )
+    INGEST_BUFFER_SIZE: int = Field(
+        default=10_000,
+        alias="INGEST_BUFFER_SIZE",
+        description="Maximum number of events buffered in memory per worker",
+    )
+    INGEST_MAX_BATCH_EVENTS: int = Field(
+        default=10_000,
+        alias="INGEST_MAX_BATCH_EVENTS",
+        description="Maximum number of events accepted by one batch request",
+    )
+    INGEST_MAX_BODY_BYTES: int = Field(
+        default=10 * 1024 * 1024,
+        alias="INGEST_MAX_BODY_BYTES",
+        description="Maximum size of a JSON array batch request body",
+    )
+    INGEST_MAX_LINE_BYTES: int = Field(
+        default=64 * 1024,
+        alias="INGEST_MAX_LINE_BYTES",
+        description="Maximum size of one event line of an NDJSON batch request",
+    )
+    INGEST_QUEUE_BACKEND: Literal["stream", "inline"] = Field(
+        default="stream",
+        alias="INGEST_QUEUE_BACKEND",
+        description=(
+            "stream: queue events in a Redis Stream drained by the ingestion "
+            "worker, inline: process them inside the API worker"
+        ),
+    )
+    INGEST_STREAM_NAME: str = Field(
+        default="ingestion:events",
+        alias="INGEST_STREAM_NAME",
+    )
+    INGEST_STREAM_GROUP: str = Field(
+        default="ingestion-writers",
+        alias="INGEST_STREAM_GROUP",
+    )
+    INGEST_STREAM_MAX_PENDING: int = Field(
+        default=1_000_000,
+        alias="INGEST_STREAM_MAX_PENDING",
+        description="Events waiting in the stream before new ones are refused",
+    )
+    INGEST_STREAM_BLOCK_MS: int = Field(
+        default=1_000,
+        alias="INGEST_STREAM_BLOCK_MS",
+        description="How long a consumer blocks waiting for new entries",
+    )
+    INGEST_STREAM_CLAIM_IDLE_MS: int = Field(
+        default=60_000,
+        alias="INGEST_STREAM_CLAIM_IDLE_MS",
+        description="Idle time after which pending entries are claimed again",
+    )
+    INGEST_STREAM_DEAD_LETTER_NAME: str = Field(
+        default="ingestion:events:dead",
+        alias="INGEST_STREAM_DEAD_LETTER_NAME",
+        description="Stream keeping the entries that could not be ingested",
+    )
+    INGEST_STREAM_MAX_DELIVERIES: int = Field(
+        default=5,
+        alias="INGEST_STREAM_MAX_DELIVERIES",
+        description="Deliveries of an entry before it is moved to the dead letters",
+    )
+
+    # Web Events Partitioning Settings
+    WEB_EVENTS_PARTITIONS_AHEAD: int = Field(
+        default=3,
+        alias="WEB_EVENTS_PARTITIONS_AHEAD",
+        description="Monthly web_events partitions created ahead of the current one",
+    )
+    WEB_EVENTS_RETENTION_MONTHS: int = Field(
+        default=13,
+        alias="WEB_EVENTS_RETENTION_MONTHS",
+        description="Months of web_events kept attached, 0 keeps every partition",
+    )
+    WEB_EVENTS_EXPIRED_PARTITIONS: Literal["detach", "drop"] = Field(
+        default="detach",
+        alias="WEB_EVENTS_EXPIRED_PARTITIONS",
+        description=(
+            "detach: keep expired partitions as standalone tables for archiving, "
+            "drop: delete them"
+        ),
+    )
+
+    # Event Archive Settings
+    EVENT_ARCHIVE_DIR: str = Field(
+        default="data/archive",
+        alias="EVENT_ARCHIVE_DIR",
+        description="Directory of the Parquet archive of web_events and catalog",
+    )
+    ANALYTICS_THREADS: int = Field(
+        default=2,
+        alias="ANALYTICS_THREADS",
+        description="Threads DuckDB may use for the analytics reports",
+    )
+    ANALYTICS_CACHE_TTL: float = Field(
+        default=3600,
+        alias="ANALYTICS_CACHE_TTL",
+        description=(
+            "Seconds an analytics report is cached, a new archive run "
+            "invalidates it sooner"
+        ),
+    )
+
+    # Recommendations Settings
+    RECOMMENDATIONS_TOP_K: int = Field(
+        default=20,
+        alias="RECOMMENDATIONS_TOP_K",
+        description="Most similar games kept in memory for each game",
+    )
+    RECOMMENDATIONS_REFRESH_INTERVAL: float = Field(
+        default=300,
+        alias="RECOMMENDATIONS_REFRESH_INTERVAL",
+        description=(
+            "Seconds between two updates of the co-view model by the "
+            "recommendations worker"
+        ),
+    )
+    RECOMMENDATIONS_RELOAD_INTERVAL: float = Field(
+        default=30,
+        alias="RECOMMENDATIONS_RELOAD_INTERVAL",
+        description="Seconds between two checks for a new co-view index by the API",
+    )
+
+    # Customer Insights Settings
+    INSIGHTS_QUERY_MODE: Literal["single", "concurrent"] = Field(
+        default="single",
+        alias="INSIGHTS_QUERY_MODE",
+        description=(
+            "single: compute insights with one SQL statement, concurrent: run "
+            "the insight sub-queries in parallel on separate pooled connections"
+        ),
+    )
+    INSIGHTS_MAX_CONNECTIONS: int = Field(
+        default=3,
+        alias="INSIGHTS_MAX_CONNECTIONS",
+        description="Pooled connections one concurrent insights request may use",
+    )
+    INSIGHTS_CACHE_TTL: int = Field(
+        default=300,
+        alias="INSIGHTS_CACHE_TTL",
+        description="Seconds customer insights stay cached in Redis, 0 disables it",
+    )
+
+    # Catalog Cache Settings
+    CATALOG_CACHE_MAXSIZE: int = Field(
+        default=10_000,
+        alias="CATALOG_CACHE_MAXSIZE",
+        description="Entries kept per in-process catalog cache before LRU eviction",
+    )
+    CATALOG_CACHE_TTL: float = Field(
+        default=300,
+        alias="CATALOG_CACHE_TTL",
+        description=(
+            "Seconds a catalog entry is cached, bounds staleness when an "
+            "invalidation message is lost"
+        ),
+    )
+    CATALOG_CACHE_CHANNEL: str = Field(
+        default="catalog:invalidate",
+        alias="CATALOG_CACHE_CHANNEL",
+        description="Redis pub/sub channel broadcasting catalog changes to workers",
+    )
+
     model_config = SettingsConfigDict(
         env_file=".env",
         case_sensitive=True,
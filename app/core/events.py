@@ -1,7 +1,17 @@
+import asyncio
+from contextlib import suppress
+
+import redis.asyncio as redis
 from fastapi import FastAPI
 
+from app.core.config import settings
 from app.db.postgres_pool import create_engine_pg, create_session_factory
 from app.db.redis_client import connect_redis_pool
+from app.services.analytics import AnalyticsEngine
+from app.services.batch_writer import WebEventBatchWriter
+from app.services.catalog_cache import catalog_cache
+from app.services.ingestion_queue import InlineIngestionQueue, RedisStreamQueue
+from app.services.recommendations import CoViewRecommender
 
 
 async def startup_db_clients(app: FastAPI) -> None:
@@ -14,8 +24,44 @@ async def startup_db_clients(app: FastAPI) -> None:
     session_factory = create_session_factory(engine)
     app.state.session_factory = session_factory
 
+    redis_client = redis.Redis(connection_pool=redis_pool)
+    catalog_cache.connect(redis_client)
+    app.state.catalog_listener = asyncio.create_task(
+        catalog_cache.listen(redis_client),
+        name="catalog-cache-invalidation",
+    )
+
+    if settings.INGEST_QUEUE_BACKEND == "stream":
+        app.state.ingestion_queue = RedisStreamQueue(redis_client)
+    else:
+        event_writer = WebEventBatchWriter(session_factory, redis_client=redis_client)
+        event_writer.start()
+        app.state.ingestion_queue = InlineIngestionQueue(redis_client, event_writer)
+
+    app.state.analytics = AnalyticsEngine()
+
+    # Built by app.recommendations_worker, only loaded here
+    recommender = CoViewRecommender(redis_client)
+    app.state.recommender = recommender
+    app.state.recommender_task = asyncio.create_task(
+        recommender.run(),
+        name="recommendations-reload",
+    )
+
 
 async def shutdown_db_clients(app: FastAPI) -> None:
+    if app.state.catalog_listener:
+        app.state.catalog_listener.cancel()
+        with suppress(asyncio.CancelledError):
+            await app.state.catalog_listener
+    if app.state.recommender_task:
+        app.state.recommender_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await app.state.recommender_task
+    if app.state.ingestion_queue:
+        await app.state.ingestion_queue.close()
+    if app.state.analytics:
+        app.state.analytics.close()
     if app.state.redis_pool:
         await app.state.redis_pool.disconnect()
     if app.state.engine_pg:
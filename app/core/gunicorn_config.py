@@ -1,7 +1,45 @@
+import os
+from pathlib import Path
+
+from gunicorn.arbiter import Arbiter
+from gunicorn.workers.base import Worker
+
+# Workers write their metrics to files in this directory. It has to be set
+# before prometheus_client is first imported, hence the imports in the hooks.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc")
+
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 8001))
+
 # Gunicorn configuration
 bind = "0.0.0.0:8000"
-workers = 1
+# One worker per core by default
+workers = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
 loglevel = "info"
 errorlog = "-"
 accesslog = "-"
-capture_output = True
\ No newline at end of file
+capture_output = True
+
+
+def on_starting(server: Arbiter) -> None:
+    """Drop the metric files left by a previous run"""
+    path = Path(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+    path.mkdir(parents=True, exist_ok=True)
+    for metric_file in path.glob("*.db"):
+        metric_file.unlink()
+
+
+def when_ready(server: Arbiter) -> None:
+    """Serve the metrics of all workers, aggregated, from the master process"""
+    from prometheus_client import CollectorRegistry, multiprocess, start_http_server
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    start_http_server(METRICS_PORT, registry=registry)
+    server.log.info(f"Prometheus metrics available on port {METRICS_PORT}")
+
+
+def child_exit(server: Arbiter, worker: Worker) -> None:
+    """Stop reporting the live gauges of a worker that exited"""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
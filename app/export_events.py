@@ -0,0 +1,87 @@
+"""
+Export raw web events of a user, a session or a time range.
+
+Rows are streamed from a server-side cursor to a file as NDJSON or CSV, in
+constant memory whatever their number:
+
+    python -m app.export_events --since 2026-09-01 --until 2026-10-01 \\
+        --format csv --output events.csv
+
+`--output -` writes to stdout, the logs then go to stderr.
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from typing import BinaryIO, get_args
+
+from loguru import logger
+from sqlalchemy import Select
+
+from app.core.logging import set_logger
+from app.db.postgres_pool import create_engine_pg, create_session_factory
+from app.services.event_export import (
+    EXPORT_BATCH_SIZE,
+    EventExportFilter,
+    ExportFormat,
+    export_query,
+    stream_export,
+)
+from app.services.exceptions import InvalidExportFilter
+
+
+def parse_args() -> tuple[argparse.Namespace, Select]:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--user-id", type=int)
+    parser.add_argument("--session-id")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="inclusive")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="exclusive")
+    parser.add_argument("--format", choices=get_args(ExportFormat), default="ndjson")
+    parser.add_argument("--output", required=True, help="file path, - for stdout")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+    filters = EventExportFilter(
+        user_id=args.user_id,
+        session_id=args.session_id,
+        since=args.since,
+        until=args.until,
+    )
+    try:
+        return args, export_query(filters)
+    except InvalidExportFilter as e:
+        parser.error(str(e))
+
+
+async def run_export(
+    args: argparse.Namespace,
+    query: Select,
+    output: BinaryIO,
+) -> None:
+    engine = create_engine_pg()
+    written = 0
+    try:
+        async for chunk in stream_export(
+            create_session_factory(engine),
+            query,
+            args.format,
+            args.batch_size,
+        ):
+            output.write(chunk)
+            written += len(chunk)
+        output.flush()
+        logger.success(f"Exported {written} bytes of web events")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    set_logger()
+    args, query = parse_args()
+    if args.output == "-":
+        logger.remove()
+        logger.add(sys.stderr, format="{time} {level} {message}", level="INFO")
+        asyncio.run(run_export(args, query, sys.stdout.buffer))
+    else:
+        with open(args.output, "wb") as output:
+            asyncio.run(run_export(args, query, output))
@@ -0,0 +1,46 @@
+"""
+Load a large synthetic dataset to benchmark the insights queries.
+
+Users, catalog and web_events are streamed into PostgreSQL with COPY, the
+same options and seed always generate the same rows:
+
+    python -m app.generate_dataset --users 1000000 --events 50000000 --seed 7
+
+See `python -m app.generate_dataset --help` for every option.
+"""
+
+import argparse
+import asyncio
+
+from loguru import logger
+
+from app.core.logging import set_logger
+from app.db.postgres_pool import create_engine_pg, create_session_factory
+from app.services.synthetic_data import DatasetSpec, load_synthetic_dataset
+
+
+def parse_spec() -> DatasetSpec:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    for name, field in DatasetSpec.model_fields.items():
+        parser.add_argument(
+            f"--{name.replace('_', '-')}",
+            type=field.annotation,
+            default=field.default,
+            help=f"default: {field.default}",
+        )
+    return DatasetSpec(**vars(parser.parse_args()))
+
+
+async def run_generation(spec: DatasetSpec) -> None:
+    engine = create_engine_pg()
+    try:
+        async with create_session_factory(engine)() as session:
+            copied = await load_synthetic_dataset(session, spec)
+        logger.success(f"Synthetic dataset loaded: {copied}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    set_logger()
+    asyncio.run(run_generation(parse_spec()))
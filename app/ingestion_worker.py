@@ -0,0 +1,48 @@
+"""
+Standalone consumer that drains the ingestion Redis Stream into PostgreSQL.
+
+Run one or more of these next to the API when INGEST_QUEUE_BACKEND=stream:
+
+    python -m app.ingestion_worker
+"""
+
+import asyncio
+import os
+import signal
+import socket
+
+import redis.asyncio as redis
+from loguru import logger
+
+from app.core.logging import set_logger
+from app.db.postgres_pool import create_engine_pg, create_session_factory
+from app.db.redis_client import connect_redis_pool
+from app.services.ingestion_queue import IngestionStreamConsumer
+
+
+async def run_worker() -> None:
+    redis_client = redis.Redis(connection_pool=connect_redis_pool())
+    engine = create_engine_pg()
+    consumer = IngestionStreamConsumer(
+        redis_client,
+        create_session_factory(engine),
+        consumer_name=f"{socket.gethostname()}-{os.getpid()}",
+    )
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    try:
+        await consumer.run(stop)
+    finally:
+        logger.info("Stopping ingestion worker")
+        await redis_client.aclose()
+        await redis_client.connection_pool.disconnect()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    set_logger()
+    asyncio.run(run_worker())
@@ -1,20 +1,26 @@
+import os
 import time
-from collections.abc import Callable
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from datetime import datetime
 from functools import wraps
 from typing import Any
 
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI, Response
 from loguru import logger
 from prometheus_client import (
     CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
     Counter,
     Gauge,
     Histogram,
     Summary,
     generate_latest,
+    multiprocess,
     start_http_server,
 )
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 # Create HTTP request metrics
 REQUEST_COUNT = Counter(
@@ -23,13 +29,34 @@ REQUEST_COUNT = Counter(
     ["method", "endpoint", "status"],
 )
 
-ACTIVE_REQUESTS = Gauge("app_active_requests", "Current number of active requests")
+ACTIVE_REQUESTS = Gauge(
+    "app_active_requests",
+    "Current number of active requests",
+    multiprocess_mode="livesum",
+)
 
+# Most requests take a few milliseconds, so the buckets start well below one
 REQUEST_DURATION = Histogram(
     "app_request_duration_seconds",
     "Request duration in seconds",
     ["method", "endpoint"],
-    buckets=[0.1, 0.3, 0.5, 0.7, 1, 3, 5, 7, 10],
+    buckets=[
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.0075,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1,
+        2.5,
+        5,
+        10,
+    ],
 )
 
 REQUEST_SIZE = Summary(
@@ -38,6 +65,15 @@ REQUEST_SIZE = Summary(
     ["method", "endpoint"],
 )
 
+RESPONSE_SIZE = Summary(
+    "app_response_size_bytes",
+    "Response size in bytes",
+    ["method", "endpoint"],
+)
+
+# Endpoint label of requests no route matched, keeps the label set bounded
+UNMATCHED_ENDPOINT = "unmatched"
+
 # Application-specific metrics
 DB_QUERY_DURATION = Histogram(
     "app_db_query_duration_seconds",
@@ -59,45 +95,147 @@ CACHE_MISS_COUNTER = Counter(
 )
 
 
+# Ingestion pipeline metrics, from the API accepting events to their commit
+INGEST_STAGE_DURATION = Histogram(
+    "app_ingest_stage_duration_seconds",
+    "Duration of one ingestion stage call, for a single event or a batch",
+    ["stage"],
+    buckets=[
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1,
+        2.5,
+        5,
+    ],
+)
+
+INGEST_STAGE_FAILURES = Counter(
+    "app_ingest_stage_failures_total",
+    "Ingestion stage calls that raised",
+    ["stage"],
+)
+
+INGEST_IN_FLIGHT = Gauge(
+    "app_ingest_in_flight_events",
+    "Events currently going through an ingestion stage",
+    ["stage"],
+    multiprocess_mode="livesum",
+)
+
+INGEST_BUFFERED_EVENTS = Gauge(
+    "app_ingest_buffered_events",
+    "Events waiting in the in-process batch writer buffers",
+    multiprocess_mode="livesum",
+)
+
+INGEST_STREAM_LENGTH = Gauge(
+    "app_ingest_stream_length",
+    "Entries in the ingestion stream, sampled by the ingestion workers",
+    multiprocess_mode="mostrecent",
+)
+
+INGEST_EVENTS_DROPPED = Counter(
+    "app_ingest_events_dropped_total",
+    "Accepted events that were not stored in PostgreSQL",
+    ["reason"],
+)
+
+INGEST_LAG = Histogram(
+    "app_ingest_lag_seconds",
+    "Time from the event timestamp to the commit of the event in PostgreSQL",
+    buckets=[0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600],
+)
+
+
+def multiprocess_mode() -> bool:
+    """Whether metrics are shared by several worker processes, see gunicorn_config"""
+    return "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+
+def metrics_registry() -> CollectorRegistry:
+    """Registry to expose, aggregated over every worker in multiprocess mode"""
+    if not multiprocess_mode():
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
 def start_metrics_server(port: int = 8001) -> None:
-    start_http_server(port)
+    start_http_server(port, registry=metrics_registry())
     logger.info(f"Prometheus metrics available at http://localhost:{port}/metrics")
 
 
-class PrometheusMiddleware(BaseHTTPMiddleware):
+class PrometheusMiddleware:
     """
-    FastAPI middleware for collecting Prometheus metrics
+    ASGI middleware for collecting Prometheus metrics.
+
+    Requests are labelled by the template of the route that handled them,
+    e.g. `/api/v1/analytics/sessions/{session_id}/insights`, so path
+    parameters do not create a time series each. Status and sizes are read
+    from the ASGI messages themselves, so streamed bodies are counted too:
+    the request size is what the application read of the body.
     """
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Track request count and duration
-        method = request.method
-        path = request.url.path
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
 
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         # Exclude metrics endpoint itself from metrics
-        if path == "/metrics":
-            return await call_next(request)
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        request_size = 0
+        response_size = 0
+
+        async def receive_counting() -> Message:
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                request_size += len(message.get("body", b""))
+            return message
+
+        async def send_counting(message: Message) -> None:
+            nonlocal status, response_size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
 
         ACTIVE_REQUESTS.inc()
-        start_time = time.time()
-
+        start_time = time.perf_counter()
         try:
-            response = await call_next(request)
-            status = response.status_code
-            REQUEST_SIZE.labels(method=method, endpoint=path).observe(
-                int(response.headers.get("content-length", 0)),
-            )
-            return response
-        except Exception as e:
-            status = 500
-            raise e
+            await self.app(scope, receive_counting, send_counting)
         finally:
-            duration = time.time() - start_time
-            REQUEST_DURATION.labels(method=method, endpoint=path).observe(duration)
-            REQUEST_COUNT.labels(method=method, endpoint=path, status=status).inc()
+            duration = time.perf_counter() - start_time
+            method = scope["method"]
+            endpoint = route_template(scope)
+            REQUEST_DURATION.labels(method=method, endpoint=endpoint).observe(duration)
+            REQUEST_COUNT.labels(method=method, endpoint=endpoint, status=status).inc()
+            REQUEST_SIZE.labels(method=method, endpoint=endpoint).observe(request_size)
+            RESPONSE_SIZE.labels(method=method, endpoint=endpoint).observe(
+                response_size,
+            )
             ACTIVE_REQUESTS.dec()
 
 
+def route_template(scope: Scope) -> str:
+    """Path template of the route the router matched, stored in the scope"""
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED_ENDPOINT)
+
+
 def track_request_duration(method: str, endpoint: str) -> Callable:
     """Legacy decorator to measure request duration (non-async)"""
 
@@ -168,6 +306,34 @@ def track_cache(cache_name: str) -> Callable:
     return decorator
 
 
+@contextmanager
+def track_ingest_stage(stage: str, events: int = 1) -> Iterator[None]:
+    """Time an ingestion stage, counting its failures and the events in flight"""
+    in_flight = INGEST_IN_FLIGHT.labels(stage=stage)
+    in_flight.inc(events)
+    start_time = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        INGEST_STAGE_FAILURES.labels(stage=stage).inc()
+        raise
+    finally:
+        INGEST_STAGE_DURATION.labels(stage=stage).observe(
+            time.perf_counter() - start_time,
+        )
+        in_flight.dec(events)
+
+
+def observe_ingest_lag(timestamps: Iterable[datetime]) -> None:
+    """
+    Record how long ago committed events happened. Event timestamps are naive
+    local times like the web_events column, clock skew is clamped to zero.
+    """
+    now = datetime.now()
+    for timestamp in timestamps:
+        INGEST_LAG.observe(max((now - timestamp).total_seconds(), 0))
+
+
 def setup_metrics(
     app: FastAPI,
     metrics_endpoint: bool = True,
@@ -179,7 +345,9 @@ def setup_metrics(
     Args:
         app: FastAPI application
         metrics_endpoint: Whether to add a /metrics endpoint to the app
-        metrics_port: If provided, starts a separate metrics server on this port
+        metrics_port: If provided, starts a separate metrics server on this port.
+            Ignored in multiprocess mode, where the gunicorn master serves the
+            metrics of all workers instead of each worker binding the port.
     """
     # Add middleware for tracking requests
     app.add_middleware(PrometheusMiddleware)
@@ -188,9 +356,12 @@ def setup_metrics(
 
         @app.get("/metrics")
         def metrics() -> Response:
-            return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+            return Response(
+                content=generate_latest(metrics_registry()),
+                media_type=CONTENT_TYPE_LATEST,
+            )
 
-    if metrics_port:
+    if metrics_port and not multiprocess_mode():
         start_metrics_server(metrics_port)
 
     return app
@@ -3,11 +3,13 @@ from decimal import Decimal
 from enum import Enum
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Table,
@@ -159,6 +161,13 @@ class Game(Base):
     order_items = relationship("OrderItem", back_populates="game")
     web_events = relationship("WebEvents", back_populates="game")
 
+    # Keyset pagination of the catalog, see app/services/pagination.py
+    __table_args__ = (
+        Index("ix_games_title_id", "title", "id"),
+        Index("ix_games_price_id", "price", "id"),
+        Index("ix_games_release_date_id", "release_date", "id"),
+    )
+
 
 class Genre(Base):
     __tablename__ = "genres"
@@ -209,6 +218,9 @@ class User(Base):
     cart = relationship("Cart", back_populates="user", uselist=False)
     web_events = relationship("WebEvents", back_populates="user")
 
+    # Keyset pagination by signup date, see app/services/pagination.py
+    __table_args__ = (Index("ix_users_created_at_id", "created_at", "id"),)
+
 
 class WebEvents(Base):
     __tablename__ = "web_events"
@@ -249,8 +261,10 @@ class WebEvents(Base):
         String,
         nullable=True,
     )  # JSON string of applied filters
+    # Partition key, so it has to be part of the primary key
     timestamp: Mapped[datetime] = mapped_column(
         DateTime,
+        primary_key=True,
         nullable=False,
         server_default=func.now(),
     )
@@ -259,6 +273,66 @@ class WebEvents(Base):
     user = relationship("User", back_populates="web_events")
     game = relationship("Game", back_populates="web_events")
 
+    # Every customer insights query filters by user first
+    __table_args__ = (
+        # Recent filters and the engagement window
+        Index("ix_web_events_user_id_timestamp", "user_id", "timestamp"),
+        # Viewing time, genre preferences and recent interests
+        Index(
+            "ix_web_events_user_id_event_type_game_id",
+            "user_id",
+            "event_type",
+            "game_id",
+            postgresql_include=["timestamp", "time_spent"],
+        ),
+        # Platform preferences and usage
+        Index(
+            "ix_web_events_user_id_platform",
+            "user_id",
+            "platform",
+            postgresql_include=["time_spent"],
+        ),
+        # Session exports, see app/services/event_export.py
+        Index("ix_web_events_session_id_timestamp", "session_id", "timestamp"),
+        # Monthly partitions, see app/services/partition_maintenance.py
+        {"postgresql_partition_by": 'RANGE ("timestamp")'},
+    )
+
+
+# Rollups of web_events kept up to date by the ingestion batch writer, so
+# customer insights read a handful of rows instead of the whole history
+class UserEventAggregates(Base):
+    __tablename__ = "user_event_aggregates"
+
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("users.id"),
+        primary_key=True,
+    )
+    # Empty string for events sent without a platform
+    platform: Mapped[str] = mapped_column(String, primary_key=True)
+    event_type: Mapped[str] = mapped_column(String, primary_key=True)
+    event_count: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    # Only events that reported time_spent count towards the average
+    time_spent_total: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    time_spent_count: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
+class UserGenreAggregates(Base):
+    __tablename__ = "user_genre_aggregates"
+
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("users.id"),
+        primary_key=True,
+    )
+    genre_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("genres.id"),
+        primary_key=True,
+    )
+    view_count: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
 
 class Review(Base):
     __tablename__ = "reviews"
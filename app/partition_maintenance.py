@@ -0,0 +1,40 @@
+"""
+Pre-create upcoming web_events partitions and expire old ones.
+
+Run it at least once a month, e.g. daily from cron or the scheduler of your
+platform:
+
+    python -m app.partition_maintenance
+"""
+
+import asyncio
+from datetime import date
+
+from loguru import logger
+
+from app.core.logging import set_logger
+from app.db.postgres_pool import create_engine_pg, create_session_factory
+from app.services.partition_maintenance import (
+    create_web_events_partitions,
+    expire_web_events_partitions,
+)
+
+
+async def run_maintenance() -> None:
+    engine = create_engine_pg()
+    today = date.today()
+    try:
+        async with create_session_factory(engine)() as session:
+            created = await create_web_events_partitions(session, today)
+            expired = await expire_web_events_partitions(session, today)
+        logger.success(
+            f"web_events partitions created: {created or 'none'}, "
+            f"expired: {expired or 'none'}",
+        )
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    set_logger()
+    asyncio.run(run_maintenance())
@@ -0,0 +1,43 @@
+"""
+Standalone job that builds the co-view recommendations and publishes them.
+
+Run a single one next to the API, the API workers load the index it
+publishes to Redis:
+
+    python -m app.recommendations_worker
+"""
+
+import asyncio
+import signal
+
+import redis.asyncio as redis
+from loguru import logger
+
+from app.core.logging import set_logger
+from app.db.postgres_pool import create_engine_pg, create_session_factory
+from app.db.redis_client import connect_redis_pool
+from app.services.recommendations import CoViewIndexBuilder
+
+
+async def run_worker() -> None:
+    redis_client = redis.Redis(connection_pool=connect_redis_pool())
+    engine = create_engine_pg()
+    builder = CoViewIndexBuilder(create_session_factory(engine), redis_client)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    try:
+        await builder.run(stop)
+    finally:
+        logger.info("Stopping recommendations worker")
+        await redis_client.aclose()
+        await redis_client.connection_pool.disconnect()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    set_logger()
+    asyncio.run(run_worker())
@@ -0,0 +1,39 @@
+from datetime import date, datetime
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class GenreWeek(BaseModel):
+    week: date
+    genre_id: int
+    genre_name: str
+    views: int
+
+
+class PlatformShare(BaseModel):
+    period: date
+    platform: str
+    events: int
+    share: float  # of the events of the period with a platform
+
+
+class ConversionFunnel(BaseModel):
+    """Sessions reaching each step, after the previous one"""
+
+    viewed: int
+    added_to_cart: int
+    purchased: int
+    view_to_cart_rate: float
+    cart_to_purchase_rate: float
+
+
+class AnalyticsReport(BaseModel, Generic[T]):
+    """A report over the events archived up to `watermark`"""
+
+    watermark: str
+    since: datetime
+    until: datetime
+    data: T
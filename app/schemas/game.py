@@ -1,4 +1,6 @@
-from pydantic import BaseModel, ConfigDict
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 
 
 class GameBase(BaseModel):
@@ -34,11 +36,26 @@ class GameUpdate(GameBase):
 
 
 class GameInDB(GameBase):
+    """A games row: the collector columns are nullable in the table"""
+
     id: int
+    release_date: datetime
+    region: str | None = None
+    condition_rating: int | None = None
+    has_original_box: bool | None = None
+    has_manual: bool | None = None
+    is_rare: bool | None = None
+    collector_value: float | None = None
+    serial_number: str | None = None
+    special_edition: bool | None = None
 
     model_config = ConfigDict(from_attributes=True)
 
 
+# Validates every row of a page in a single call
+games_adapter = TypeAdapter(tuple[GameInDB, ...])
+
+
 class GameResponse(BaseModel):
     status: str
     data: GameInDB
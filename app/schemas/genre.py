@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 
 
 class GenreBase(BaseModel):
@@ -21,6 +21,10 @@ class GenreInDB(GenreBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+# Validates every row of a page in a single call
+genres_adapter = TypeAdapter(tuple[GenreInDB, ...])
+
+
 class GenreResponse(BaseModel):
     status: str
     data: GenreInDB
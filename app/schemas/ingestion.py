@@ -1,6 +1,6 @@
 from typing import Any
 
-from pydantic import BaseModel, Field, NaiveDatetime
+from pydantic import BaseModel, Field, NaiveDatetime, TypeAdapter
 
 
 class IngestionSchema(BaseModel):
@@ -27,6 +27,10 @@ class IngestionSchema(BaseModel):
     referrer_page: str
 
 
+# Reused to validate events of a batch one by one
+ingestion_adapter = TypeAdapter(IngestionSchema)
+
+
 class IngestionResponse(BaseModel):
     """
     Response model for data ingestion endpoints.
@@ -40,3 +44,31 @@ class IngestionResponse(BaseModel):
     status: str = Field(..., description="Status of the ingestion request")
     message: str = Field(..., description="Human-readable description of the result")
     request_id: Any = Field(..., description="Identifier for tracking this request")
+
+
+class IngestionItemError(BaseModel):
+    """
+    Validation errors for a single event of a batch.
+
+    Attributes:
+        index (int): Position of the event in the array or NDJSON stream
+        errors (list[dict[str, Any]]): Pydantic validation errors for the event
+    """
+
+    index: int = Field(..., description="Position of the event in the batch")
+    errors: list[dict[str, Any]] = Field(..., description="Validation errors")
+
+
+class IngestionBatchResponse(IngestionResponse):
+    """
+    Response model for the batch ingestion endpoint.
+
+    Attributes:
+        accepted (int): Number of events queued for processing
+        rejected (int): Number of events that failed validation
+        errors (list[IngestionItemError]): Validation errors per rejected event
+    """
+
+    accepted: int = Field(..., description="Number of events queued")
+    rejected: int = Field(..., description="Number of events that failed validation")
+    errors: list[IngestionItemError] = Field(default_factory=list)
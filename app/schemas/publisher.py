@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict, HttpUrl
+from pydantic import BaseModel, ConfigDict, HttpUrl, TypeAdapter
 
 
 class PublisherBase(BaseModel):
@@ -21,6 +21,10 @@ class PublisherInDB(PublisherBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+# Validates every row of a page in a single call
+publishers_adapter = TypeAdapter(tuple[PublisherInDB, ...])
+
+
 class PublisherResponse(BaseModel):
     status: str
     data: PublisherInDB
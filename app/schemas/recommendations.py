@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+
+from app.schemas.response_base import ResponseBase
+
+
+class GameScore(BaseModel):
+    game_id: int
+    score: float
+
+
+class Recommendations(BaseModel):
+    games: list[GameScore]
+
+
+class RecommendationsResponse(ResponseBase[Recommendations]):
+    pass
@@ -9,3 +9,9 @@ class ResponseBase(BaseModel, Generic[T]):
     status: str
     message: str
     data: T | None = None
+
+
+class PageResponse(ResponseBase[list[T]], Generic[T]):
+    """A page of a list, pass `next_cursor` back as `cursor` for the next one"""
+
+    next_cursor: str | None = None
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 
 from app.schemas.response_base import ResponseBase
 
@@ -11,13 +11,16 @@ class User(BaseModel):
     email: str
     created_at: datetime
     is_active: bool
-    created_at: datetime
     orders: list[int]
     reviews: list[int]
 
     model_config = ConfigDict(from_attributes=True)
 
 
+# Validates every row of a page in a single call
+users_adapter = TypeAdapter(tuple[User, ...])
+
+
 class UserCreate(BaseModel):
     username: str
     email: str
@@ -0,0 +1,323 @@
+import asyncio
+import hashlib
+import threading
+from collections.abc import Callable, Sequence
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Literal
+
+import duckdb
+
+from app.core.config import settings
+from app.schemas.analytics import (
+    AnalyticsReport,
+    ConversionFunnel,
+    GenreWeek,
+    PlatformShare,
+)
+from app.services.catalog_cache import TTLCache
+from app.services.event_archive import (
+    DIMENSIONS,
+    EVENTS_DIR,
+    MANIFEST_FILE,
+    read_manifest,
+)
+from app.services.exceptions import InvalidReportRange, NoArchive
+
+ANALYTICS_CACHE_MAXSIZE = 256
+TOP_GENRES_PER_WEEK = 5
+
+ReportPeriod = Literal["day", "week", "month"]
+
+GenreWeeksReport = AnalyticsReport[list[GenreWeek]]
+PlatformShareReport = AnalyticsReport[list[PlatformShare]]
+FunnelReport = AnalyticsReport[ConversionFunnel]
+
+TOP_GENRES_SQL = """
+WITH counts AS (
+    SELECT
+        CAST(date_trunc('week', e.timestamp) AS DATE) AS week,
+        g.id AS genre_id,
+        g.name AS genre_name,
+        count(*) AS views
+    FROM web_events AS e
+    JOIN game_genre AS gg ON gg.game_id = e.game_id
+    JOIN genres AS g ON g.id = gg.genre_id
+    WHERE e.event_type = 'VIEW'
+        AND e.timestamp >= $since AND e.timestamp < $until
+    GROUP BY ALL
+)
+SELECT *
+FROM counts
+QUALIFY row_number() OVER (PARTITION BY week ORDER BY views DESC, genre_id)
+    <= $limit
+ORDER BY week, views DESC, genre_id
+"""
+
+PLATFORM_SHARE_SQL = """
+WITH counts AS (
+    SELECT
+        CAST(date_trunc($period, timestamp) AS DATE) AS period,
+        platform,
+        count(*) AS events
+    FROM web_events
+    WHERE timestamp >= $since AND timestamp < $until
+        AND platform IS NOT NULL AND platform <> ''
+    GROUP BY ALL
+)
+SELECT
+    period,
+    platform,
+    events,
+    events / sum(events) OVER (PARTITION BY period) AS share
+FROM counts
+ORDER BY period, events DESC, platform
+"""
+
+# A session reaches a step when it happens, for the same game, at or after
+# the previous one
+FUNNEL_SQL = """
+WITH events AS (
+    SELECT session_id, game_id, event_type, timestamp
+    FROM web_events
+    WHERE timestamp >= $since AND timestamp < $until
+        AND event_type IN ('VIEW', 'ADD_TO_CART', 'PURCHASE')
+        AND game_id IS NOT NULL
+        AND ($game_id IS NULL OR game_id = $game_id)
+),
+views AS (
+    SELECT session_id, game_id, min(timestamp) AS at
+    FROM events
+    WHERE event_type = 'VIEW'
+    GROUP BY ALL
+),
+carts AS (
+    SELECT v.session_id, v.game_id, min(e.timestamp) AS at
+    FROM views AS v
+    JOIN events AS e USING (session_id, game_id)
+    WHERE e.event_type = 'ADD_TO_CART' AND e.timestamp >= v.at
+    GROUP BY ALL
+),
+purchases AS (
+    SELECT DISTINCT c.session_id
+    FROM carts AS c
+    JOIN events AS e USING (session_id, game_id)
+    WHERE e.event_type = 'PURCHASE' AND e.timestamp >= c.at
+)
+SELECT
+    (SELECT count(DISTINCT session_id) FROM views) AS viewed,
+    (SELECT count(DISTINCT session_id) FROM carts) AS added_to_cart,
+    (SELECT count(*) FROM purchases) AS purchased
+"""
+
+
+def sql_string(value: Path | str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def scan(paths: Sequence[Path]) -> str:
+    """DuckDB table function reading the files, Parquet or CSV with a header"""
+    files = ", ".join(sql_string(path) for path in paths)
+    if paths[0].suffix == ".parquet":
+        return f"read_parquet([{files}], hive_partitioning = true)"
+    return f"read_csv([{files}], header = true)"
+
+
+def rate(count: int, total: int) -> float:
+    return round(count / total, 4) if total else 0.0
+
+
+def records(cursor: duckdb.DuckDBPyConnection) -> list[dict[str, Any]]:
+    names = [column[0] for column in cursor.description]
+    return [dict(zip(names, row, strict=True)) for row in cursor.fetchall()]
+
+
+class ArchiveSources:
+    """
+    The files of each table at one point of the archive.
+
+    An archive written by export_archive is identified by its manifest, and
+    its web_events are cut at exported_through so files published by a run
+    still in progress are ignored. Without a manifest, Parquet or CSV files
+    copied by hand are identified by their names, sizes and mtimes.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.exported_through: int | None = None
+        if (root / MANIFEST_FILE).exists():
+            manifest = read_manifest(root)
+            self.exported_through = manifest.exported_through
+            self.watermark = f"{manifest.exported_through}@{manifest.exported_at}"
+        else:
+            stats = [
+                (str(path), path.stat().st_size, path.stat().st_mtime_ns)
+                for paths in self.files().values()
+                for path in paths
+            ]
+            self.watermark = hashlib.blake2b(
+                repr(stats).encode("utf-8"),
+                digest_size=8,
+            ).hexdigest()
+
+    def files(self) -> dict[str, list[Path]]:
+        """
+        Raises:
+            NoArchive: If a table has no file
+        """
+        events_dir = self.root / EVENTS_DIR
+        tables = {
+            EVENTS_DIR: sorted(events_dir.glob("month=*/part-*.parquet"))
+            or sorted(events_dir.glob("*.csv")),
+        }
+        for name in DIMENSIONS:
+            tables[name] = [
+                path
+                for path in (self.root / f"{name}.parquet", self.root / f"{name}.csv")
+                if path.exists()
+            ][:1]
+        missing = [name for name, paths in tables.items() if not paths]
+        if missing:
+            msg = f"No {', '.join(missing)} files in {self.root}"
+            raise NoArchive(msg)
+        return tables
+
+    def views(self) -> dict[str, str]:
+        views = {
+            name: f"SELECT * FROM {scan(paths)}" for name, paths in self.files().items()
+        }
+        if self.exported_through is not None:
+            views[EVENTS_DIR] += f" WHERE id <= {self.exported_through:d}"
+        return views
+
+
+class AnalyticsEngine:
+    """
+    Reports over the event archive, with an in-process DuckDB.
+
+    Reports read the Parquet files written by export_archive, or CSV exports
+    laid out the same way, never the database. Each table is a view over its
+    files, recreated when the archive moves. Queries run in worker threads and
+    their JSON is cached by report, parameters and archive watermark, so a new
+    archive run makes every cached report stale at once.
+    """
+
+    def __init__(
+        self,
+        root: Path | str = settings.EVENT_ARCHIVE_DIR,
+        threads: int = settings.ANALYTICS_THREADS,
+        cache_ttl: float = settings.ANALYTICS_CACHE_TTL,
+    ) -> None:
+        self.root = Path(root)
+        self.cache = TTLCache(
+            "analytics", maxsize=ANALYTICS_CACHE_MAXSIZE, ttl=cache_ttl
+        )
+        self._db = duckdb.connect(config={"threads": threads})
+        self._views_lock = threading.Lock()
+        self._watermark: str | None = None
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _refresh_views(self, sources: ArchiveSources) -> None:
+        with self._views_lock:
+            if self._watermark == sources.watermark:
+                return
+            for name, query in sources.views().items():
+                self._db.execute(f"CREATE OR REPLACE VIEW {name} AS {query}")
+            self._watermark = sources.watermark
+
+    def _query(
+        self,
+        sources: ArchiveSources,
+        sql: str,
+        parameters: dict[str, Any],
+    ) -> list[dict[str, Any]]:
+        self._refresh_views(sources)
+        # A cursor is a connection of its own to the same database
+        with self._db.cursor() as cursor:
+            cursor.execute(sql, parameters)
+            return records(cursor)
+
+    async def _report(
+        self,
+        report: type[AnalyticsReport],
+        sql: str,
+        parameters: dict[str, Any],
+        build: Callable[[list[dict[str, Any]]], Any],
+    ) -> str:
+        """
+        The JSON of a report, from the cache or from DuckDB.
+
+        Raises:
+            InvalidReportRange: If since is not before until
+            NoArchive: If there is nothing to report on
+        """
+        since, until = parameters["since"], parameters["until"]
+        if since >= until:
+            msg = "since must be before until"
+            raise InvalidReportRange(msg)
+        sources = ArchiveSources(self.root)
+
+        async def load() -> str:
+            rows = await asyncio.to_thread(self._query, sources, sql, parameters)
+            return report(
+                watermark=sources.watermark,
+                since=since,
+                until=until,
+                data=build(rows),
+            ).model_dump_json()
+
+        key = (sql, tuple(sorted(parameters.items())), sources.watermark)
+        return await self.cache.get_or_load(key, load)
+
+    async def top_genres(
+        self,
+        since: datetime,
+        until: datetime,
+        limit: int = TOP_GENRES_PER_WEEK,
+    ) -> str:
+        """Most viewed genres of each week, weeks starting on Monday"""
+        return await self._report(
+            GenreWeeksReport,
+            TOP_GENRES_SQL,
+            {"since": since, "until": until, "limit": limit},
+            lambda rows: rows,
+        )
+
+    async def platform_share(
+        self,
+        since: datetime,
+        until: datetime,
+        period: ReportPeriod = "week",
+    ) -> str:
+        """Events of each platform per period, and their share of the period"""
+        return await self._report(
+            PlatformShareReport,
+            PLATFORM_SHARE_SQL,
+            {"since": since, "until": until, "period": period},
+            lambda rows: rows,
+        )
+
+    async def conversion_funnel(
+        self,
+        since: datetime,
+        until: datetime,
+        game_id: int | None = None,
+    ) -> str:
+        """Sessions going from a view to the cart and to a purchase"""
+
+        def funnel(rows: list[dict[str, Any]]) -> ConversionFunnel:
+            steps = rows[0]
+            return ConversionFunnel(
+                **steps,
+                view_to_cart_rate=rate(steps["added_to_cart"], steps["viewed"]),
+                cart_to_purchase_rate=rate(steps["purchased"], steps["added_to_cart"]),
+            )
+
+        return await self._report(
+            FunnelReport,
+            FUNNEL_SQL,
+            {"since": since, "until": until, "game_id": game_id},
+            funnel,
+        )
@@ -0,0 +1,216 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+from typing import Any, Literal, TypeVar
+
+import orjson
+import redis.asyncio as redis
+from loguru import logger
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.metrics import CACHE_HIT_COUNTER, CACHE_MISS_COUNTER
+
+T = TypeVar("T")
+CatalogEntity = Literal["game", "genre", "publisher"]
+
+RECONNECT_DELAY_SECONDS = 1.0
+
+
+class TTLCache:
+    """
+    Bounded in-process cache. Entries expire `ttl` seconds after being stored
+    and the least recently used one is evicted once `maxsize` is reached.
+
+    Meant for a single event loop, None values are not cached. Every `pop` or
+    `clear` starts a new generation and values loaded during an older one are
+    returned but not stored, as they may predate the invalidation.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int = settings.CATALOG_CACHE_MAXSIZE,
+        ttl: float = settings.CATALOG_CACHE_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > self._clock():
+                self._entries.move_to_end(key)
+                CACHE_HIT_COUNTER.labels(cache_name=self.name).inc()
+                return value
+            del self._entries[key]
+        CACHE_MISS_COUNTER.labels(cache_name=self.name).inc()
+        return None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if value is None or self._maxsize <= 0:
+            return
+        self._entries[key] = (self._clock() + self._ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._generation += 1
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+
+    async def get_or_load(self, key: Hashable, load: Callable[[], Awaitable[T]]) -> T:
+        """Return the cached value of `key`, loading and storing it on a miss"""
+        value = self.get(key)
+        if value is None:
+            generation = self._generation
+            value = await load()
+            if generation == self._generation:
+                self.set(key, value)
+        return value
+
+    async def get_many_or_load(
+        self,
+        keys: Iterable[Hashable],
+        load: Callable[[list[Hashable]], Awaitable[dict[Hashable, Any]]],
+    ) -> dict[Hashable, Any]:
+        """Look up several keys, loading every missing one with a single call"""
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            generation = self._generation
+            loaded = await load(missing)
+            if generation == self._generation:
+                for key, value in loaded.items():
+                    self.set(key, value)
+            found.update(loaded)
+        return found
+
+
+class CatalogCache:
+    """
+    Per-process caches of the rarely changing catalog: games, genres and
+    publishers by id, their paginated lists and the genre names of each game.
+
+    Service functions changing the catalog call `invalidate`, which drops the
+    affected entries locally and broadcasts the change on a Redis channel.
+    Every worker runs `listen` to apply the changes made by the others.
+    """
+
+    def __init__(self, channel: str = settings.CATALOG_CACHE_CHANNEL) -> None:
+        self.channel = channel
+        self.games = TTLCache("catalog_games")
+        self.game_lists = TTLCache("catalog_game_lists")
+        self.game_genres = TTLCache("catalog_game_genres")
+        self.genres = TTLCache("catalog_genres")
+        self.genre_lists = TTLCache("catalog_genre_lists")
+        self.publishers = TTLCache("catalog_publishers")
+        self.publisher_lists = TTLCache("catalog_publisher_lists")
+        self._redis_client: redis.Redis | None = None
+
+    def connect(self, redis_client: redis.Redis) -> None:
+        """Broadcast invalidations through this client from now on"""
+        self._redis_client = redis_client
+
+    def clear(self) -> None:
+        for cache in (
+            self.games,
+            self.game_lists,
+            self.game_genres,
+            self.genres,
+            self.genre_lists,
+            self.publishers,
+            self.publisher_lists,
+        ):
+            cache.clear()
+
+    def drop(self, entity: CatalogEntity, entity_id: int | None = None) -> None:
+        """Drop the local entries a change of this entity can make stale"""
+        if entity == "game":
+            self.games.pop(entity_id)
+            self.game_genres.pop(entity_id)
+            self.game_lists.clear()
+        elif entity == "genre":
+            self.genres.pop(entity_id)
+            self.genre_lists.clear()
+            # Genre names are copied into the games and the game to genres map
+            self.games.clear()
+            self.game_lists.clear()
+            self.game_genres.clear()
+        elif entity == "publisher":
+            self.publishers.pop(entity_id)
+            self.publisher_lists.clear()
+
+    async def invalidate(
+        self,
+        entity: CatalogEntity,
+        entity_id: int | None = None,
+    ) -> None:
+        """
+        Drop stale entries in this process and tell the other workers.
+
+        Called after the change is committed. A failed broadcast is only
+        logged: the change is stored and other workers catch up when their
+        entries expire.
+        """
+        self.drop(entity, entity_id)
+        if self._redis_client is None:
+            return
+        try:
+            await self._redis_client.publish(
+                self.channel,
+                orjson.dumps({"entity": entity, "id": entity_id}),
+            )
+        except RedisError as e:
+            logger.exception(f"Error broadcasting {entity} {entity_id} change: {e}")
+
+    def apply(self, data: bytes) -> None:
+        """Apply an invalidation message received from the channel"""
+        try:
+            message = orjson.loads(data)
+            self.drop(message["entity"], message["id"])
+        except (orjson.JSONDecodeError, KeyError, TypeError) as e:
+            logger.error(f"Ignoring malformed catalog invalidation {data!r}: {e}")
+
+    async def listen(self, redis_client: redis.Redis) -> None:
+        """
+        Apply invalidations broadcast by every worker until cancelled.
+
+        Messages published while disconnected are lost, so the whole cache is
+        dropped each time the subscription is (re)established.
+        """
+        while True:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                self.clear()
+                async for message in pubsub.listen():
+                    self.apply(message["data"])
+            except RedisError as e:
+                logger.warning(f"Catalog invalidation channel lost: {e}")
+                await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+            finally:
+                await pubsub.aclose()
+
+
+catalog_cache = CatalogCache()
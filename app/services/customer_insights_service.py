@@ -1,19 +1,43 @@
-from sqlalchemy import and_, desc, func, select, text
-from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+
+from sqlalchemy import JSON, desc, func, literal_column, select, text
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import joinedload
 
-from app.models.game_store import Game, Genre, WebEvents, game_genre
+from app.core.config import settings
+from app.models.game_store import (
+    Game,
+    Genre,
+    UserEventAggregates,
+    UserGenreAggregates,
+    WebEvents,
+    game_genre,
+)
 from app.schemas.customer_insights import (
+    CustomerInsightResponse,
     GameRecommendation,
     GenrePreference,
     PlatformStats,
     UserPreferences,
 )
+from app.services.catalog_cache import catalog_cache
+from app.services.event_aggregates import NO_PLATFORM
 
 # Constants
 ENGAGEMENT_WINDOW_DAYS = 7
 ENGAGEMENT_SCORE_MULTIPLIER = 10
 ENGAGEMENT_SCORE_MAX = 100
+TOP_GENRES_LIMIT = 5
+RECENT_INTERESTS_LIMIT = 5
+RECENT_FILTERS_LIMIT = 10
+
+EMPTY_JSON_ARRAY = literal_column("'[]'::json", JSON)
+
+
+def average(total: int | None, count: int | None) -> int:
+    """Truncated average of a rollup total, 0 when nothing was counted"""
+    return int(total // count) if count else 0
 
 
 async def get_user_platform_preferences(
@@ -22,14 +46,20 @@ async def get_user_platform_preferences(
 ) -> tuple[str, int]:
     """Get user's preferred platform and usage count"""
     stmt = (
-        select(WebEvents.platform, func.count(WebEvents.id).label("count"))
-        .filter(WebEvents.user_id == user_id)
-        .group_by(WebEvents.platform)
+        select(
+            UserEventAggregates.platform,
+            func.sum(UserEventAggregates.event_count).label("count"),
+        )
+        .filter(
+            UserEventAggregates.user_id == user_id,
+            UserEventAggregates.platform != NO_PLATFORM,
+        )
+        .group_by(UserEventAggregates.platform)
         .order_by(desc("count"))
     )
     result = await db.execute(stmt)
     platform_stats = result.first()
-    return platform_stats[0], platform_stats[1] if platform_stats else ("", 0)
+    return (platform_stats[0], platform_stats[1]) if platform_stats else ("", 0)
 
 
 async def get_user_filters(db: AsyncSession, user_id: int) -> list[str]:
@@ -38,7 +68,7 @@ async def get_user_filters(db: AsyncSession, user_id: int) -> list[str]:
         select(WebEvents.filters_applied)
         .filter(WebEvents.user_id == user_id, WebEvents.filters_applied.isnot(None))
         .order_by(desc(WebEvents.timestamp))
-        .limit(10)
+        .limit(RECENT_FILTERS_LIMIT)
     )
     result = await db.execute(stmt)
     filters = {f for (f,) in result.all() if f}  # Using a set directly
@@ -47,12 +77,15 @@ async def get_user_filters(db: AsyncSession, user_id: int) -> list[str]:
 
 async def get_average_viewing_time(db: AsyncSession, user_id: int) -> int:
     """Calculate average time spent viewing games"""
-    stmt = select(func.avg(WebEvents.time_spent)).filter(
-        WebEvents.user_id == user_id,
-        WebEvents.event_type == "VIEW",
+    stmt = select(
+        func.sum(UserEventAggregates.time_spent_total),
+        func.sum(UserEventAggregates.time_spent_count),
+    ).filter(
+        UserEventAggregates.user_id == user_id,
+        UserEventAggregates.event_type == "VIEW",
     )
     result = await db.execute(stmt)
-    return int(result.scalar() or 0)
+    return average(*result.one())
 
 
 async def get_user_preferences(db: AsyncSession, user_id: int) -> UserPreferences:
@@ -65,9 +98,23 @@ async def get_user_preferences(db: AsyncSession, user_id: int) -> UserPreference
     avg_time = await get_average_viewing_time(db, user_id)
     preferred_genres = await get_genre_preferences(db, user_id)
 
+    return build_user_preferences(
+        preferred_platform,
+        avg_time,
+        filters,
+        preferred_genres,
+    )
+
+
+def build_user_preferences(
+    preferred_platform: str,
+    avg_viewing_time: int,
+    filters: list[str],
+    preferred_genres: list[GenrePreference],
+) -> UserPreferences:
     return UserPreferences(
         preferred_platform=preferred_platform,
-        avg_viewing_time=avg_time,
+        avg_viewing_time=avg_viewing_time,
         common_filters=filters,
         price_sensitive=any("price_under" in (f or "") for f in filters),
         preferred_genres=preferred_genres,
@@ -78,12 +125,17 @@ async def get_game_genres(
     db: AsyncSession,
     game_ids: list[int],
 ) -> dict[int, list[str]]:
-    """Get genres for multiple games"""
-    stmt = select(Game).options(joinedload(Game.genres)).filter(Game.id.in_(game_ids))
-    result = await db.execute(stmt)
-    games = result.unique().scalars().all()
+    """Get genres for multiple games, only games missing from the cache are queried"""
+
+    async def load(missing: list[int]) -> dict[int, list[str]]:
+        stmt = (
+            select(Game).options(joinedload(Game.genres)).filter(Game.id.in_(missing))
+        )
+        result = await db.execute(stmt)
+        games = result.unique().scalars().all()
+        return {game.id: [genre.name for genre in game.genres] for game in games}
 
-    return {game.id: [genre.name for genre in game.genres] for game in games}
+    return await catalog_cache.game_genres.get_many_or_load(game_ids, load)
 
 
 async def get_genre_preferences(
@@ -92,20 +144,11 @@ async def get_genre_preferences(
 ) -> list[GenrePreference]:
     """Get user's preferred genres based on viewing history"""
     stmt = (
-        select(Genre.id, Genre.name, func.count(WebEvents.id).label("view_count"))
-        .join(game_genre, Genre.id == game_genre.c.genre_id)
-        .join(Game, Game.id == game_genre.c.game_id)
-        .join(
-            WebEvents,
-            and_(
-                WebEvents.game_id == Game.id,
-                WebEvents.user_id == user_id,
-                WebEvents.event_type == "VIEW",
-            ),
-        )
-        .group_by(Genre.id, Genre.name)
-        .order_by(desc("view_count"))
-        .limit(5)
+        select(Genre.id, Genre.name, UserGenreAggregates.view_count)
+        .join(UserGenreAggregates, UserGenreAggregates.genre_id == Genre.id)
+        .filter(UserGenreAggregates.user_id == user_id)
+        .order_by(desc(UserGenreAggregates.view_count), Genre.id)
+        .limit(TOP_GENRES_LIMIT)
     )
 
     result = await db.execute(stmt)
@@ -133,7 +176,7 @@ async def get_recent_interests(
         )
         .group_by(WebEvents.game_id)
         .order_by(desc("last_viewed"))
-        .limit(5)
+        .limit(RECENT_INTERESTS_LIMIT)
     )
     result = await db.execute(stmt)
     games_data = result.all()
@@ -157,12 +200,16 @@ async def get_platform_usage(db: AsyncSession, user_id: int) -> list[PlatformSta
     """Get platform usage statistics"""
     stmt = (
         select(
-            WebEvents.platform,
-            func.count(WebEvents.id).label("usage_count"),
-            func.avg(WebEvents.time_spent).label("avg_time"),
+            UserEventAggregates.platform,
+            func.sum(UserEventAggregates.event_count),
+            func.sum(UserEventAggregates.time_spent_total),
+            func.sum(UserEventAggregates.time_spent_count),
+        )
+        .filter(
+            UserEventAggregates.user_id == user_id,
+            UserEventAggregates.platform != NO_PLATFORM,
         )
-        .filter(WebEvents.user_id == user_id)
-        .group_by(WebEvents.platform)
+        .group_by(UserEventAggregates.platform)
     )
     result = await db.execute(stmt)
 
@@ -170,19 +217,279 @@ async def get_platform_usage(db: AsyncSession, user_id: int) -> list[PlatformSta
         PlatformStats(
             platform=platform,
             usage_count=int(count),
-            avg_time_spent=int(avg_time or 0),
+            avg_time_spent=average(time_total, time_count),
         )
-        for platform, count, avg_time in result.all()
+        for platform, count, time_total, time_count in result.all()
     ]
 
 
+def engagement_window_start():
+    """
+    Start of the engagement window. A timestamp without time zone like the
+    web_events partition key, so older partitions are pruned without a cast
+    """
+    return func.localtimestamp() - text(f"interval '{ENGAGEMENT_WINDOW_DAYS} days'")
+
+
 async def calculate_engagement_score(db: AsyncSession, user_id: int) -> int:
     """Calculate user engagement score"""
     stmt = select(func.count(WebEvents.id)).filter(
         WebEvents.user_id == user_id,
-        WebEvents.timestamp
-        >= func.now() - text(f"interval '{ENGAGEMENT_WINDOW_DAYS} days'"),
+        WebEvents.timestamp >= engagement_window_start(),
     )
     result = await db.execute(stmt)
-    score = result.scalar() or 0
-    return min(score * ENGAGEMENT_SCORE_MULTIPLIER, ENGAGEMENT_SCORE_MAX)  # Scale 0-100
+    return engagement_score(result.scalar() or 0)
+
+
+def engagement_score(recent_event_count: int) -> int:
+    """Scale the number of events in the engagement window to 0-100"""
+    return min(recent_event_count * ENGAGEMENT_SCORE_MULTIPLIER, ENGAGEMENT_SCORE_MAX)
+
+
+def json_array(*order_by, **fields):
+    """`json_agg` of one object per row, `[]` when there are no rows"""
+    row = func.json_build_object(
+        *(part for name, column in fields.items() for part in (name, column)),
+    )
+    if order_by:
+        row = aggregate_order_by(row, *order_by)
+    return func.coalesce(func.json_agg(row), EMPTY_JSON_ARRAY, type_=JSON)
+
+
+def build_customer_insights_query(user_id: int):
+    """
+    Build one statement that computes every customer insight.
+
+    Platform, viewing time and genre figures come from the per-user rollups,
+    the recency based ones from index range scans on web_events. Each list
+    comes back as a JSON array so the whole result is a single row.
+    """
+    user_aggregates = (
+        select(UserEventAggregates)
+        .filter(UserEventAggregates.user_id == user_id)
+        .cte("user_aggregates")
+    )
+    is_view = user_aggregates.c.event_type == "VIEW"
+
+    totals = (
+        select(
+            func.sum(user_aggregates.c.time_spent_total)
+            .filter(is_view)
+            .label("view_time_total"),
+            func.sum(user_aggregates.c.time_spent_count)
+            .filter(is_view)
+            .label("view_time_count"),
+        )
+        .select_from(user_aggregates)
+        .cte("totals")
+    )
+    platform_stats = (
+        select(
+            user_aggregates.c.platform,
+            func.sum(user_aggregates.c.event_count).label("usage_count"),
+            func.sum(user_aggregates.c.time_spent_total).label("time_spent_total"),
+            func.sum(user_aggregates.c.time_spent_count).label("time_spent_count"),
+        )
+        .filter(user_aggregates.c.platform != NO_PLATFORM)
+        .group_by(user_aggregates.c.platform)
+        .cte("platform_stats")
+    )
+    genre_views = (
+        select(
+            Genre.id.label("genre_id"),
+            Genre.name.label("genre_name"),
+            UserGenreAggregates.view_count,
+        )
+        .join(UserGenreAggregates, UserGenreAggregates.genre_id == Genre.id)
+        .filter(UserGenreAggregates.user_id == user_id)
+        .order_by(desc(UserGenreAggregates.view_count), Genre.id)
+        .limit(TOP_GENRES_LIMIT)
+        .cte("genre_views")
+    )
+    recent_event_count = (
+        select(func.count())
+        .filter(
+            WebEvents.user_id == user_id,
+            WebEvents.timestamp >= engagement_window_start(),
+        )
+        .scalar_subquery()
+    )
+    recent_filters = (
+        select(WebEvents.filters_applied, WebEvents.timestamp)
+        .filter(WebEvents.user_id == user_id, WebEvents.filters_applied.isnot(None))
+        .order_by(desc(WebEvents.timestamp))
+        .limit(RECENT_FILTERS_LIMIT)
+        .cte("recent_filters")
+    )
+    recent_games = (
+        select(
+            WebEvents.game_id,
+            func.count().label("view_count"),
+            func.max(WebEvents.timestamp).label("last_viewed"),
+        )
+        .filter(
+            WebEvents.user_id == user_id,
+            WebEvents.event_type == "VIEW",
+            WebEvents.game_id.isnot(None),
+        )
+        .group_by(WebEvents.game_id)
+        .order_by(desc("last_viewed"))
+        .limit(RECENT_INTERESTS_LIMIT)
+        .cte("recent_games")
+    )
+    recent_game_genres = (
+        select(
+            func.coalesce(
+                func.json_agg(aggregate_order_by(Genre.name, Genre.name)),
+                EMPTY_JSON_ARRAY,
+            ),
+        )
+        .select_from(game_genre)
+        .join(Genre, Genre.id == game_genre.c.genre_id)
+        .filter(game_genre.c.game_id == recent_games.c.game_id)
+        .scalar_subquery()
+    )
+
+    return select(
+        totals.c.view_time_total,
+        totals.c.view_time_count,
+        recent_event_count.label("recent_event_count"),
+        select(
+            json_array(
+                platform=platform_stats.c.platform,
+                usage_count=platform_stats.c.usage_count,
+                time_spent_total=platform_stats.c.time_spent_total,
+                time_spent_count=platform_stats.c.time_spent_count,
+            ),
+        )
+        .scalar_subquery()
+        .label("platform_usage"),
+        select(
+            func.coalesce(
+                func.json_agg(
+                    aggregate_order_by(
+                        recent_filters.c.filters_applied,
+                        desc(recent_filters.c.timestamp),
+                    ),
+                ),
+                EMPTY_JSON_ARRAY,
+                type_=JSON,
+            ),
+        )
+        .scalar_subquery()
+        .label("filters"),
+        select(
+            json_array(
+                desc(genre_views.c.view_count),
+                genre_views.c.genre_id,
+                genre_id=genre_views.c.genre_id,
+                genre_name=genre_views.c.genre_name,
+                view_count=genre_views.c.view_count,
+            ),
+        )
+        .scalar_subquery()
+        .label("genres"),
+        select(
+            json_array(
+                desc(recent_games.c.last_viewed),
+                game_id=recent_games.c.game_id,
+                view_count=recent_games.c.view_count,
+                last_viewed=recent_games.c.last_viewed,
+                genres=recent_game_genres,
+            ),
+        )
+        .scalar_subquery()
+        .label("recent_interests"),
+    ).select_from(totals)
+
+
+async def compute_customer_insights(
+    db: AsyncSession,
+    user_id: int,
+) -> CustomerInsightResponse:
+    """Compute all customer insights in a single database round trip"""
+    result = await db.execute(build_customer_insights_query(user_id))
+    row = result.one()
+
+    platform_usage = [
+        PlatformStats(
+            platform=stats["platform"],
+            usage_count=stats["usage_count"],
+            avg_time_spent=average(
+                stats["time_spent_total"],
+                stats["time_spent_count"],
+            ),
+        )
+        for stats in row.platform_usage
+    ]
+    preferred_platform = max(
+        platform_usage,
+        key=lambda stats: stats.usage_count,
+        default=None,
+    )
+    filters = list(dict.fromkeys(f for f in row.filters if f))
+
+    return CustomerInsightResponse(
+        user_id=user_id,
+        preferences=build_user_preferences(
+            preferred_platform.platform if preferred_platform else "",
+            average(row.view_time_total, row.view_time_count),
+            filters,
+            [GenrePreference.model_validate(genre) for genre in row.genres],
+        ),
+        recent_interests=[
+            GameRecommendation.model_validate(game) for game in row.recent_interests
+        ],
+        platform_usage=platform_usage,
+        engagement_score=engagement_score(row.recent_event_count),
+    )
+
+
+async def compute_customer_insights_concurrently(
+    session_factory: async_sessionmaker,
+    user_id: int,
+    max_connections: int = settings.INSIGHTS_MAX_CONNECTIONS,
+) -> CustomerInsightResponse:
+    """
+    Compute customer insights by running the independent sub-queries in parallel.
+
+    Every sub-query gets its own session, and so its own pooled connection. At
+    most `max_connections` of them hold a connection at the same time, so one
+    insights request cannot take the whole pool away from ingestion.
+    """
+    semaphore = asyncio.Semaphore(max_connections)
+
+    async def run(query):
+        async with semaphore, session_factory() as session:
+            return await query(session, user_id)
+
+    (
+        (preferred_platform, _),
+        filters,
+        avg_time,
+        preferred_genres,
+        recent_interests,
+        platform_usage,
+        score,
+    ) = await asyncio.gather(
+        run(get_user_platform_preferences),
+        run(get_user_filters),
+        run(get_average_viewing_time),
+        run(get_genre_preferences),
+        run(get_recent_interests),
+        run(get_platform_usage),
+        run(calculate_engagement_score),
+    )
+
+    return CustomerInsightResponse(
+        user_id=user_id,
+        preferences=build_user_preferences(
+            preferred_platform,
+            avg_time,
+            filters,
+            preferred_genres,
+        ),
+        recent_interests=recent_interests,
+        platform_usage=platform_usage,
+        engagement_score=score,
+    )
@@ -0,0 +1,235 @@
+from collections import Counter
+from collections.abc import Sequence
+from typing import Any
+
+from sqlalchemy import (
+    BigInteger,
+    FromClause,
+    Integer,
+    Select,
+    column,
+    delete,
+    func,
+    select,
+    text,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.game_store import (
+    UserEventAggregates,
+    UserGenreAggregates,
+    WebEvents,
+    game_genre,
+)
+
+# Stored instead of NULL, platform is part of the primary key
+NO_PLATFORM = ""
+EVENT_KEYS = ("user_id", "platform", "event_type")
+EVENT_COUNTERS = ("event_count", "time_spent_total", "time_spent_count")
+
+
+def event_aggregate_rows(rows: Sequence[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Fold web_events rows into one counter row per user, platform and type"""
+    aggregates: dict[tuple[int, str, str], dict[str, Any]] = {}
+    for row in rows:
+        key = (row["user_id"], row.get("platform") or NO_PLATFORM, row["event_type"])
+        aggregate = aggregates.setdefault(
+            key,
+            {
+                "user_id": key[0],
+                "platform": key[1],
+                "event_type": key[2],
+                "event_count": 0,
+                "time_spent_total": 0,
+                "time_spent_count": 0,
+            },
+        )
+        aggregate["event_count"] += 1
+        if row.get("time_spent") is not None:
+            aggregate["time_spent_total"] += row["time_spent"]
+            aggregate["time_spent_count"] += 1
+    # Concurrent writers lock the same keys in the same order, never deadlock
+    return [aggregates[key] for key in sorted(aggregates)]
+
+
+def game_view_rows(rows: Sequence[dict[str, Any]]) -> list[tuple[int, int, int]]:
+    """Count VIEW events per user and game as (user_id, game_id, views)"""
+    views = Counter(
+        (row["user_id"], row["game_id"])
+        for row in rows
+        if row["event_type"] == "VIEW" and row.get("game_id") is not None
+    )
+    return [(*key, count) for key, count in sorted(views.items())]
+
+
+async def upsert_event_aggregates(
+    postgres_session: AsyncSession,
+    rows: Sequence[dict[str, Any]],
+) -> None:
+    """
+    Add a batch of web_events rows to the per-user rollups.
+
+    Runs in the caller's transaction, so the rollups are committed together
+    with the events they count.
+
+    Args:
+        postgres_session: The async database session
+        rows: The web_events rows being inserted
+    """
+    aggregates = event_aggregate_rows(rows)
+    if aggregates:
+        stmt = insert(UserEventAggregates).values(aggregates)
+        await postgres_session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=list(EVENT_KEYS),
+                set_={
+                    name: getattr(UserEventAggregates, name) + stmt.excluded[name]
+                    for name in EVENT_COUNTERS
+                },
+            ),
+        )
+
+    views = game_view_rows(rows)
+    if views:
+        viewed = values(
+            column("user_id", Integer),
+            column("game_id", Integer),
+            column("view_count", BigInteger),
+            name="viewed",
+        ).data(views)
+        genre_views = (
+            select(
+                viewed.c.user_id,
+                game_genre.c.genre_id,
+                func.sum(viewed.c.view_count),
+            )
+            .join(game_genre, game_genre.c.game_id == viewed.c.game_id)
+            .group_by(viewed.c.user_id, game_genre.c.genre_id)
+            .order_by(viewed.c.user_id, game_genre.c.genre_id)
+        )
+        stmt = insert(UserGenreAggregates).from_select(
+            ["user_id", "genre_id", "view_count"],
+            genre_views,
+        )
+        await postgres_session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["user_id", "genre_id"],
+                set_={
+                    "view_count": UserGenreAggregates.view_count
+                    + stmt.excluded.view_count,
+                },
+            ),
+        )
+
+
+def event_counts(events: FromClause) -> Select:
+    """user_event_aggregates rows counting the rows of a web_events table"""
+    platform = func.coalesce(events.c.platform, NO_PLATFORM)
+    return select(
+        events.c.user_id,
+        platform.label("platform"),
+        events.c.event_type,
+        func.count().label("event_count"),
+        func.coalesce(func.sum(events.c.time_spent), 0).label("time_spent_total"),
+        func.count(events.c.time_spent).label("time_spent_count"),
+    ).group_by(events.c.user_id, platform, events.c.event_type)
+
+
+def genre_view_counts(events: FromClause) -> Select:
+    """user_genre_aggregates rows counting the VIEW rows of a web_events table"""
+    return (
+        select(
+            events.c.user_id,
+            game_genre.c.genre_id,
+            func.count().label("view_count"),
+        )
+        .join(game_genre, game_genre.c.game_id == events.c.game_id)
+        .filter(events.c.event_type == "VIEW")
+        .group_by(events.c.user_id, game_genre.c.genre_id)
+    )
+
+
+async def subtract_event_aggregates(
+    postgres_session: AsyncSession,
+    events: FromClause,
+) -> None:
+    """
+    Take rows leaving web_events, such as an expired partition, out of both
+    rollups.
+
+    Runs in the caller's transaction, which must keep writers from adding
+    rows to `events` until it commits. Rollup rows left at zero are deleted,
+    a backfill would not create them.
+
+    Args:
+        postgres_session: The async database session
+        events: A table with the web_events columns
+    """
+    counts = event_counts(events).subquery()
+    await postgres_session.execute(
+        update(UserEventAggregates)
+        .where(
+            *(
+                getattr(UserEventAggregates, name) == counts.c[name]
+                for name in EVENT_KEYS
+            ),
+        )
+        .values(
+            {
+                name: getattr(UserEventAggregates, name) - counts.c[name]
+                for name in EVENT_COUNTERS
+            },
+        )
+        .execution_options(synchronize_session=False),
+    )
+    await postgres_session.execute(
+        delete(UserEventAggregates).where(UserEventAggregates.event_count <= 0),
+    )
+
+    views = genre_view_counts(events).subquery()
+    await postgres_session.execute(
+        update(UserGenreAggregates)
+        .where(
+            UserGenreAggregates.user_id == views.c.user_id,
+            UserGenreAggregates.genre_id == views.c.genre_id,
+        )
+        .values(view_count=UserGenreAggregates.view_count - views.c.view_count)
+        .execution_options(synchronize_session=False),
+    )
+    await postgres_session.execute(
+        delete(UserGenreAggregates).where(UserGenreAggregates.view_count <= 0),
+    )
+
+
+async def backfill_event_aggregates(postgres_session: AsyncSession) -> None:
+    """
+    Rebuild both rollups from the whole web_events history.
+
+    Writers are blocked until the rebuild commits so no batch is counted twice
+    or missed.
+
+    Args:
+        postgres_session: The async database session
+    """
+    await postgres_session.execute(
+        text(f"LOCK TABLE {WebEvents.__table__.fullname} IN SHARE MODE"),
+    )
+    await postgres_session.execute(delete(UserEventAggregates))
+    await postgres_session.execute(delete(UserGenreAggregates))
+
+    await postgres_session.execute(
+        insert(UserEventAggregates).from_select(
+            [*EVENT_KEYS, *EVENT_COUNTERS],
+            event_counts(WebEvents.__table__),
+        ),
+    )
+    await postgres_session.execute(
+        insert(UserGenreAggregates).from_select(
+            ["user_id", "genre_id", "view_count"],
+            genre_view_counts(WebEvents.__table__),
+        ),
+    )
+    await postgres_session.commit()
@@ -0,0 +1,473 @@
+import asyncio
+import os
+import time
+from collections.abc import Iterator, Sequence
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from loguru import logger
+from pydantic import BaseModel
+from sqlalchemy import Select, Table, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.game_store import Game, Genre, WebEvents, game_genre
+from app.schemas.customer_insights import (
+    CustomerInsightResponse,
+    GameRecommendation,
+    GenrePreference,
+    PlatformStats,
+)
+from app.services.customer_insights_service import (
+    ENGAGEMENT_WINDOW_DAYS,
+    RECENT_FILTERS_LIMIT,
+    RECENT_INTERESTS_LIMIT,
+    TOP_GENRES_LIMIT,
+    average,
+    build_user_preferences,
+    engagement_score,
+)
+from app.services.event_aggregates import NO_PLATFORM
+from app.services.event_export import EXPORT_COLUMNS
+from app.services.exceptions import NoArchive
+
+# Rows per fetch from the server-side cursor and per Parquet row group
+ARCHIVE_BATCH_SIZE = 50_000
+# Low cardinality strings, stored once per row group and referenced by index
+DICTIONARY_COLUMNS = ["event_type", "platform", "referrer_page"]
+EVENTS_DIR = "web_events"
+MANIFEST_FILE = "_manifest.json"
+SETTLE_POLL_INTERVAL = 0.1
+SETTLE_TIMEOUT = 60
+
+WEB_EVENTS_SCHEMA = pa.schema(
+    [
+        ("id", pa.int32()),
+        ("user_id", pa.int32()),
+        ("game_id", pa.int32()),
+        ("event_type", pa.string()),
+        ("session_id", pa.string()),
+        ("time_spent", pa.int32()),
+        ("referrer_page", pa.string()),
+        ("platform", pa.string()),
+        ("search_query", pa.string()),
+        ("filters_applied", pa.string()),
+        ("timestamp", pa.timestamp("us")),
+    ],
+)
+# Small catalog tables, rewritten whole on every run
+DIMENSIONS: dict[str, tuple[Select, pa.Schema]] = {
+    "games": (
+        select(Game.id, Game.title, Game.price, Game.publisher_id, Game.release_date),
+        pa.schema(
+            [
+                ("id", pa.int32()),
+                ("title", pa.string()),
+                ("price", pa.float64()),
+                ("publisher_id", pa.int32()),
+                ("release_date", pa.timestamp("us")),
+            ],
+        ),
+    ),
+    "genres": (
+        select(Genre.id, Genre.name),
+        pa.schema([("id", pa.int32()), ("name", pa.string())]),
+    ),
+    "game_genre": (
+        select(game_genre.c.game_id, game_genre.c.genre_id),
+        pa.schema([("game_id", pa.int32()), ("genre_id", pa.int32())]),
+    ),
+}
+
+
+class ArchiveManifest(BaseModel):
+    """Progress of the archive, every web_events id up to exported_through"""
+
+    exported_through: int = 0
+    exported_at: datetime | None = None
+
+
+class ArchiveRun(BaseModel):
+    """Ids in (exported_after, exported_through] written by one run"""
+
+    exported_after: int
+    exported_through: int
+    rows: int
+    files: list[str]
+
+
+def read_manifest(root: Path) -> ArchiveManifest:
+    path = root / MANIFEST_FILE
+    if not path.exists():
+        return ArchiveManifest()
+    return ArchiveManifest.model_validate_json(path.read_bytes())
+
+
+def replace_file(path: Path, content: bytes) -> None:
+    temporary = path.with_name(f".{path.name}.tmp")
+    temporary.write_bytes(content)
+    os.replace(temporary, path)
+
+
+def arrow_table(rows: Sequence[Sequence], schema: pa.Schema) -> pa.Table:
+    columns = list(zip(*rows, strict=True)) or [()] * len(schema)
+    return pa.Table.from_arrays(
+        [
+            pa.array(values, type=field.type)
+            for values, field in zip(columns, schema, strict=True)
+        ],
+        schema=schema,
+    )
+
+
+def split_by_month(table: pa.Table) -> Iterator[tuple[str, pa.Table]]:
+    months = pc.strftime(table["timestamp"], format="%Y-%m")
+    for month in pc.unique(months).to_pylist():
+        yield month, table.filter(pc.equal(months, month))
+
+
+def part_name(first_id: int, last_id: int) -> str:
+    return f"part-{first_id:012d}-{last_id:012d}.parquet"
+
+
+def remove_unfinished_parts(root: Path, exported_through: int) -> None:
+    """Delete what a failed run wrote past the manifest, it is exported again"""
+    for path in (root / EVENTS_DIR).glob("month=*/*"):
+        if path.name.startswith("."):
+            path.unlink()
+        elif int(path.name.split("-")[1]) > exported_through:
+            logger.warning(f"Removing unfinished archive file {path}")
+            path.unlink()
+
+
+class MonthlyPartWriter:
+    """
+    Writes rows to one Parquet file per month of their timestamp, under
+    month=YYYY-MM/ directories. Files are written under a dot name, which
+    readers skip, until publish renames them.
+    """
+
+    def __init__(self, events_dir: Path, name: str) -> None:
+        self._events_dir = events_dir
+        self._name = name
+        self._writers: dict[str, pq.ParquetWriter] = {}
+        self.rows = 0
+
+    def path(self, month: str) -> Path:
+        return self._events_dir / f"month={month}" / self._name
+
+    def write(self, table: pa.Table) -> None:
+        """Append the rows, a row group per month they cover"""
+        self.rows += table.num_rows
+        for month, part in split_by_month(table):
+            if month not in self._writers:
+                path = self.path(month)
+                path.parent.mkdir(exist_ok=True)
+                self._writers[month] = pq.ParquetWriter(
+                    path.with_name(f".{path.name}"),
+                    WEB_EVENTS_SCHEMA,
+                    compression="zstd",
+                    use_dictionary=DICTIONARY_COLUMNS,
+                )
+            self._writers[month].write_table(part, row_group_size=part.num_rows)
+
+    def close(self) -> None:
+        for writer in self._writers.values():
+            writer.close()
+
+    def publish(self) -> list[Path]:
+        paths = [self.path(month) for month in sorted(self._writers)]
+        for path in paths:
+            os.replace(path.with_name(f".{path.name}"), path)
+        return paths
+
+
+async def settled_max_id(
+    postgres_session: AsyncSession,
+    timeout: float = SETTLE_TIMEOUT,
+    table: Table = WebEvents.__table__,
+) -> int:
+    """
+    Highest id of the table whose row is committed, or never will be.
+
+    Ids come from a sequence, a transaction still writing can hold an id
+    below one already committed. Every id up to the max(id) read here is
+    final once the transactions in progress at that moment have ended.
+    """
+    max_id, snapshot = (
+        await postgres_session.execute(
+            text(
+                f"SELECT (SELECT max(id) FROM {table.fullname}), "
+                "CAST(pg_current_snapshot() AS text)",
+            ),
+        )
+    ).one()
+    in_progress = text(
+        "SELECT EXISTS (SELECT FROM pg_snapshot_xip(CAST(CAST(:snapshot AS text) "
+        "AS pg_snapshot)) AS xid WHERE pg_xact_status(xid) = 'in progress' "
+        "AND xid IS DISTINCT FROM pg_current_xact_id_if_assigned())",
+    )
+    deadline = time.monotonic() + timeout
+    while (
+        await postgres_session.execute(in_progress, {"snapshot": snapshot})
+    ).scalar():
+        if time.monotonic() > deadline:
+            msg = f"Writers of {table.name} ids up to {max_id} still running"
+            raise TimeoutError(msg)
+        await asyncio.sleep(SETTLE_POLL_INTERVAL)
+    return max_id or 0
+
+
+async def export_dimensions(postgres_session: AsyncSession, root: Path) -> None:
+    for name, (query, schema) in DIMENSIONS.items():
+        rows = (await postgres_session.execute(query)).all()
+        sink = pa.BufferOutputStream()
+        pq.write_table(arrow_table(rows, schema), sink, compression="zstd")
+        replace_file(root / f"{name}.parquet", sink.getvalue().to_pybytes())
+
+
+async def export_archive(
+    postgres_session: AsyncSession,
+    root: Path,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+) -> ArchiveRun:
+    """
+    Append the web_events rows added since the last run to the archive.
+
+    Rows are read by id from a server-side cursor and written batch by batch
+    to one Parquet file per month of their timestamp, under
+    web_events/month=YYYY-MM/, so readers can skip months. The files of a run
+    only become visible once complete, and the manifest only moves once all
+    of them are. The catalog tables are rewritten alongside.
+
+    Args:
+        postgres_session: The async database session
+        root: The archive directory, created if missing
+        batch_size: Rows per fetch and per row group
+
+    Returns:
+        ArchiveRun: The id range and the files written by this run
+    """
+    manifest = read_manifest(root)
+    (root / EVENTS_DIR).mkdir(parents=True, exist_ok=True)
+    remove_unfinished_parts(root, manifest.exported_through)
+
+    lower = manifest.exported_through
+    upper = max(await settled_max_id(postgres_session), lower)
+    parts = MonthlyPartWriter(root / EVENTS_DIR, part_name(lower + 1, upper))
+    try:
+        if upper > lower:
+            query = (
+                select(*EXPORT_COLUMNS)
+                .where(WebEvents.id > lower, WebEvents.id <= upper)
+                .order_by(WebEvents.id)
+                .execution_options(yield_per=batch_size)
+            )
+            connection = await postgres_session.connection()
+            result = await connection.stream(query)
+            async for batch in result.partitions():
+                parts.write(arrow_table(batch, WEB_EVENTS_SCHEMA))
+    finally:
+        parts.close()
+
+    files = parts.publish()
+    await export_dimensions(postgres_session, root)
+    replace_file(
+        root / MANIFEST_FILE,
+        ArchiveManifest(
+            exported_through=upper,
+            exported_at=datetime.now(),
+        )
+        .model_dump_json(indent=2)
+        .encode("utf-8"),
+    )
+    return ArchiveRun(
+        exported_after=lower,
+        exported_through=upper,
+        rows=parts.rows,
+        files=[str(path.relative_to(root)) for path in files],
+    )
+
+
+class EventArchive:
+    """
+    Reads the archive written by export_archive.
+
+    Answers the customer insights questions from the Parquet files, without
+    touching the database. Tables are read with pyarrow, only the columns
+    and the months a question needs.
+    """
+
+    def __init__(self, root: Path | str = settings.EVENT_ARCHIVE_DIR) -> None:
+        self.root = Path(root)
+
+    def manifest(self) -> ArchiveManifest:
+        if not (self.root / MANIFEST_FILE).exists():
+            msg = f"No event archive in {self.root}"
+            raise NoArchive(msg)
+        return read_manifest(self.root)
+
+    def events(
+        self,
+        columns: list[str] | None = None,
+        filter: pc.Expression | None = None,
+    ) -> pa.Table:
+        self.manifest()
+        dataset = ds.dataset(
+            self.root / EVENTS_DIR,
+            schema=WEB_EVENTS_SCHEMA.append(pa.field("month", pa.string())),
+            format="parquet",
+            partitioning="hive",
+        )
+        return dataset.to_table(columns=columns, filter=filter)
+
+    def dimension(self, name: str) -> pa.Table:
+        self.manifest()
+        return pq.read_table(self.root / f"{name}.parquet")
+
+    def game_genre_names(self) -> pa.Table:
+        """game_id, genre_id and genre_name of every game genre"""
+        genres = self.dimension("genres").rename_columns(["genre_id", "genre_name"])
+        return self.dimension("game_genre").join(genres, "genre_id")
+
+    def customer_insights(
+        self,
+        user_id: int,
+        now: datetime | None = None,
+    ) -> CustomerInsightResponse:
+        """
+        The archive counterpart of compute_customer_insights.
+
+        Figures cover the archived events only, up to the manifest's
+        exported_through id.
+        """
+        events = self.events(
+            columns=[
+                "game_id",
+                "event_type",
+                "time_spent",
+                "platform",
+                "filters_applied",
+                "timestamp",
+            ],
+            filter=pc.field("user_id") == user_id,
+        )
+        views = events.filter(pc.equal(events["event_type"], "VIEW"))
+        game_views = views.filter(pc.is_valid(views["game_id"]))
+
+        platform_usage = self.platform_usage(events)
+        preferred_platform = max(
+            platform_usage,
+            key=lambda stats: stats.usage_count,
+            default=None,
+        )
+        recent_filters = (
+            events.filter(pc.is_valid(events["filters_applied"]))
+            .sort_by([("timestamp", "descending")])
+            .slice(0, RECENT_FILTERS_LIMIT)
+        )
+        filters = list(
+            dict.fromkeys(
+                f for f in recent_filters["filters_applied"].to_pylist() if f
+            ),
+        )
+        window_start = (now or datetime.now()) - timedelta(days=ENGAGEMENT_WINDOW_DAYS)
+        recent_events = pc.sum(
+            pc.greater_equal(
+                events["timestamp"],
+                pa.scalar(window_start, pa.timestamp("us")),
+            ),
+        )
+
+        return CustomerInsightResponse(
+            user_id=user_id,
+            preferences=build_user_preferences(
+                preferred_platform.platform if preferred_platform else "",
+                average(
+                    pc.sum(views["time_spent"]).as_py(),
+                    pc.count(views["time_spent"]).as_py(),
+                ),
+                filters,
+                self.genre_preferences(game_views),
+            ),
+            recent_interests=self.recent_interests(game_views),
+            platform_usage=platform_usage,
+            engagement_score=engagement_score(recent_events.as_py() or 0),
+        )
+
+    def platform_usage(self, events: pa.Table) -> list[PlatformStats]:
+        platforms = pc.fill_null(events["platform"], NO_PLATFORM)
+        usage = (
+            events.filter(pc.not_equal(platforms, NO_PLATFORM))
+            .group_by("platform")
+            .aggregate(
+                [
+                    ("event_type", "count"),
+                    ("time_spent", "sum"),
+                    ("time_spent", "count"),
+                ],
+            )
+            .sort_by([("event_type_count", "descending"), ("platform", "ascending")])
+        )
+        return [
+            PlatformStats(
+                platform=stats["platform"],
+                usage_count=stats["event_type_count"],
+                avg_time_spent=average(
+                    stats["time_spent_sum"],
+                    stats["time_spent_count"],
+                ),
+            )
+            for stats in usage.to_pylist()
+        ]
+
+    def genre_preferences(self, game_views: pa.Table) -> list[GenrePreference]:
+        views_per_game = game_views.group_by("game_id").aggregate(
+            [("event_type", "count")],
+        )
+        genres = (
+            views_per_game.join(self.game_genre_names(), "game_id")
+            .group_by(["genre_id", "genre_name"])
+            .aggregate([("event_type_count", "sum")])
+            .sort_by(
+                [("event_type_count_sum", "descending"), ("genre_id", "ascending")]
+            )
+            .slice(0, TOP_GENRES_LIMIT)
+        )
+        return [
+            GenrePreference(
+                genre_id=genre["genre_id"],
+                genre_name=genre["genre_name"],
+                view_count=genre["event_type_count_sum"],
+            )
+            for genre in genres.to_pylist()
+        ]
+
+    def recent_interests(self, game_views: pa.Table) -> list[GameRecommendation]:
+        games = (
+            game_views.group_by("game_id")
+            .aggregate([("event_type", "count"), ("timestamp", "max")])
+            .sort_by([("timestamp_max", "descending")])
+            .slice(0, RECENT_INTERESTS_LIMIT)
+        )
+        game_genres = self.game_genre_names()
+        game_genres = game_genres.filter(
+            pc.is_in(game_genres["game_id"], games["game_id"]),
+        ).sort_by([("genre_name", "ascending")])
+        genre_names: dict[int, list[str]] = {}
+        for row in game_genres.to_pylist():
+            genre_names.setdefault(row["game_id"], []).append(row["genre_name"])
+
+        return [
+            GameRecommendation(
+                game_id=game["game_id"],
+                view_count=game["event_type_count"],
+                last_viewed=game["timestamp_max"],
+                genres=genre_names.get(game["game_id"], []),
+            )
+            for game in games.to_pylist()
+        ]
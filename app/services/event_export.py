@@ -0,0 +1,123 @@
+import csv
+import io
+from collections.abc import AsyncIterator, Sequence
+from typing import Literal
+
+import orjson
+from pydantic import BaseModel, ConfigDict, NaiveDatetime
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.game_store import WebEvents
+from app.services.exceptions import InvalidExportFilter
+
+# Rows fetched per round trip of the server-side cursor, and held in memory
+EXPORT_BATCH_SIZE = 5_000
+EXPORT_COLUMNS = tuple(WebEvents.__table__.c)
+EXPORT_NAMES = tuple(column.name for column in EXPORT_COLUMNS)
+
+ExportFormat = Literal["ndjson", "csv"]
+EXPORT_MEDIA_TYPES: dict[ExportFormat, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+class EventExportFilter(BaseModel):
+    """Events of a user, a session, a [since, until) time range or a mix"""
+
+    user_id: int | None = None
+    session_id: str | None = None
+    # web_events.timestamp has no time zone
+    since: NaiveDatetime | None = None
+    until: NaiveDatetime | None = None
+
+    model_config = ConfigDict(frozen=True)
+
+
+def export_query(filters: EventExportFilter) -> Select:
+    """
+    Args:
+        filters: Which events to export, at least one filter is required
+
+    Returns:
+        Select: web_events columns in timestamp order, the time range
+        prunes partitions
+
+    Raises:
+        InvalidExportFilter: If no filter is given or the range is empty
+    """
+    if not filters.model_dump(exclude_none=True):
+        msg = "Filter the export by user_id, session_id, since or until"
+        raise InvalidExportFilter(msg)
+    if filters.since and filters.until and filters.since >= filters.until:
+        msg = "since must be before until"
+        raise InvalidExportFilter(msg)
+
+    query = select(*EXPORT_COLUMNS).order_by(WebEvents.timestamp, WebEvents.id)
+    if filters.user_id is not None:
+        query = query.where(WebEvents.user_id == filters.user_id)
+    if filters.session_id is not None:
+        query = query.where(WebEvents.session_id == filters.session_id)
+    if filters.since is not None:
+        query = query.where(WebEvents.timestamp >= filters.since)
+    if filters.until is not None:
+        query = query.where(WebEvents.timestamp < filters.until)
+    return query
+
+
+def ndjson_chunk(rows: Sequence[Sequence]) -> bytes:
+    return b"".join(
+        orjson.dumps(dict(zip(EXPORT_NAMES, row, strict=True))) + b"\n" for row in rows
+    )
+
+
+def csv_chunk(rows: Sequence[Sequence]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+async def export_events(
+    postgres_session: AsyncSession,
+    query: Select,
+    export_format: ExportFormat,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[bytes]:
+    """
+    Encode the rows of an export_query batch by batch.
+
+    The rows come from a server-side cursor, a batch is fetched only once
+    the previous chunk was consumed, so memory stays flat whatever the
+    number of rows and a slow client slows down the cursor.
+
+    Args:
+        postgres_session: The async database session, kept in a transaction
+            while the cursor is open
+        query: From export_query
+        export_format: ndjson for one JSON object per line, csv with a header
+        batch_size: Rows per fetch and per chunk
+
+    Yields:
+        bytes: Encoded chunks, CSV starts with the header line
+    """
+    # Core rows, the ORM result layer costs more than the encoding
+    connection = await postgres_session.connection()
+    result = await connection.stream(query.execution_options(yield_per=batch_size))
+    encode = csv_chunk if export_format == "csv" else ndjson_chunk
+    if export_format == "csv":
+        yield csv_chunk([EXPORT_NAMES])
+    async for rows in result.partitions():
+        yield encode(rows)
+
+
+async def stream_export(
+    session_factory: async_sessionmaker,
+    query: Select,
+    export_format: ExportFormat,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[bytes]:
+    """export_events in a session of its own, closed with the stream"""
+    async with session_factory() as session:
+        async for chunk in export_events(session, query, export_format, batch_size):
+            yield chunk
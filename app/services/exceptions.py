@@ -5,14 +5,46 @@ class NoLastViewed(Exception):
 class NoUser(Exception):
     pass
 
+
 class NoPublisher(Exception):
     pass
 
+
 class NoGenre(Exception):
     pass
 
+
 class NoGame(Exception):
     pass
 
+
 class DuplicateEntry(Exception):
     pass
+
+
+class WriterClosed(Exception):
+    pass
+
+
+class QueueFull(Exception):
+    pass
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class InvalidExportFilter(Exception):
+    pass
+
+
+class NoArchive(Exception):
+    pass
+
+
+class InvalidReportRange(Exception):
+    pass
+
+
+class RecommendationsNotReady(Exception):
+    pass
@@ -1,44 +1,102 @@
-from sqlalchemy import select
+from typing import Literal
+
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.game_store import Game
-from app.schemas.game import GameCreate, GameInDB, GameUpdate
+from app.models.game_store import Game, Genre, Review, game_genre
+from app.schemas.game import GameCreate, GameInDB, GameUpdate, games_adapter
+from app.services.catalog_cache import catalog_cache
 from app.services.exceptions import NoGame
+from app.services.pagination import CursorPage, fetch_page
+
+GameSort = Literal["id", "title", "price", "release_date"]
+GAME_SORTS = {
+    "id": Game.id,
+    "title": Game.title,
+    "price": Game.price,
+    "release_date": Game.release_date,
+}
+
+# The columns of GameInDB, genre names and review comments included, so rows
+# validate straight into the schema without loading ORM objects
+GAME_ROWS = select(
+    *Game.__table__.c,
+    func.array(
+        select(Genre.name)
+        .join(game_genre, game_genre.c.genre_id == Genre.id)
+        .where(game_genre.c.game_id == Game.id)
+        .order_by(Genre.name)
+        .scalar_subquery(),
+    ).label("genres"),
+    func.array(
+        select(Review.comment)
+        .where(Review.game_id == Game.id, Review.comment.is_not(None))
+        .order_by(Review.id)
+        .scalar_subquery(),
+    ).label("reviews"),
+)
+
+
+async def load_game(db: AsyncSession, game_id: int) -> GameInDB:
+    result = await db.execute(GAME_ROWS.where(Game.id == game_id))
+    row = result.mappings().one_or_none()
+    if row is None:
+        raise NoGame(f"Game with id {game_id} not found")
+    return GameInDB.model_validate(row)
 
 
 async def create_game(db: AsyncSession, game: GameCreate) -> GameInDB:
     db_game = Game(**game.model_dump())
     db.add(db_game)
     await db.commit()
-    await db.refresh(db_game)
-    return GameInDB(**db_game.model_dump())
+    await catalog_cache.invalidate("game", db_game.id)
+    return await load_game(db, db_game.id)
 
 
-async def get_game(db: AsyncSession, game_id: int) -> GameInDB:
+async def get_db_game(db: AsyncSession, game_id: int) -> Game:
+    """Load the game row itself, bypassing the cache, to change it"""
     result = await db.execute(select(Game).filter(Game.id == game_id))
     game = result.scalar_one_or_none()
     if not game:
         raise NoGame(f"Game with id {game_id} not found")
-    return GameInDB(**game.model_dump())
+    return game
+
+
+async def get_game(db: AsyncSession, game_id: int) -> GameInDB:
+    return await catalog_cache.games.get_or_load(
+        game_id, lambda: load_game(db, game_id)
+    )
 
 
 async def get_games(
-    db: AsyncSession, skip: int = 0, limit: int = 100
-) -> list[GameInDB]:
-    result = await db.execute(select(Game).offset(skip).limit(limit))
-    return [GameInDB(**game.model_dump()) for game in result.scalars().all()]
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    sort: GameSort = "id",
+) -> CursorPage[GameInDB]:
+    async def load() -> CursorPage[GameInDB]:
+        rows, next_cursor = await fetch_page(
+            db, GAME_ROWS, GAME_SORTS, sort, limit, skip, cursor
+        )
+        return CursorPage(
+            items=games_adapter.validate_python(rows), next_cursor=next_cursor
+        )
+
+    return await catalog_cache.game_lists.get_or_load((sort, skip, cursor, limit), load)
 
 
 async def update_game(db: AsyncSession, game_id: int, game: GameUpdate) -> GameInDB:
-    db_game = await get_game(db, game_id)
+    db_game = await get_db_game(db, game_id)
     for field, value in game.model_dump().items():
         setattr(db_game, field, value)
     await db.commit()
-    await db.refresh(db_game)
-    return GameInDB(**db_game.model_dump())
+    await catalog_cache.invalidate("game", game_id)
+    return await load_game(db, game_id)
 
 
 async def delete_game(db: AsyncSession, game_id: int) -> None:
-    db_game = await get_game(db, game_id)
+    db_game = await get_db_game(db, game_id)
     await db.delete(db_game)
     await db.commit()
+    await catalog_cache.invalidate("game", game_id)
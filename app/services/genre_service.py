@@ -1,10 +1,17 @@
+from typing import Literal
+
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.game_store import Genre
-from app.schemas.genre import GenreCreate, GenreUpdate
+from app.schemas.genre import GenreCreate, GenreInDB, GenreUpdate, genres_adapter
+from app.services.catalog_cache import catalog_cache
 from app.services.exceptions import DuplicateEntry, NoGenre
+from app.services.pagination import CursorPage, fetch_page
+
+GenreSort = Literal["id", "name"]
+GENRE_SORTS = {"id": Genre.id, "name": Genre.name}
 
 
 async def create_genre(db: AsyncSession, genre: GenreCreate) -> Genre:
@@ -13,14 +20,16 @@ async def create_genre(db: AsyncSession, genre: GenreCreate) -> Genre:
         db.add(db_genre)
         await db.commit()
         await db.refresh(db_genre)
-        return db_genre
     except IntegrityError as e:
         await db.rollback()
         msg = f"Genre with name {genre.name} already exists"
         raise DuplicateEntry(msg) from e
+    await catalog_cache.invalidate("genre", db_genre.id)
+    return db_genre
 
 
-async def get_genre(db: AsyncSession, genre_id: int) -> Genre:
+async def get_db_genre(db: AsyncSession, genre_id: int) -> Genre:
+    """Load the genre row itself, bypassing the cache, to change it"""
     result = await db.execute(select(Genre).filter(Genre.id == genre_id))
     genre = result.scalar_one_or_none()
     if not genre:
@@ -29,13 +38,36 @@ async def get_genre(db: AsyncSession, genre_id: int) -> Genre:
     return genre
 
 
-async def get_genres(db: AsyncSession, skip: int = 0, limit: int = 100) -> list[Genre]:
-    result = await db.execute(select(Genre).offset(skip).limit(limit))
-    genres = result.scalars().all()
-    if not genres:
+async def get_genre(db: AsyncSession, genre_id: int) -> GenreInDB:
+    async def load() -> GenreInDB:
+        return GenreInDB.model_validate(await get_db_genre(db, genre_id))
+
+    return await catalog_cache.genres.get_or_load(genre_id, load)
+
+
+async def get_genres(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    sort: GenreSort = "id",
+) -> CursorPage[GenreInDB]:
+    async def load() -> CursorPage[GenreInDB]:
+        rows, next_cursor = await fetch_page(
+            db, select(*Genre.__table__.c), GENRE_SORTS, sort, limit, skip, cursor
+        )
+        return CursorPage(
+            items=genres_adapter.validate_python(rows),
+            next_cursor=next_cursor,
+        )
+
+    page = await catalog_cache.genre_lists.get_or_load(
+        (sort, skip, cursor, limit), load
+    )
+    if not page.items:
         msg = "No genres found"
         raise NoGenre(msg)
-    return list(genres)
+    return page
 
 
 async def update_genre(
@@ -43,7 +75,7 @@ async def update_genre(
     genre_id: int,
     genre: GenreUpdate,
 ) -> Genre:
-    db_genre = await get_genre(db, genre_id)
+    db_genre = await get_db_genre(db, genre_id)
 
     update_data = genre.model_dump(exclude_unset=True)
     for field, value in update_data.items():
@@ -52,14 +84,16 @@ async def update_genre(
     try:
         await db.commit()
         await db.refresh(db_genre)
-        return db_genre
     except IntegrityError as e:
         await db.rollback()
         msg = f"Genre with name {genre.name} already exists"
         raise DuplicateEntry(msg) from e
+    await catalog_cache.invalidate("genre", genre_id)
+    return db_genre
 
 
 async def delete_genre(db: AsyncSession, genre_id: int) -> None:
-    db_genre = await get_genre(db, genre_id)
+    db_genre = await get_db_genre(db, genre_id)
     await db.delete(db_genre)
     await db.commit()
+    await catalog_cache.invalidate("genre", genre_id)
@@ -0,0 +1,351 @@
+import asyncio
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+
+import redis.asyncio as redis
+from loguru import logger
+from pydantic import ValidationError
+from redis.exceptions import ResponseError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import settings
+from app.metrics import INGEST_EVENTS_DROPPED, INGEST_STREAM_LENGTH, track_ingest_stage
+from app.schemas.ingestion import IngestionSchema, ingestion_adapter
+from app.services.batch_writer import (
+    WebEventBatchWriter,
+    write_web_events_isolating_rejects,
+)
+from app.services.exceptions import QueueFull
+from app.services.ingestion_service import (
+    ingest_batch_service,
+    ingest_data_service,
+    update_session_insights_batch,
+)
+from app.services.insights_cache import bump_insights_versions
+
+# KEYS[1]: ingestion stream
+# ARGV: max pending entries, then one serialized event per argument
+ENQUEUE_EVENTS_SCRIPT = """
+local stream = KEYS[1]
+local count = #ARGV - 1
+if redis.call("XLEN", stream) + count > tonumber(ARGV[1]) then
+    return 0
+end
+for i = 2, #ARGV do
+    redis.call("XADD", stream, "*", "event", ARGV[i])
+end
+return count
+"""
+
+StreamEntry = tuple[bytes, dict[bytes, bytes]]
+
+
+class IngestionQueue(ABC):
+    """
+    Stage between the ingestion endpoints and the ingestion services.
+    Implementations decide where accepted events are processed.
+    """
+
+    @abstractmethod
+    async def publish(self, events: Sequence[IngestionSchema]) -> None: ...
+
+    async def close(self) -> None:
+        return None
+
+
+class InlineIngestionQueue(IngestionQueue):
+    """
+    Processes events inside the API worker: session insights are updated in
+    Redis right away and events are buffered by the in-process batch writer.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        event_writer: WebEventBatchWriter,
+    ) -> None:
+        self._redis_client = redis_client
+        self._event_writer = event_writer
+
+    async def publish(self, events: Sequence[IngestionSchema]) -> None:
+        if len(events) == 1:
+            await ingest_data_service(events[0], self._redis_client, self._event_writer)
+        elif events:
+            await ingest_batch_service(events, self._redis_client, self._event_writer)
+
+    async def close(self) -> None:
+        await self._event_writer.stop()
+
+
+class RedisStreamQueue(IngestionQueue):
+    """
+    Appends events to a Redis Stream drained by `IngestionStreamConsumer`.
+
+    Events survive API restarts and are written by separate worker processes.
+    Publishing is a single round trip that refuses the whole request with
+    `QueueFull` once the stream holds `max_pending` unprocessed entries.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        stream: str = settings.INGEST_STREAM_NAME,
+        max_pending: int = settings.INGEST_STREAM_MAX_PENDING,
+    ) -> None:
+        self._redis_client = redis_client
+        self._stream = stream
+        self._max_pending = max_pending
+        self._script = redis_client.register_script(ENQUEUE_EVENTS_SCRIPT)
+
+    async def publish(self, events: Sequence[IngestionSchema]) -> None:
+        if not events:
+            return
+        added = await self._script(
+            keys=[self._stream],
+            args=[self._max_pending, *(event.model_dump_json() for event in events)],
+        )
+        if not added:
+            msg = f"Ingestion stream {self._stream} is full"
+            raise QueueFull(msg)
+
+
+class IngestionStreamConsumer:
+    """
+    Drains the ingestion stream in batches as part of a consumer group.
+
+    Each batch is committed to PostgreSQL first, then reflected in the Redis
+    session insights and the cached customer insights, and only then
+    acknowledged and removed from the stream.
+    Entries left pending by a consumer that died are claimed after
+    `claim_idle_ms` so no event is lost when a worker restarts.
+
+    Entries that cannot be ingested are moved to the `dead_letter_stream`
+    with the reason why: malformed ones, events the database rejects and
+    entries already delivered `max_deliveries` times, so a poison entry
+    never blocks the stream.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        session_factory: async_sessionmaker,
+        consumer_name: str,
+        stream: str = settings.INGEST_STREAM_NAME,
+        group: str = settings.INGEST_STREAM_GROUP,
+        batch_size: int = settings.INGEST_BATCH_SIZE,
+        block_ms: int = settings.INGEST_STREAM_BLOCK_MS,
+        claim_idle_ms: int = settings.INGEST_STREAM_CLAIM_IDLE_MS,
+        dead_letter_stream: str = settings.INGEST_STREAM_DEAD_LETTER_NAME,
+        max_deliveries: int = settings.INGEST_STREAM_MAX_DELIVERIES,
+        max_dead_letters: int = settings.INGEST_STREAM_MAX_PENDING,
+    ) -> None:
+        self._redis_client = redis_client
+        self._session_factory = session_factory
+        self._consumer_name = consumer_name
+        self._stream = stream
+        self._group = group
+        self._batch_size = batch_size
+        self._block_ms = block_ms
+        self._claim_idle_ms = claim_idle_ms
+        self._dead_letter_stream = dead_letter_stream
+        self._max_deliveries = max_deliveries
+        self._max_dead_letters = max_dead_letters
+
+    async def ensure_group(self) -> None:
+        try:
+            await self._redis_client.xgroup_create(
+                self._stream,
+                self._group,
+                id="0",
+                mkstream=True,
+            )
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def run(self, stop: asyncio.Event) -> None:
+        await self.ensure_group()
+        logger.info(f"Consuming {self._stream} as {self._group}/{self._consumer_name}")
+
+        # Entries delivered to this consumer before a restart come first
+        await self._drain_own_pending()
+
+        loop = asyncio.get_running_loop()
+        next_claim = loop.time()
+        while not stop.is_set():
+            if loop.time() >= next_claim:
+                await self._claim_stale()
+                INGEST_STREAM_LENGTH.set(await self._redis_client.xlen(self._stream))
+                next_claim = loop.time() + self._claim_idle_ms / 1000
+
+            response = await self._redis_client.xreadgroup(
+                self._group,
+                self._consumer_name,
+                {self._stream: ">"},
+                count=self._batch_size,
+                block=self._block_ms,
+            )
+            for _, entries in response or []:
+                await self._process_or_keep_pending(entries)
+
+    async def process(self, entries: list[StreamEntry]) -> None:
+        """Persist one batch of stream entries and acknowledge them"""
+        if not entries:
+            return
+        with track_ingest_stage("stream_process", len(entries)):
+            await self._process(entries)
+
+    async def _process(self, entries: list[StreamEntry]) -> None:
+        parsed: list[tuple[StreamEntry, IngestionSchema]] = []
+        dead_letters: list[tuple[StreamEntry, str]] = []
+        for entry in entries:
+            entry_id, fields = entry
+            try:
+                parsed.append(
+                    (entry, ingestion_adapter.validate_json(fields[b"event"]))
+                )
+            except (KeyError, ValidationError) as e:
+                # Retrying cannot fix a malformed entry
+                logger.error(f"Malformed stream entry {entry_id!r}: {e}")
+                dead_letters.append((entry, "malformed"))
+
+        rejected = await write_web_events_isolating_rejects(
+            self._session_factory,
+            [event for _, event in parsed],
+        )
+        rejected_ids = {id(event) for event in rejected}
+        events = []
+        for entry, event in parsed:
+            if id(event) in rejected_ids:
+                logger.error(f"Stream entry {entry[0]!r} rejected by the database")
+                dead_letters.append((entry, "rejected"))
+            else:
+                events.append(event)
+
+        try:
+            await update_session_insights_batch(
+                self._redis_client,
+                [event for event in events if event.game_id],
+            )
+            await bump_insights_versions(
+                self._redis_client,
+                [event.user_id for event in events],
+            )
+        except Exception as e:
+            # Events are already stored, redelivering them would duplicate rows
+            logger.exception(f"Error updating session insights: {e}")
+
+        await self._acknowledge([entry_id for entry_id, _ in entries], dead_letters)
+
+    async def _acknowledge(
+        self,
+        entry_ids: list[bytes],
+        dead_letters: list[tuple[StreamEntry, str]],
+    ) -> None:
+        """Remove entries from the stream, copying the dead letters first"""
+        pipeline = self._redis_client.pipeline(transaction=False)
+        for (entry_id, fields), reason in dead_letters:
+            INGEST_EVENTS_DROPPED.labels(reason=reason).inc()
+            pipeline.xadd(
+                self._dead_letter_stream,
+                {**fields, b"entry_id": entry_id, b"reason": reason},
+                maxlen=self._max_dead_letters,
+                approximate=True,
+            )
+        pipeline.xack(self._stream, self._group, *entry_ids)
+        pipeline.xdel(self._stream, *entry_ids)
+        await pipeline.execute()
+
+    async def _dead_letter_exhausted(
+        self,
+        entries: list[StreamEntry],
+    ) -> list[StreamEntry]:
+        """
+        Move the redelivered entries that reached `max_deliveries` to the dead
+        letters, using the delivery counts of the pending entries list.
+
+        Returns:
+            The entries still worth processing
+        """
+        if not entries:
+            return entries
+        pipeline = self._redis_client.pipeline(transaction=False)
+        for entry_id, _ in entries:
+            pipeline.xpending_range(
+                self._stream,
+                self._group,
+                min=entry_id,
+                max=entry_id,
+                count=1,
+            )
+        deliveries = {
+            pending["message_id"]: pending["times_delivered"]
+            for found in await pipeline.execute()
+            for pending in found
+        }
+
+        exhausted = [
+            entry
+            for entry in entries
+            if deliveries.get(entry[0], 0) > self._max_deliveries
+        ]
+        if not exhausted:
+            return entries
+        logger.error(
+            f"Moving {len(exhausted)} stream entries delivered more than "
+            f"{self._max_deliveries} times to {self._dead_letter_stream}",
+        )
+        await self._acknowledge(
+            [entry_id for entry_id, _ in exhausted],
+            [(entry, "max_deliveries") for entry in exhausted],
+        )
+        return [entry for entry in entries if entry not in exhausted]
+
+    async def _process_or_keep_pending(
+        self,
+        entries: list[StreamEntry],
+    ) -> bool:
+        try:
+            await self.process(entries)
+            return True
+        except Exception as e:
+            # Unacknowledged entries stay pending and are claimed again later
+            logger.exception(f"Error processing {len(entries)} stream entries: {e}")
+            return False
+
+    async def _drain_own_pending(self) -> None:
+        last_id = "0"
+        while True:
+            response = await self._redis_client.xreadgroup(
+                self._group,
+                self._consumer_name,
+                {self._stream: last_id},
+                count=self._batch_size,
+            )
+            entries = [entry for _, batch in response or [] for entry in batch]
+            if not entries:
+                return
+            last_id = entries[-1][0]
+            remaining = await self._dead_letter_exhausted(entries)
+            if remaining and not await self._process_or_keep_pending(remaining):
+                return
+
+    async def _claim_stale(self) -> None:
+        start_id = "0-0"
+        while True:
+            next_id, entries, *_ = await self._redis_client.xautoclaim(
+                self._stream,
+                self._group,
+                self._consumer_name,
+                min_idle_time=self._claim_idle_ms,
+                start_id=start_id,
+                count=self._batch_size,
+            )
+            # Entries deleted while pending come back without fields
+            entries = [(entry_id, fields) for entry_id, fields in entries if fields]
+            entries = await self._dead_letter_exhausted(entries)
+            if entries and not await self._process_or_keep_pending(entries):
+                return
+            if next_id in (b"0-0", "0-0"):
+                return
+            start_id = next_id
@@ -1,138 +1,261 @@
 import json
+from collections.abc import Sequence
 from datetime import UTC, datetime
 from math import ceil
 from typing import Any
+from weakref import WeakKeyDictionary
 
 import redis.asyncio as redis
 from loguru import logger
-from sqlalchemy.ext.asyncio import AsyncSession
+from redis.commands.core import AsyncScript
 
-from app.models.game_store import WebEvents
+from app.metrics import track_ingest_stage
 from app.schemas.ingestion import IngestionSchema
+from app.services.batch_writer import WebEventBatchWriter
+from app.services.insights_cache import bump_insights_versions
+
+MAX_GAMES_VIEWED = 10
+SESSION_TTL_SECONDS = 60 * 60 * 24
+MAX_LAST_VIEWED = 10
+LAST_VIEWED_TTL_SECONDS = 60 * 60 * 24 * 30
+
+# KEYS: session hash, event counts hash, games viewed zset, referrers set,
+#       last viewed games list of the user
+# ARGV: user_id, session_id, current time, event_type, game_id, time_spent,
+#       referrer_page, max games viewed, ttl in seconds, max last viewed,
+#       last viewed ttl in seconds
+UPDATE_SESSION_INSIGHTS_SCRIPT = """
+local key = KEYS[1]
+local events_key = KEYS[2]
+local games_key = KEYS[3]
+local referrers_key = KEYS[4]
+local last_viewed_key = KEYS[5]
+local now = ARGV[3]
+local event_type = ARGV[4]
+local game_id = tonumber(ARGV[5])
+local time_spent = tonumber(ARGV[6])
+local referrer_page = ARGV[7]
+local max_games = tonumber(ARGV[8])
+
+if redis.call("EXISTS", key) == 0 then
+    redis.call(
+        "HSET", key,
+        "user_id", ARGV[1],
+        "session_id", ARGV[2],
+        "start_time", now,
+        "last_activity", now,
+        "page_views", 0,
+        "total_time_spent", 0
+    )
+else
+    redis.call("HSET", key, "last_activity", now)
+
+    -- Move JSON fields of sessions written with the old layout
+    local legacy = redis.call(
+        "HMGET", key, "event_counts", "games_viewed", "referrer_pages"
+    )
+    if legacy[1] then
+        for name, count in pairs(cjson.decode(legacy[1])) do
+            redis.call("HINCRBY", events_key, name, count)
+        end
+    end
+    if legacy[2] then
+        for position, viewed in ipairs(cjson.decode(legacy[2])) do
+            redis.call("ZADD", games_key, "NX", position, viewed)
+        end
+    end
+    if legacy[3] then
+        for _, page in ipairs(cjson.decode(legacy[3])) do
+            redis.call("SADD", referrers_key, page)
+        end
+    end
+    if legacy[1] or legacy[2] or legacy[3] then
+        redis.call("HDEL", key, "event_counts", "games_viewed", "referrer_pages")
+    end
+end
+
+redis.call("HINCRBY", events_key, event_type, 1)
+
+if event_type == "VIEW" then
+    local page_views = redis.call("HINCRBY", key, "page_views", 1)
+    if game_id then
+        -- Scored by view number so the set keeps first-view order
+        redis.call("ZADD", games_key, "NX", page_views, game_id)
+        redis.call("ZREMRANGEBYRANK", games_key, 0, -(max_games + 1))
+
+        -- Most recent first, a game viewed again moves back to the front
+        redis.call("LREM", last_viewed_key, 0, ARGV[5])
+        redis.call("LPUSH", last_viewed_key, ARGV[5])
+        redis.call("LTRIM", last_viewed_key, 0, tonumber(ARGV[10]) - 1)
+        redis.call("EXPIRE", last_viewed_key, ARGV[11])
+    end
+end
+
+if time_spent and time_spent > 0 then
+    redis.call("HINCRBY", key, "total_time_spent", time_spent)
+end
+
+if referrer_page ~= "" then
+    redis.call("SADD", referrers_key, referrer_page)
+end
+
+for i = 1, 4 do
+    redis.call("EXPIRE", KEYS[i], ARGV[9])
+end
+return 1
+"""
+
+# Scripts are registered once per client, then reused for every event
+_session_insights_scripts: WeakKeyDictionary[redis.Redis, AsyncScript] = (
+    WeakKeyDictionary()
+)
+
+
+def session_insights_script(redis_client: redis.Redis) -> AsyncScript:
+    """The session insights script registered on this client"""
+    script = _session_insights_scripts.get(redis_client)
+    if script is None:
+        script = redis_client.register_script(UPDATE_SESSION_INSIGHTS_SCRIPT)
+        _session_insights_scripts[redis_client] = script
+    return script
+
+
+def session_insights_keys(session_id: str) -> list[str]:
+    """
+    Redis keys holding the state of a session: the main hash with scalar
+    metrics, a hash of event counts, a sorted set of games viewed and a set
+    of referrer pages.
+    """
+    session_key = f"session:insights:{session_id}"
+    return [
+        session_key,
+        f"{session_key}:events",
+        f"{session_key}:games",
+        f"{session_key}:referrers",
+    ]
+
+
+def last_viewed_key(user_id: int) -> str:
+    """Redis list of the games a user viewed last, most recent first"""
+    return f"last_viewed:{user_id}"
+
+
+def session_update_keys(data: IngestionSchema) -> list[str]:
+    """Keys touched by the session insights Lua script for one event"""
+    return [*session_insights_keys(data.session_id), last_viewed_key(data.user_id)]
 
 
 async def ingest_data_service(
     data: IngestionSchema,
     redis_client: redis.Redis,
-    postgres_session: AsyncSession,
+    event_writer: WebEventBatchWriter,
 ) -> None:
     try:
-        # Store last viewed games in Redis list
-        if data.game_id:
-            # Update session insights in Redis
-            await update_session_insights(redis_client, data)
-
-        # Store event in PostgreSQL
-        web_event = WebEvents(**data.model_dump())
-        postgres_session.add(web_event)
-        await postgres_session.commit()
+        with track_ingest_stage("ingest"):
+            # Store last viewed games in Redis list
+            if data.game_id:
+                # Update session insights in Redis
+                await update_session_insights(redis_client, data)
+
+            # Cached customer insights of the user are stale from now on
+            await bump_insights_versions(redis_client, [data.user_id])
+
+            # Queue event for the next batched write to PostgreSQL
+            await event_writer.put(data)
     except Exception as e:
         logger.exception(f"Error ingesting data: {e}")
         raise
 
 
+async def ingest_batch_service(
+    events: Sequence[IngestionSchema],
+    redis_client: redis.Redis,
+    event_writer: WebEventBatchWriter,
+) -> None:
+    """
+    Bulk version of `ingest_data_service`: session insights for the whole
+    batch are updated in one Redis round trip and every event is queued for
+    the batched PostgreSQL write.
+    """
+    try:
+        with track_ingest_stage("ingest", len(events)):
+            await update_session_insights_batch(
+                redis_client,
+                [data for data in events if data.game_id],
+            )
+            await bump_insights_versions(
+                redis_client,
+                [data.user_id for data in events],
+            )
+            await event_writer.put_many(events)
+    except Exception as e:
+        logger.exception(f"Error ingesting batch of {len(events)} events: {e}")
+        raise
+
+
 async def update_session_insights(
     redis_client: redis.Redis,
     data: IngestionSchema,
 ) -> None:
     """
     Update session insights in Redis based on web events.
-    This creates/updates a Redis hash with session activity metrics.
+    This creates/updates the session keys with activity metrics.
     Limits stored games viewed to the 10 most recent.
+
+    Viewed games are also moved to the front of the user's deduplicated
+    last viewed list, capped at MAX_LAST_VIEWED entries.
+
+    The whole update runs server side in a single Lua script call, so it
+    costs one round trip and concurrent events for the same session cannot
+    overwrite each other's changes.
     """
-    session_key = f"session:insights:{data.session_id}"
+    script = session_insights_script(redis_client)
+    with track_ingest_stage("session_insights"):
+        await script(
+            keys=session_update_keys(data),
+            args=session_insights_args(data, datetime.now(UTC)),
+        )
 
-    # Check if session exists in Redis
-    session_exists = await redis_client.exists(session_key)
 
-    # Get current timestamp for calculations
-    current_time = datetime.now(UTC)
+async def update_session_insights_batch(
+    redis_client: redis.Redis,
+    events: Sequence[IngestionSchema],
+) -> None:
+    """
+    Update session insights for many events in a single pipelined round trip.
+    Each event still goes through the same Lua script, in order.
+    """
+    if not events:
+        return
 
-    # Start a Redis pipeline for atomic operations
-    pipeline = redis_client.pipeline()
-
-    if not session_exists:
-        # Initialize new session insights
-        session_data = {
-            "user_id": data.user_id,
-            "session_id": data.session_id,
-            "start_time": current_time.isoformat(),
-            "last_activity": current_time.isoformat(),
-            "page_views": 0,
-            "games_viewed": json.dumps([]),
-            "total_time_spent": 0,
-            "event_counts": json.dumps({}),
-            "referrer_pages": json.dumps([]),
-        }
-        await pipeline.hset(session_key, mapping=session_data)
-    else:
-        # Update last activity time
-        await pipeline.hset(session_key, "last_activity", current_time.isoformat())
-
-    # Update event counts
-    event_counts_json: bytes | None = await redis_client.hget(
-        session_key,
-        "event_counts",
-    )  # type: ignore
-    if event_counts_json:
-        event_counts = json.loads(event_counts_json.decode("utf-8"))
-    else:
-        event_counts = {}
-
-    event_counts[data.event_type] = event_counts.get(data.event_type, 0) + 1
-    await pipeline.hset(session_key, "event_counts", json.dumps(event_counts))
-
-    # Update page views if this is a VIEW event
-    if data.event_type == "VIEW":
-        await pipeline.hincrby(session_key, "page_views", 1)
-
-    # Update time spent if available
-    if data.time_spent:
-        await pipeline.hincrby(session_key, "total_time_spent", data.time_spent)
-
-    # Update games viewed if this is a game view
-    if data.event_type == "VIEW" and data.game_id:
-        games_viewed_json: bytes | None = await redis_client.hget(
-            session_key,
-            "games_viewed",
-        )  # type: ignore
-        if games_viewed_json:
-            games_viewed = json.loads(games_viewed_json.decode("utf-8"))
-        else:
-            games_viewed = []
-
-        if data.game_id not in games_viewed:
-            # Add the new game_id to the list
-            games_viewed.append(data.game_id)
-            # Limit to 10 most recent games (keep the last 10)
-            if len(games_viewed) > 10:
-                games_viewed = games_viewed[-10:]
-            await pipeline.hset(session_key, "games_viewed", json.dumps(games_viewed))
-
-    # Update referrer pages
-    if data.referrer_page:
-        referrer_pages_json: bytes | None = await redis_client.hget(
-            session_key,
-            "referrer_pages",
-        )  # type: ignore
-        if referrer_pages_json:
-            referrer_pages = json.loads(referrer_pages_json.decode("utf-8"))
-        else:
-            referrer_pages = []
-
-        if data.referrer_page not in referrer_pages:
-            referrer_pages.append(data.referrer_page)
-            await pipeline.hset(
-                session_key,
-                "referrer_pages",
-                json.dumps(referrer_pages),
+    current_time = datetime.now(UTC)
+    script = session_insights_script(redis_client)
+    with track_ingest_stage("session_insights", len(events)):
+        pipeline = redis_client.pipeline(transaction=False)
+        for data in events:
+            await script(
+                keys=session_update_keys(data),
+                args=session_insights_args(data, current_time),
+                client=pipeline,
             )
+        await pipeline.execute()
 
-    # Set expiration time (24 hours)
-    await pipeline.expire(session_key, 60 * 60 * 24)
 
-    # Execute all commands atomically
-    await pipeline.execute()
+def session_insights_args(data: IngestionSchema, current_time: datetime) -> list:
+    """Arguments of the session insights Lua script for one event"""
+    return [
+        data.user_id,
+        data.session_id,
+        current_time.isoformat(),
+        data.event_type,
+        data.game_id or "",
+        data.time_spent or 0,
+        data.referrer_page or "",
+        MAX_GAMES_VIEWED,
+        SESSION_TTL_SECONDS,
+        MAX_LAST_VIEWED,
+        LAST_VIEWED_TTL_SECONDS,
+    ]
 
 
 async def get_session_insights(
@@ -142,25 +265,46 @@ async def get_session_insights(
     """
     Retrieve session insights from Redis.
     Returns a dictionary with session metrics or None if not found.
+
+    All session keys are read back in a single pipelined call. Sessions that
+    still use the old JSON-in-hash layout are decoded from the main hash.
     """
-    session_key = f"session:insights:{session_id}"
+    session_key, events_key, games_key, referrers_key = session_insights_keys(
+        session_id,
+    )
+
+    pipeline = redis_client.pipeline(transaction=False)
+    pipeline.hgetall(session_key)
+    pipeline.hgetall(events_key)
+    pipeline.zrange(games_key, 0, -1)
+    pipeline.smembers(referrers_key)
+    (
+        session_data_bytes,
+        event_counts,
+        games_viewed,
+        referrer_pages,
+    ) = await pipeline.execute()
 
-    # Check if session exists
-    if not await redis_client.exists(session_key):
+    # Session does not exist or has expired
+    if not session_data_bytes:
         return None
 
-    # Get all session data
     # Convert bytes to strings
-    session_data_bytes: dict[bytes, bytes] = await redis_client.hgetall(session_key)  # type: ignore
-
     session_data: dict[str, Any] = {
         k.decode("utf-8"): v.decode("utf-8") for k, v in session_data_bytes.items()
     }
 
-    # Parse JSON fields
-    for field in ["event_counts", "games_viewed", "referrer_pages"]:
+    native_fields: dict[str, Any] = {
+        "event_counts": {k.decode("utf-8"): int(v) for k, v in event_counts.items()},
+        "games_viewed": [int(game_id) for game_id in games_viewed],
+        "referrer_pages": sorted(page.decode("utf-8") for page in referrer_pages),
+    }
+    for field, value in native_fields.items():
         if field in session_data:
+            # Session not migrated yet, the field is a JSON string
             session_data[field] = json.loads(session_data[field])
+        else:
+            session_data[field] = value
 
     # Convert numeric fields
     for field in ["page_views", "total_time_spent"]:
@@ -0,0 +1,95 @@
+from collections.abc import Awaitable, Callable, Iterable
+
+import orjson
+import redis.asyncio as redis
+from loguru import logger
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.metrics import track_cache
+from app.schemas.customer_insights import CustomerInsightResponse
+
+INSIGHTS_CACHE_NAME = "customer_insights"
+# Version counters of idle users expire, never before the entries they key
+INSIGHTS_VERSION_TTL_SECONDS = max(24 * 60 * 60, settings.INSIGHTS_CACHE_TTL)
+
+
+def insights_version_key(user_id: int) -> str:
+    """Counter bumped whenever new events of the user are ingested"""
+    return f"insights:version:{user_id}"
+
+
+def insights_cache_key(user_id: int, version: int) -> str:
+    return f"insights:{user_id}:v{version}"
+
+
+async def bump_insights_versions(
+    redis_client: redis.Redis,
+    user_ids: Iterable[int],
+    ttl: int = INSIGHTS_VERSION_TTL_SECONDS,
+) -> None:
+    """
+    Invalidate the cached insights of these users in one pipelined round trip.
+
+    Entries are never deleted: readers move on to a key for the new version
+    and the old entries expire with their TTL. The counters themselves expire
+    `ttl` seconds after the last bump, so Redis does not keep one per user
+    ever seen.
+    """
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+    pipeline = redis_client.pipeline(transaction=False)
+    for user_id in user_ids:
+        pipeline.incr(insights_version_key(user_id))
+        pipeline.expire(insights_version_key(user_id), ttl)
+    await pipeline.execute()
+
+
+@track_cache(INSIGHTS_CACHE_NAME)
+async def read_cached_insights(
+    redis_client: redis.Redis,
+    cache_key: str,
+) -> bytes | None:
+    return await redis_client.get(cache_key)
+
+
+async def get_or_compute_insights(
+    redis_client: redis.Redis,
+    user_id: int,
+    compute: Callable[[], Awaitable[CustomerInsightResponse]],
+    ttl: int = settings.INSIGHTS_CACHE_TTL,
+) -> bytes:
+    """
+    Read-through cache of the serialized insights of a user.
+
+    The version is read before computing, so insights computed while new
+    events are being ingested are stored under a version nobody reads anymore.
+    Redis errors fall back to computing the insights.
+
+    Args:
+        redis_client: The Redis client
+        user_id: The user the insights are about
+        compute: Builds the insights on a cache miss
+        ttl: Seconds the serialized insights are kept
+
+    Returns:
+        The insights as JSON bytes
+    """
+    try:
+        version = int(await redis_client.get(insights_version_key(user_id)) or 0)
+        cache_key = insights_cache_key(user_id, version)
+        payload = await read_cached_insights(redis_client, cache_key)
+    except RedisError as e:
+        logger.warning(f"Customer insights cache unavailable: {e}")
+        return orjson.dumps((await compute()).model_dump(mode="json"))
+
+    if payload is not None:
+        return payload
+
+    payload = orjson.dumps((await compute()).model_dump(mode="json"))
+    try:
+        await redis_client.set(cache_key, payload, ex=ttl)
+    except RedisError as e:
+        logger.warning(f"Could not cache customer insights of user {user_id}: {e}")
+    return payload
@@ -0,0 +1,108 @@
+import base64
+from collections.abc import Mapping, Sequence
+from datetime import datetime
+from typing import Any, Generic, TypeVar
+
+import orjson
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import RowMapping, Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from app.services.exceptions import InvalidCursor
+
+T = TypeVar("T")
+
+
+class CursorPage(BaseModel, Generic[T]):
+    """A page of rows and the cursor of the next one, None on the last page"""
+
+    items: tuple[T, ...]
+    next_cursor: str | None = None
+
+    model_config = ConfigDict(frozen=True)
+
+
+def encode_cursor(sort: str, values: Sequence[Any]) -> str:
+    """Opaque cursor holding the sort key values of the last row of a page"""
+    payload = orjson.dumps([sort, *values])
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(
+    cursor: str,
+    sort: str,
+    columns: Sequence[InstrumentedAttribute],
+) -> list[Any]:
+    """
+    Read back the sort key values of a cursor made by `encode_cursor`.
+
+    Raises:
+        InvalidCursor: If the cursor is malformed or made for another sort
+    """
+    try:
+        payload = orjson.loads(
+            base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        )
+        if not isinstance(payload, list) or payload[:1] != [sort]:
+            raise ValueError
+        values = payload[1:]
+        if len(values) != len(columns):
+            raise ValueError
+        return [
+            datetime.fromisoformat(value)
+            if column.type.python_type is datetime
+            else column.type.python_type(value)
+            for column, value in zip(columns, values, strict=True)
+        ]
+    except (ValueError, TypeError) as e:
+        msg = f"Invalid cursor for sort {sort}"
+        raise InvalidCursor(msg) from e
+
+
+async def fetch_page(
+    db: AsyncSession,
+    query: Select,
+    sorts: Mapping[str, InstrumentedAttribute],
+    sort: str,
+    limit: int,
+    skip: int = 0,
+    cursor: str | None = None,
+) -> tuple[Sequence[RowMapping], str | None]:
+    """
+    Fetch one page of `query` ordered by the `sort` column then by id.
+
+    The query selects columns, not ORM entities, and must include the sort
+    columns under their own names. Rows come back as plain mappings, ready
+    to be validated by a TypeAdapter without building ORM objects first.
+
+    A cursor page seeks straight past the last row of the previous page, so
+    with an index on the sort key and id it costs the same however deep it
+    is, unlike `skip` which reads and drops every skipped row.
+
+    Returns:
+        The rows of the page and the cursor of the next page, if any
+
+    Raises:
+        InvalidCursor: If the cursor is invalid or combined with `skip`
+    """
+    id_column = sorts["id"]
+    columns = [id_column] if sort == "id" else [sorts[sort], id_column]
+
+    query = query.order_by(*columns).limit(limit + 1)
+    if cursor is not None:
+        if skip:
+            msg = "skip cannot be combined with a cursor"
+            raise InvalidCursor(msg)
+        query = query.where(
+            tuple_(*columns) > tuple_(*decode_cursor(cursor, sort, columns)),
+        )
+    elif skip:
+        query = query.offset(skip)
+
+    rows = (await db.execute(query)).mappings().all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    values = [rows[-1][column.key] for column in columns]
+    return rows, encode_cursor(sort, values)
@@ -0,0 +1,192 @@
+import re
+from datetime import date, datetime
+from typing import Literal
+
+from loguru import logger
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import TableClause, column, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.game_store import WebEvents
+from app.services.event_aggregates import subtract_event_aggregates
+
+PARENT_TABLE = WebEvents.__table__
+DEFAULT_PARTITION = "web_events_default"
+BOUND_PATTERN = re.compile(r"FROM \((.+)\) TO \((.+)\)")
+
+
+class Partition(BaseModel):
+    """A web_events partition and its range, None bounds are unbounded"""
+
+    name: str
+    lower: datetime | None = None
+    upper: datetime | None = None
+    is_default: bool = False
+
+    model_config = ConfigDict(frozen=True)
+
+    def overlaps(self, lower: datetime, upper: datetime) -> bool:
+        if self.is_default:
+            return False
+        return (self.lower is None or self.lower < upper) and (
+            self.upper is None or lower < self.upper
+        )
+
+
+def month_start(day: date) -> datetime:
+    return datetime(day.year, day.month, 1)
+
+
+def add_months(day: datetime, months: int) -> datetime:
+    year, month = divmod(day.month - 1 + months, 12)
+    return day.replace(year=day.year + year, month=month + 1)
+
+
+def partition_name(lower: datetime) -> str:
+    return f"web_events_p{lower:%Y_%m}"
+
+
+def qualified(name: str) -> str:
+    return f'{PARENT_TABLE.schema}."{name}"'
+
+
+def partition_table(name: str) -> TableClause:
+    """A partition as a table with the web_events columns"""
+    return table(
+        name,
+        *(column(parent.name, parent.type) for parent in PARENT_TABLE.c),
+        schema=PARENT_TABLE.schema,
+    )
+
+
+def parse_partition(name: str, bound: str) -> Partition:
+    """Build a Partition from the output of pg_get_expr(relpartbound)"""
+    if bound == "DEFAULT":
+        return Partition(name=name, is_default=True)
+    match = BOUND_PATTERN.search(bound)
+    if match is None:
+        msg = f"Unexpected bound for partition {name}: {bound}"
+        raise ValueError(msg)
+    lower, upper = (
+        None if value in ("MINVALUE", "MAXVALUE") else datetime.fromisoformat(value)
+        for value in (value.strip("'") for value in match.groups())
+    )
+    return Partition(name=name, lower=lower, upper=upper)
+
+
+async def list_web_events_partitions(
+    postgres_session: AsyncSession,
+) -> list[Partition]:
+    result = await postgres_session.execute(
+        text(
+            "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) "
+            "FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = CAST(:parent AS regclass) "
+            "ORDER BY child.relname",
+        ),
+        {"parent": PARENT_TABLE.fullname},
+    )
+    return [parse_partition(name, bound) for name, bound in result.all()]
+
+
+async def create_web_events_partitions(
+    postgres_session: AsyncSession,
+    today: date,
+    months_ahead: int = settings.WEB_EVENTS_PARTITIONS_AHEAD,
+) -> list[str]:
+    """
+    Create the monthly partitions from the current month to `months_ahead`.
+
+    Events outside every partition land in the default partition. Rows that
+    belong to a partition being created are moved out of it, since PostgreSQL
+    refuses to attach a range the default partition already holds rows for.
+
+    Returns:
+        The names of the partitions created
+    """
+    partitions = await list_web_events_partitions(postgres_session)
+    has_default = any(partition.is_default for partition in partitions)
+    created = []
+    for offset in range(months_ahead + 1):
+        lower = add_months(month_start(today), offset)
+        upper = add_months(lower, 1)
+        if any(partition.overlaps(lower, upper) for partition in partitions):
+            continue
+
+        name = qualified(partition_name(lower))
+        bounds = f"FROM ('{lower:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+        await postgres_session.execute(
+            text(
+                f"CREATE TABLE {name} "
+                f"(LIKE {PARENT_TABLE.fullname} INCLUDING DEFAULTS)",
+            ),
+        )
+        if has_default:
+            await postgres_session.execute(
+                text(
+                    f"WITH moved AS (DELETE FROM {qualified(DEFAULT_PARTITION)} "
+                    f'WHERE "timestamp" >= :lower AND "timestamp" < :upper '
+                    f"RETURNING *) INSERT INTO {name} SELECT * FROM moved",
+                ),
+                {"lower": lower, "upper": upper},
+            )
+        await postgres_session.execute(
+            text(
+                f"ALTER TABLE {PARENT_TABLE.fullname} "
+                f"ATTACH PARTITION {name} FOR VALUES {bounds}",
+            ),
+        )
+        created.append(partition_name(lower))
+
+    await postgres_session.commit()
+    return created
+
+
+async def expire_web_events_partitions(
+    postgres_session: AsyncSession,
+    today: date,
+    retention_months: int = settings.WEB_EVENTS_RETENTION_MONTHS,
+    action: Literal["detach", "drop"] = settings.WEB_EVENTS_EXPIRED_PARTITIONS,
+) -> list[str]:
+    """
+    Detach or drop the partitions whose whole range is older than the
+    retention period. Detached partitions stay around as plain tables.
+
+    Their events are taken out of the per-user rollups in the same
+    transaction, so customer insights keep matching web_events.
+
+    Returns:
+        The names of the partitions detached or dropped
+    """
+    if retention_months <= 0:
+        return []
+
+    cutoff = add_months(month_start(today), -retention_months)
+    expired = [
+        partition.name
+        for partition in await list_web_events_partitions(postgres_session)
+        if not partition.is_default
+        and partition.upper is not None
+        and partition.upper <= cutoff
+    ]
+    if expired:
+        # Writers wait until the rollups and the partitions change together
+        await postgres_session.execute(
+            text(f"LOCK TABLE {PARENT_TABLE.fullname} IN SHARE MODE"),
+        )
+    for name in expired:
+        await subtract_event_aggregates(postgres_session, partition_table(name))
+        if action == "drop":
+            statement = f"DROP TABLE {qualified(name)}"
+        else:
+            statement = (
+                f"ALTER TABLE {PARENT_TABLE.fullname} "
+                f"DETACH PARTITION {qualified(name)}"
+            )
+        logger.info(f"Expiring web_events partition {name}: {action}")
+        await postgres_session.execute(text(statement))
+
+    await postgres_session.commit()
+    return expired
@@ -1,10 +1,22 @@
+from typing import Literal
+
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.game_store import Publisher
-from app.schemas.publisher import PublisherCreate, PublisherUpdate
+from app.schemas.publisher import (
+    PublisherCreate,
+    PublisherInDB,
+    PublisherUpdate,
+    publishers_adapter,
+)
+from app.services.catalog_cache import catalog_cache
 from app.services.exceptions import DuplicateEntry, NoPublisher
+from app.services.pagination import CursorPage, fetch_page
+
+PublisherSort = Literal["id", "name"]
+PUBLISHER_SORTS = {"id": Publisher.id, "name": Publisher.name}
 
 
 async def create_publisher(db: AsyncSession, publisher: PublisherCreate) -> Publisher:
@@ -13,14 +25,16 @@ async def create_publisher(db: AsyncSession, publisher: PublisherCreate) -> Publ
         db.add(db_publisher)
         await db.commit()
         await db.refresh(db_publisher)
-        return db_publisher
     except IntegrityError as e:
         await db.rollback()
         msg = f"Publisher with name {publisher.name} already exists"
         raise DuplicateEntry(msg) from e
+    await catalog_cache.invalidate("publisher", db_publisher.id)
+    return db_publisher
 
 
-async def get_publisher(db: AsyncSession, publisher_id: int) -> Publisher:
+async def get_db_publisher(db: AsyncSession, publisher_id: int) -> Publisher:
+    """Load the publisher row itself, bypassing the cache, to change it"""
     result = await db.execute(select(Publisher).filter(Publisher.id == publisher_id))
     publisher = result.scalar_one_or_none()
     if not publisher:
@@ -29,17 +43,42 @@ async def get_publisher(db: AsyncSession, publisher_id: int) -> Publisher:
     return publisher
 
 
+async def get_publisher(db: AsyncSession, publisher_id: int) -> PublisherInDB:
+    async def load() -> PublisherInDB:
+        return PublisherInDB.model_validate(await get_db_publisher(db, publisher_id))
+
+    return await catalog_cache.publishers.get_or_load(publisher_id, load)
+
+
 async def get_publishers(
     db: AsyncSession,
     skip: int = 0,
     limit: int = 100,
-) -> list[Publisher]:
-    result = await db.execute(select(Publisher).offset(skip).limit(limit))
-    publishers = result.scalars().all()
-    if not publishers:
+    cursor: str | None = None,
+    sort: PublisherSort = "id",
+) -> CursorPage[PublisherInDB]:
+    async def load() -> CursorPage[PublisherInDB]:
+        rows, next_cursor = await fetch_page(
+            db,
+            select(*Publisher.__table__.c),
+            PUBLISHER_SORTS,
+            sort,
+            limit,
+            skip,
+            cursor,
+        )
+        return CursorPage(
+            items=publishers_adapter.validate_python(rows),
+            next_cursor=next_cursor,
+        )
+
+    page = await catalog_cache.publisher_lists.get_or_load(
+        (sort, skip, cursor, limit), load
+    )
+    if not page.items:
         msg = "No publishers found"
         raise NoPublisher(msg)
-    return list(publishers)
+    return page
 
 
 async def update_publisher(
@@ -47,7 +86,7 @@ async def update_publisher(
     publisher_id: int,
     publisher: PublisherUpdate,
 ) -> Publisher:
-    db_publisher = await get_publisher(db, publisher_id)
+    db_publisher = await get_db_publisher(db, publisher_id)
 
     update_data = publisher.model_dump(exclude_unset=True)
     for field, value in update_data.items():
@@ -56,14 +95,16 @@ async def update_publisher(
     try:
         await db.commit()
         await db.refresh(db_publisher)
-        return db_publisher
     except IntegrityError as e:
         await db.rollback()
         msg = f"Publisher with name {publisher.name} already exists"
         raise DuplicateEntry(msg) from e
+    await catalog_cache.invalidate("publisher", publisher_id)
+    return db_publisher
 
 
 async def delete_publisher(db: AsyncSession, publisher_id: int) -> None:
-    db_publisher = await get_publisher(db, publisher_id)
+    db_publisher = await get_db_publisher(db, publisher_id)
     await db.delete(db_publisher)
     await db.commit()
+    await catalog_cache.invalidate("publisher", publisher_id)
@@ -0,0 +1,429 @@
+import asyncio
+import heapq
+import io
+import time
+from array import array
+from collections.abc import Sequence
+from contextlib import suppress
+from datetime import datetime
+
+import numpy as np
+import redis.asyncio as redis
+from loguru import logger
+from scipy import sparse
+from sqlalchemy import ColumnElement, Select, Table, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.models.game_store import OrderItem, WebEvents
+from app.schemas.recommendations import GameScore
+from app.services.event_archive import settled_max_id
+from app.services.exceptions import RecommendationsNotReady
+
+# Baskets per fetch from the server-side cursor
+BASKET_BATCH_SIZE = 10_000
+# Crawlers view most of the catalog in one session, which says nothing
+MAX_BASKET_GAMES = 100
+VIEW_WEIGHT = 1.0
+# Games bought together say more than games viewed together
+PURCHASE_WEIGHT = 3.0
+SCORE_DECIMALS = 4
+# Redis hash holding the published NeighborIndex and its version
+INDEX_KEY = "recommendations:co_view"
+
+
+class BasketSource:
+    """
+    Rows putting games in baskets, sessions or orders, with increasing ids.
+
+    A basket counts once for each pair of games it holds, however many rows
+    it has for them.
+    """
+
+    def __init__(
+        self,
+        table: Table,
+        basket: ColumnElement,
+        game: ColumnElement,
+        weight: float,
+        *conditions: ColumnElement[bool],
+    ) -> None:
+        self.table = table
+        self.basket = basket
+        self.game = game
+        self.weight = weight
+        self.conditions = conditions
+
+    @property
+    def name(self) -> str:
+        return self.table.name
+
+    def query(self, lower: int, upper: int) -> Select:
+        """
+        Returns:
+            Select: One row per basket with rows in (lower, upper]: the ids
+            of its games and, for each, the id of the first row putting it
+            in the basket
+        """
+        row_id = self.table.c.id
+        conditions = (row_id <= upper, *self.conditions)
+        games = (
+            select(
+                self.basket.label("basket"),
+                self.game.label("game_id"),
+                func.min(row_id).label("first_id"),
+            )
+            .where(*conditions)
+            .group_by(self.basket, self.game)
+        )
+        if lower:
+            changed = select(self.basket).where(row_id > lower, *conditions)
+            games = games.where(self.basket.in_(changed))
+        games = games.subquery()
+        # Arrays decode in the driver, far cheaper than a row per game
+        return select(
+            func.array_agg(games.c.game_id),
+            func.array_agg(games.c.first_id),
+        ).group_by(games.c.basket)
+
+
+BASKET_SOURCES = (
+    BasketSource(
+        WebEvents.__table__,
+        WebEvents.session_id,
+        WebEvents.game_id,
+        VIEW_WEIGHT,
+        WebEvents.event_type == "VIEW",
+        WebEvents.game_id.is_not(None),
+    ),
+    BasketSource(
+        OrderItem.__table__,
+        OrderItem.order_id,
+        OrderItem.game_id,
+        PURCHASE_WEIGHT,
+        OrderItem.game_id.is_not(None),
+    ),
+)
+
+
+async def read_baskets(
+    postgres_session: AsyncSession,
+    query: Select,
+    batch_size: int = BASKET_BATCH_SIZE,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns:
+        tuple: Basket numbers from 0, game ids and first row ids, one
+        entry per game of each basket of the BasketSource query
+    """
+    baskets, games, first_ids = array("q"), array("q"), array("q")
+    number = 0
+    connection = await postgres_session.connection()
+    result = await connection.stream(query.execution_options(yield_per=batch_size))
+    async for rows in result.partitions():
+        for game_ids, basket_first_ids in rows:
+            baskets.extend([number] * len(game_ids))
+            games.extend(game_ids)
+            first_ids.extend(basket_first_ids)
+            number += 1
+    return (
+        np.frombuffer(baskets, dtype=np.int64),
+        np.frombuffer(games, dtype=np.int64),
+        np.frombuffer(first_ids, dtype=np.int64),
+    )
+
+
+def co_occurrences(
+    baskets: np.ndarray,
+    positions: np.ndarray,
+    n_games: int,
+) -> sparse.csr_array:
+    """
+    Number of baskets holding each pair of games, and each game on the
+    diagonal. Baskets of more than MAX_BASKET_GAMES games are left out.
+    """
+    if not len(baskets):
+        return sparse.csr_array((n_games, n_games))
+    kept = np.bincount(baskets)[baskets] <= MAX_BASKET_GAMES
+    holding = sparse.csr_array(
+        (np.ones(kept.sum()), (baskets[kept], positions[kept])),
+        shape=(int(baskets.max()) + 1, n_games),
+    )
+    return (holding.T @ holding).tocsr()
+
+
+class NeighborIndex:
+    """Most similar games of each game, best first, read without computing"""
+
+    def __init__(
+        self,
+        game_ids: np.ndarray,
+        neighbors: np.ndarray,
+        scores: np.ndarray,
+        lengths: np.ndarray,
+    ) -> None:
+        self._game_ids = game_ids
+        self._rows = {game_id: row for row, game_id in enumerate(game_ids.tolist())}
+        self._neighbors = neighbors
+        self._scores = scores
+        self._lengths = lengths
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def top_k(self) -> int:
+        return self._neighbors.shape[1]
+
+    def similar(self, game_id: int, limit: int) -> list[tuple[int, float]]:
+        row = self._rows.get(game_id)
+        if row is None:
+            return []
+        end = min(int(self._lengths[row]), limit)
+        return list(
+            zip(
+                self._neighbors[row, :end].tolist(),
+                self._scores[row, :end].tolist(),
+                strict=True,
+            ),
+        )
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            game_ids=self._game_ids,
+            neighbors=self._neighbors,
+            scores=self._scores,
+            lengths=self._lengths,
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "NeighborIndex":
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            return cls(
+                arrays["game_ids"],
+                arrays["neighbors"],
+                arrays["scores"],
+                arrays["lengths"],
+            )
+
+
+class CoViewModel:
+    """
+    Weighted number of baskets holding each pair of games.
+
+    Only the baskets with new rows are read again on an update: their games
+    before the new rows are subtracted and their games after are added, so
+    an update costs the size of the changed baskets, not of the history.
+    """
+
+    def __init__(self) -> None:
+        self.game_ids = np.empty(0, dtype=np.int64)
+        self.counts = sparse.csr_array((0, 0))
+        # Last row id applied, per BasketSource
+        self.through: dict[str, int] = {}
+
+    def positions(self, game_ids: np.ndarray) -> np.ndarray:
+        """Rows and columns of the games in counts, added if new"""
+        unique, inverse = np.unique(game_ids, return_inverse=True)
+        new = np.setdiff1d(unique, self.game_ids)
+        if len(new):
+            self.game_ids = np.concatenate([self.game_ids, new])
+            self.counts.resize((len(self.game_ids), len(self.game_ids)))
+        order = np.argsort(self.game_ids)
+        return order[np.searchsorted(self.game_ids[order], unique)][inverse]
+
+    def update(
+        self,
+        source: BasketSource,
+        baskets: tuple[np.ndarray, np.ndarray, np.ndarray],
+        upper: int,
+    ) -> None:
+        """Apply the baskets read from source.query(through, upper)"""
+        basket_numbers, game_ids, first_ids = baskets
+        positions = self.positions(game_ids)
+        n_games = len(self.game_ids)
+        old = first_ids <= self.through.get(source.name, 0)
+        after = co_occurrences(basket_numbers, positions, n_games)
+        before = co_occurrences(basket_numbers[old], positions[old], n_games)
+        self.counts = (self.counts + source.weight * (after - before)).tocsr()
+        self.through[source.name] = upper
+
+    def neighbors(self, top_k: int) -> NeighborIndex:
+        """
+        The top_k games most similar to each game.
+
+        Similarity is the cosine of the basket vectors of two games, their
+        shared baskets over the geometric mean of their baskets.
+        """
+        counts = self.counts.tocsr()
+        norms = np.sqrt(counts.diagonal())
+        inverse = np.divide(1, norms, out=np.zeros_like(norms), where=norms > 0)
+        similarity = (
+            sparse.diags_array(inverse) @ counts @ sparse.diags_array(inverse)
+        ).tocsr()
+        similarity.setdiag(0)
+        similarity.eliminate_zeros()
+
+        n_games = len(self.game_ids)
+        neighbors = np.zeros((n_games, top_k), dtype=np.int64)
+        scores = np.zeros((n_games, top_k), dtype=np.float64)
+        lengths = np.zeros(n_games, dtype=np.int64)
+        for row in range(n_games):
+            start, end = similarity.indptr[row], similarity.indptr[row + 1]
+            row_scores = similarity.data[start:end].round(SCORE_DECIMALS)
+            row_games = self.game_ids[similarity.indices[start:end]]
+            # Best first, the lowest game id first on ties
+            order = np.lexsort((row_games, -row_scores))[:top_k]
+            lengths[row] = len(order)
+            neighbors[row, : len(order)] = row_games[order]
+            scores[row, : len(order)] = row_scores[order]
+        return NeighborIndex(self.game_ids, neighbors, scores, lengths)
+
+
+class CoViewIndexBuilder:
+    """
+    Keeps the co-view model up to date and publishes its NeighborIndex.
+
+    Runs in a single process, see app.recommendations_worker. The first
+    refresh reads the whole history of web_events and order_items, the next
+    ones only the sessions and orders with rows added since, and each one
+    publishes the new index to Redis for the API workers to load.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        redis_client: redis.Redis,
+        top_k: int = settings.RECOMMENDATIONS_TOP_K,
+        interval: float = settings.RECOMMENDATIONS_REFRESH_INTERVAL,
+    ) -> None:
+        self.model = CoViewModel()
+        self.index: NeighborIndex | None = None
+        self._session_factory = session_factory
+        self._redis_client = redis_client
+        self._top_k = top_k
+        self._interval = interval
+
+    async def refresh(self) -> None:
+        """Apply the baskets changed since the last refresh and publish"""
+        started = time.perf_counter()
+        changes = []
+        async with self._session_factory() as session:
+            for source in BASKET_SOURCES:
+                lower = self.model.through.get(source.name, 0)
+                upper = await settled_max_id(session, table=source.table)
+                if upper > lower:
+                    baskets = await read_baskets(session, source.query(lower, upper))
+                    changes.append((source, baskets, upper))
+        if not changes and self.index is not None:
+            return
+        self.index = await asyncio.to_thread(self._apply, changes)
+        through = ",".join(
+            f"{name}={row_id}" for name, row_id in sorted(self.model.through.items())
+        )
+        # One HSET, readers never get an index with another version
+        await self._redis_client.hset(
+            INDEX_KEY,
+            mapping={
+                "version": f"{through}@{datetime.now().isoformat()}",
+                "index": self.index.to_bytes(),
+            },
+        )
+        logger.info(
+            f"Co-view index published through {self.model.through}, "
+            f"{len(self.index)} games in {time.perf_counter() - started:.2f}s",
+        )
+
+    def _apply(self, changes: list) -> NeighborIndex:
+        for source, baskets, upper in changes:
+            self.model.update(source, baskets, upper)
+        return self.model.neighbors(self._top_k)
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """Refresh every interval until stop is set"""
+        while not stop.is_set():
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.exception(f"Error updating the co-view model: {e}")
+            with suppress(TimeoutError):
+                await asyncio.wait_for(stop.wait(), self._interval)
+
+
+class CoViewRecommender:
+    """
+    Games viewed or bought together, served from memory.
+
+    run() loads the NeighborIndex published by CoViewIndexBuilder whenever
+    its version changes. Lookups never query the database or Redis.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        interval: float = settings.RECOMMENDATIONS_RELOAD_INTERVAL,
+    ) -> None:
+        self.index: NeighborIndex | None = None
+        self.version: str | None = None
+        self._redis_client = redis_client
+        self._interval = interval
+
+    async def reload(self) -> None:
+        """Load the published index if it is newer than the one in memory"""
+        version = await self._redis_client.hget(INDEX_KEY, "version")
+        if version is None or version.decode() == self.version:
+            return
+        version, data = await self._redis_client.hmget(INDEX_KEY, ["version", "index"])
+        self.index = await asyncio.to_thread(NeighborIndex.from_bytes, data)
+        self.version = version.decode()
+        logger.info(f"Co-view index {self.version} loaded, {len(self.index)} games")
+
+    async def run(self) -> None:
+        """Reload every interval until cancelled"""
+        while True:
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.exception(f"Error loading the co-view index: {e}")
+            await asyncio.sleep(self._interval)
+
+    def _ready_index(self) -> NeighborIndex:
+        if self.index is None:
+            msg = "Recommendations are not built yet"
+            raise RecommendationsNotReady(msg)
+        return self.index
+
+    def similar_games(self, game_id: int, limit: int) -> list[GameScore]:
+        """
+        Raises:
+            RecommendationsNotReady: Before an index is loaded
+        """
+        return [
+            GameScore(game_id=neighbor, score=score)
+            for neighbor, score in self._ready_index().similar(game_id, limit)
+        ]
+
+    def recommend(self, game_ids: Sequence[int], limit: int) -> list[GameScore]:
+        """
+        Games most similar to the given ones taken together, without them.
+
+        Raises:
+            RecommendationsNotReady: Before an index is loaded
+        """
+        index = self._ready_index()
+        scores: dict[int, float] = {}
+        for game_id in game_ids:
+            for neighbor, score in index.similar(game_id, index.top_k):
+                scores[neighbor] = scores.get(neighbor, 0) + score
+        for game_id in game_ids:
+            scores.pop(game_id, None)
+        best = heapq.nlargest(
+            limit, scores.items(), key=lambda item: (item[1], -item[0])
+        )
+        return [
+            GameScore(game_id=game_id, score=round(score, SCORE_DECIMALS))
+            for game_id, score in best
+        ]
@@ -2,6 +2,7 @@ import redis.asyncio as redis
 
 from app.schemas.last_viewed import LastViewedGames
 from app.services.exceptions import NoLastViewed
+from app.services.ingestion_service import last_viewed_key
 
 
 async def get_last_viewed(
@@ -11,7 +12,7 @@ async def get_last_viewed(
     stop: int = 9,
 ) -> LastViewedGames:
     games: list[bytes] = await redis_client.lrange(
-        f"last_viewed:{user_id}",
+        last_viewed_key(user_id),
         start,
         stop,
     )
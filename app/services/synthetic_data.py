@@ -0,0 +1,420 @@
+import asyncio
+import random
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import datetime, timedelta
+from itertools import accumulate, islice
+from typing import Any
+
+from loguru import logger
+from pydantic import BaseModel, Field
+from sqlalchemy import Table, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.game_store import (
+    Game,
+    Genre,
+    PlatformType,
+    Publisher,
+    RegionType,
+    User,
+    WebEvents,
+    game_genre,
+)
+from app.services.event_aggregates import backfill_event_aggregates
+from app.services.partition_maintenance import create_web_events_partitions
+
+Record = tuple[Any, ...]
+
+# Event types and their share of the events of a session, the first is VIEW
+EVENT_TYPE_WEIGHTS = {
+    "VIEW": 80,
+    "ADD_TO_CART": 8,
+    "WISHLIST": 5,
+    "REMOVE_FROM_CART": 2,
+    "PURCHASE": 3,
+    "REVIEW": 2,
+}
+SESSION_PLATFORM_WEIGHTS = {"Web": 65, "Mobile": 35}
+REFERRER_PAGES = {
+    "ADD_TO_CART": "/games/{game_id}",
+    "WISHLIST": "/games/{game_id}",
+    "REMOVE_FROM_CART": "/cart",
+    "PURCHASE": "/cart",
+    "REVIEW": "/games/{game_id}/review",
+}
+SEARCH_QUERIES = ["mario", "zelda", "sonic", "rpg", "rare", "boxed", "cib"]
+FILTERS = [
+    '{"platform": "NES"}',
+    '{"platform": "SNES"}',
+    '{"is_rare": true}',
+    '{"publisher": "Nintendo"}',
+]
+# Share of VIEW events on a listing page instead of a game page
+LISTING_VIEW_SHARE = 0.1
+
+WEB_EVENTS_COLUMNS = [
+    "user_id",
+    "game_id",
+    "event_type",
+    "session_id",
+    "time_spent",
+    "referrer_page",
+    "platform",
+    "search_query",
+    "filters_applied",
+    "timestamp",
+]
+
+
+class DatasetSpec(BaseModel):
+    """
+    Size and shape of a synthetic dataset.
+
+    User activity and game popularity follow Zipf distributions, the lowest
+    generated ids being the most active users and the most viewed games.
+    """
+
+    users: int = Field(default=100_000, ge=1)
+    games: int = Field(default=10_000, ge=1)
+    genres: int = Field(default=40, ge=1)
+    publishers: int = Field(default=200, ge=1)
+    events: int = Field(default=10_000_000, ge=0)
+    events_per_session: float = Field(default=12, ge=1)
+    days: int = Field(default=90, ge=1)
+    user_skew: float = Field(default=0.8, ge=0)
+    game_skew: float = Field(default=1.1, ge=0)
+    seed: int = 0
+    chunk_size: int = Field(default=50_000, ge=1)
+
+
+def table_random(seed: int, table: str) -> random.Random:
+    """One generator per table, so each table only depends on the seed"""
+    return random.Random(f"{seed}:{table}")
+
+
+def zipf_cum_weights(count: int, skew: float) -> list[float]:
+    """Cumulative weights giving rank k a probability proportional to 1/k**skew"""
+    return list(accumulate(1 / rank**skew for rank in range(1, count + 1)))
+
+
+def chunked(records: Iterable[Record], size: int) -> Iterator[list[Record]]:
+    iterator = iter(records)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def publisher_records(rng: random.Random, ids: range) -> Iterator[Record]:
+    for publisher_id in ids:
+        yield (
+            publisher_id,
+            f"Synthetic Publisher {publisher_id}",
+            f"https://publisher-{publisher_id}.example.com",
+            rng.randint(1950, 2010),
+        )
+
+
+def genre_records(rng: random.Random, ids: range) -> Iterator[Record]:
+    for genre_id in ids:
+        yield (
+            genre_id,
+            f"Synthetic Genre {genre_id}",
+            f"Generated genre {genre_id}",
+            round(rng.uniform(2.5, 5), 2),
+        )
+
+
+def game_records(
+    rng: random.Random,
+    ids: range,
+    publisher_ids: range,
+) -> Iterator[Record]:
+    platforms = [platform.name for platform in PlatformType]
+    regions = [region.name for region in RegionType]
+    for game_id in ids:
+        price = round(rng.uniform(5, 250), 2)
+        is_digital = rng.random() < 0.2
+        yield (
+            game_id,
+            f"Synthetic Game {game_id}",
+            f"Generated game {game_id}",
+            price,
+            datetime(rng.randint(1977, 2006), rng.randint(1, 12), rng.randint(1, 28)),
+            rng.choice(publisher_ids),
+            rng.choice(platforms),
+            rng.randint(0, 20),
+            is_digital,
+            rng.random() < 0.95,
+            rng.choice(regions),
+            None if is_digital else rng.randint(1, 10),
+            rng.random() < 0.5,
+            rng.random() < 0.5,
+            rng.random() < 0.05,
+            round(price * rng.uniform(0.5, 4), 2),
+            f"SYN-{game_id:08d}",
+            rng.random() < 0.1,
+        )
+
+
+def game_genre_records(
+    rng: random.Random,
+    game_ids: range,
+    genre_ids: range,
+) -> Iterator[Record]:
+    """One to three genres per game, a few genres being far more common"""
+    cum_weights = zipf_cum_weights(len(genre_ids), 1)
+    for game_id in game_ids:
+        genres = set(rng.choices(genre_ids, cum_weights=cum_weights, k=3))
+        for genre_id in sorted(genres)[: rng.randint(1, len(genres))]:
+            yield game_id, genre_id
+
+
+def user_records(rng: random.Random, ids: range, now: datetime) -> Iterator[Record]:
+    for user_id in ids:
+        yield (
+            user_id,
+            f"synthetic_user_{user_id}",
+            f"synthetic_user_{user_id}@example.com",
+            "-",
+            rng.random() < 0.98,
+            now - timedelta(days=rng.uniform(0, 5 * 365)),
+        )
+
+
+def web_event_records(
+    rng: random.Random,
+    spec: DatasetSpec,
+    user_ids: range,
+    game_ids: range,
+    end: datetime,
+) -> Iterator[Record]:
+    """
+    Sessions of events, in the column order of WEB_EVENTS_COLUMNS.
+
+    A session belongs to one user and platform, starts at a random time of the
+    last `spec.days` days and holds a geometric number of events. Events other
+    than VIEW act on a game viewed earlier in the session.
+    """
+    user_weights = zipf_cum_weights(len(user_ids), spec.user_skew)
+    game_weights = zipf_cum_weights(len(game_ids), spec.game_skew)
+    event_types = list(EVENT_TYPE_WEIGHTS)
+    event_weights = list(accumulate(EVENT_TYPE_WEIGHTS.values()))
+    platforms = list(SESSION_PLATFORM_WEIGHTS)
+    platform_weights = list(accumulate(SESSION_PLATFORM_WEIGHTS.values()))
+    window = spec.days * 24 * 60 * 60
+
+    remaining = spec.events
+    while remaining > 0:
+        (user_id,) = rng.choices(user_ids, cum_weights=user_weights)
+        (platform,) = rng.choices(platforms, cum_weights=platform_weights)
+        session_id = f"synthetic-{rng.getrandbits(64):016x}"
+        timestamp = end - timedelta(seconds=rng.uniform(0, window))
+        length = 1 + int(rng.expovariate(1 / spec.events_per_session))
+        length = min(length, remaining)
+        viewed: list[int] = []
+
+        for event_type in rng.choices(event_types, cum_weights=event_weights, k=length):
+            if event_type != "VIEW" and not viewed:
+                event_type = "VIEW"
+            time_spent = rng.randint(5, 300)
+            search_query = filters_applied = None
+            if event_type != "VIEW":
+                game_id = rng.choice(viewed)
+                referrer_page = REFERRER_PAGES[event_type].format(game_id=game_id)
+            elif rng.random() < LISTING_VIEW_SHARE:
+                game_id = None
+                referrer_page = "/search"
+                search_query = rng.choice(SEARCH_QUERIES)
+                filters_applied = rng.choice(FILTERS)
+            else:
+                (game_id,) = rng.choices(game_ids, cum_weights=game_weights)
+                viewed.append(game_id)
+                referrer_page = f"/games/{game_id}"
+
+            yield (
+                user_id,
+                game_id,
+                event_type,
+                session_id,
+                time_spent,
+                referrer_page,
+                platform,
+                search_query,
+                filters_applied,
+                timestamp,
+            )
+            timestamp += timedelta(seconds=time_spent)
+        remaining -= length
+
+
+async def copy_records(
+    postgres_session: AsyncSession,
+    table: Table,
+    columns: Sequence[str],
+    records: Iterable[Record],
+    chunk_size: int,
+) -> int:
+    """
+    COPY records into a table chunk by chunk.
+
+    The next chunk is generated in a thread while the current one is sent,
+    so the load alternates less between building rows and waiting on
+    PostgreSQL.
+
+    Returns:
+        The number of rows copied
+    """
+    connection = await postgres_session.connection()
+    driver_connection = (await connection.get_raw_connection()).driver_connection
+    chunks = chunked(records, chunk_size)
+    copied = 0
+
+    chunk = await asyncio.to_thread(next, chunks, None)
+    while chunk:
+        next_chunk = asyncio.create_task(asyncio.to_thread(next, chunks, None))
+        await driver_connection.copy_records_to_table(
+            table.name,
+            records=chunk,
+            columns=list(columns),
+            schema_name=table.schema,
+        )
+        copied += len(chunk)
+        logger.info(f"Copied {copied} rows into {table.name}")
+        chunk = await next_chunk
+    return copied
+
+
+async def next_ids(postgres_session: AsyncSession, table: Table, count: int) -> range:
+    """Ids following the largest one already in the table"""
+    last_id = await postgres_session.scalar(
+        select(func.coalesce(func.max(table.c.id), 0)),
+    )
+    return range(last_id + 1, last_id + 1 + count)
+
+
+async def sync_id_sequence(postgres_session: AsyncSession, table: Table) -> None:
+    """Move the id sequence past the ids inserted explicitly"""
+    await postgres_session.execute(
+        text(
+            f"SELECT setval(pg_get_serial_sequence(:table, 'id'), "
+            f"(SELECT max(id) FROM {table.fullname}))",
+        ),
+        {"table": table.fullname},
+    )
+
+
+async def load_synthetic_dataset(
+    postgres_session: AsyncSession,
+    spec: DatasetSpec,
+    now: datetime | None = None,
+) -> dict[str, int]:
+    """
+    Append a synthetic catalog, users and web_events history to the database.
+
+    Rows are streamed with COPY in chunks of `spec.chunk_size`. The same spec
+    and seed generate the same rows, ids start after the largest existing id
+    of each table. Each table is committed once loaded, then the partitions
+    of the event window are created before the events are copied, the
+    customer insights rollups rebuilt and the tables analyzed.
+
+    Returns:
+        The number of rows copied per table
+    """
+    now = now or datetime.now()
+    copied = {}
+
+    publisher_ids = await next_ids(
+        postgres_session, Publisher.__table__, spec.publishers
+    )
+    genre_ids = await next_ids(postgres_session, Genre.__table__, spec.genres)
+    game_ids = await next_ids(postgres_session, Game.__table__, spec.games)
+    user_ids = await next_ids(postgres_session, User.__table__, spec.users)
+
+    tables: list[tuple[Table, list[str], Iterable[Record]]] = [
+        (
+            Publisher.__table__,
+            ["id", "name", "website", "founded_year"],
+            publisher_records(table_random(spec.seed, "publishers"), publisher_ids),
+        ),
+        (
+            Genre.__table__,
+            ["id", "name", "description", "mean_rate"],
+            genre_records(table_random(spec.seed, "genres"), genre_ids),
+        ),
+        (
+            Game.__table__,
+            [
+                "id",
+                "title",
+                "description",
+                "price",
+                "release_date",
+                "publisher_id",
+                "platform",
+                "stock",
+                "is_digital",
+                "is_active",
+                "region",
+                "condition_rating",
+                "has_original_box",
+                "has_manual",
+                "is_rare",
+                "collector_value",
+                "serial_number",
+                "special_edition",
+            ],
+            game_records(table_random(spec.seed, "games"), game_ids, publisher_ids),
+        ),
+        (
+            game_genre,
+            ["game_id", "genre_id"],
+            game_genre_records(
+                table_random(spec.seed, "game_genre"), game_ids, genre_ids
+            ),
+        ),
+        (
+            User.__table__,
+            ["id", "username", "email", "hashed_password", "is_active", "created_at"],
+            user_records(table_random(spec.seed, "users"), user_ids, now),
+        ),
+    ]
+    for table, columns, records in tables:
+        copied[table.name] = await copy_records(
+            postgres_session,
+            table,
+            columns,
+            records,
+            spec.chunk_size,
+        )
+        if "id" in table.c:
+            await sync_id_sequence(postgres_session, table)
+        await postgres_session.commit()
+
+    start = now - timedelta(days=spec.days)
+    await create_web_events_partitions(
+        postgres_session,
+        start.date(),
+        months_ahead=(now.year - start.year) * 12 + now.month - start.month,
+    )
+    copied[WebEvents.__tablename__] = await copy_records(
+        postgres_session,
+        WebEvents.__table__,
+        WEB_EVENTS_COLUMNS,
+        web_event_records(
+            table_random(spec.seed, "web_events"),
+            spec,
+            user_ids,
+            game_ids,
+            now,
+        ),
+        spec.chunk_size,
+    )
+    await postgres_session.commit()
+
+    logger.info("Rebuilding user event aggregates")
+    await backfill_event_aggregates(postgres_session)
+
+    # Fresh statistics, or the planner keeps estimating from the tiny seed
+    for table in (*(table for table, _, _ in tables), WebEvents.__table__):
+        await postgres_session.execute(text(f"ANALYZE {table.fullname}"))
+    await postgres_session.commit()
+    return copied
@@ -1,10 +1,38 @@
-from sqlalchemy import select
+from typing import Literal
+
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.game_store import User
+from app.models.game_store import Order, Review, User
 from app.schemas.user import User as UserSchema
-from app.schemas.user import UserCreate, UserUpdate
+from app.schemas.user import UserCreate, UserUpdate, users_adapter
 from app.services.exceptions import NoUser
+from app.services.pagination import CursorPage, fetch_page
+
+UserSort = Literal["id", "username", "created_at"]
+USER_SORTS = {"id": User.id, "username": User.username, "created_at": User.created_at}
+
+# The columns of the user schema, order and review ids included, so rows
+# validate straight into it without loading ORM objects and relationships
+USER_ROWS = select(
+    User.id,
+    User.username,
+    User.email,
+    User.created_at,
+    User.is_active,
+    func.array(
+        select(Order.id)
+        .where(Order.user_id == User.id)
+        .order_by(Order.id)
+        .scalar_subquery(),
+    ).label("orders"),
+    func.array(
+        select(Review.id)
+        .where(Review.user_id == User.id)
+        .order_by(Review.id)
+        .scalar_subquery(),
+    ).label("reviews"),
+)
 
 
 async def create_user(
@@ -22,8 +50,7 @@ async def create_user(
     user_model = User(**user.model_dump())
     postgres_session.add(user_model)
     await postgres_session.commit()
-    await postgres_session.refresh(user_model)
-    return UserSchema.model_validate(user_model)
+    return await get_user_by_id(user_model.id, postgres_session)
 
 
 async def get_user_by_id(
@@ -41,9 +68,9 @@ async def get_user_by_id(
     Raises:
         NoUser: If no user is found with the given ID
     """
-    query = select(User).where(User.id == user_id)
+    query = USER_ROWS.where(User.id == user_id)
     result = await postgres_session.execute(query)
-    user = result.scalars().first()
+    user = result.mappings().first()
 
     if not user:
         msg = f"No user found for the customer {user_id}"
@@ -52,23 +79,43 @@ async def get_user_by_id(
     return UserSchema.model_validate(user)
 
 
+async def get_db_user(postgres_session: AsyncSession, user_id: int) -> User:
+    """Load the user row itself to change it"""
+    result = await postgres_session.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
+    if not user:
+        msg = f"No user found for the customer {user_id}"
+        raise NoUser(msg)
+    return user
+
+
 async def get_users(
     postgres_session: AsyncSession,
     skip: int = 0,
     limit: int = 100,
-) -> list[UserSchema]:
+    cursor: str | None = None,
+    sort: UserSort = "id",
+) -> CursorPage[UserSchema]:
     """
     Args:
         postgres_session: The async database session
-        skip: The number of records to skip
+        skip: The number of records to skip, not combined with a cursor
         limit: The maximum number of records to retrieve
+        cursor: The next_cursor of the previous page
+        sort: The column to sort by, then by id
 
     Returns:
-        list[UserSchema]: A list of user data converted to schema
+        CursorPage[UserSchema]: A page of user data converted to schema
+
+    Raises:
+        InvalidCursor: If the cursor is invalid or combined with skip
     """
-    query = select(User).offset(skip).limit(limit)
-    result = await postgres_session.execute(query)
-    return [UserSchema.model_validate(user) for user in result.scalars().all()]
+    rows, next_cursor = await fetch_page(
+        postgres_session, USER_ROWS, USER_SORTS, sort, limit, skip, cursor
+    )
+    return CursorPage(
+        items=users_adapter.validate_python(rows), next_cursor=next_cursor
+    )
 
 
 async def update_user(
@@ -76,16 +123,15 @@ async def update_user(
     user_id: int,
     user: UserUpdate,
 ) -> UserSchema | None:
-    db_user = await get_user_by_id(user_id, db)
+    db_user = await get_db_user(db, user_id)
     for field, value in user.model_dump().items():
         setattr(db_user, field, value)
     await db.commit()
-    await db.refresh(db_user)
-    return UserSchema.model_validate(db_user)
+    return await get_user_by_id(user_id, db)
 
 
 async def delete_user(db: AsyncSession, user_id: int) -> None:
-    db_user = await get_user_by_id(user_id, db)
+    db_user = await get_db_user(db, user_id)
     await db.delete(db_user)
     await db.commit()
     return None
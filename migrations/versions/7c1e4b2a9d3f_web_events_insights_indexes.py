@@ -0,0 +1,79 @@
+"""web events insights indexes
+
+Revision ID: 7c1e4b2a9d3f
+Revises: 29defee39f2f
+Create Date: 2026-10-18 10:02:11.204518
+
+"""
+
+from collections.abc import Sequence
+from typing import Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7c1e4b2a9d3f"
+down_revision: Union[str, None] = "29defee39f2f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_web_events_user_id_timestamp",
+            "web_events",
+            ["user_id", "timestamp"],
+            unique=False,
+            schema="game_store",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_web_events_user_id_event_type_game_id",
+            "web_events",
+            ["user_id", "event_type", "game_id"],
+            unique=False,
+            schema="game_store",
+            postgresql_include=["timestamp", "time_spent"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_web_events_user_id_platform",
+            "web_events",
+            ["user_id", "platform"],
+            unique=False,
+            schema="game_store",
+            postgresql_include=["time_spent"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_web_events_user_id_platform",
+            table_name="web_events",
+            schema="game_store",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_web_events_user_id_event_type_game_id",
+            table_name="web_events",
+            schema="game_store",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_web_events_user_id_timestamp",
+            table_name="web_events",
+            schema="game_store",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
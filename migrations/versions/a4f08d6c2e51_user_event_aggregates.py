@@ -0,0 +1,52 @@
+"""user event aggregates
+
+Revision ID: a4f08d6c2e51
+Revises: 7c1e4b2a9d3f
+Create Date: 2026-10-18 11:24:37.518230
+
+"""
+
+from collections.abc import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a4f08d6c2e51"
+down_revision: Union[str, None] = "7c1e4b2a9d3f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "user_event_aggregates",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("platform", sa.String(), nullable=False),
+        sa.Column("event_type", sa.String(), nullable=False),
+        sa.Column("event_count", sa.BigInteger(), nullable=False),
+        sa.Column("time_spent_total", sa.BigInteger(), nullable=False),
+        sa.Column("time_spent_count", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["game_store.users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "platform", "event_type"),
+        schema="game_store",
+    )
+    op.create_table(
+        "user_genre_aggregates",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("genre_id", sa.Integer(), nullable=False),
+        sa.Column("view_count", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(["genre_id"], ["game_store.genres.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["game_store.users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "genre_id"),
+        schema="game_store",
+    )
+    # Existing events are rolled up with `python -m app.backfill_aggregates`
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("user_genre_aggregates", schema="game_store")
+    op.drop_table("user_event_aggregates", schema="game_store")
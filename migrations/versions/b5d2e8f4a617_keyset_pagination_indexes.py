@@ -0,0 +1,54 @@
+"""keyset pagination indexes
+
+Revision ID: b5d2e8f4a617
+Revises: e3b9c71f5a08
+Create Date: 2026-10-18 11:05:42.318204
+
+"""
+
+from collections.abc import Sequence
+from typing import Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b5d2e8f4a617"
+down_revision: Union[str, None] = "e3b9c71f5a08"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_games_title_id", "games", ["title", "id"]),
+    ("ix_games_price_id", "games", ["price", "id"]),
+    ("ix_games_release_date_id", "games", ["release_date", "id"]),
+    ("ix_users_created_at_id", "users", ["created_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                schema="game_store",
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                schema="game_store",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
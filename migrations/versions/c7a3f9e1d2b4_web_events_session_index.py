@@ -0,0 +1,63 @@
+"""web events session index
+
+Revision ID: c7a3f9e1d2b4
+Revises: b5d2e8f4a617
+Create Date: 2026-10-18 15:42:10.527116
+
+CREATE INDEX CONCURRENTLY is not supported on a partitioned table. The
+parent index is created ON ONLY the parent, invalid until every partition
+has a matching index, each built concurrently and attached to it. Partitions
+created later get the index from the parent.
+
+"""
+
+from collections.abc import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c7a3f9e1d2b4"
+down_revision: Union[str, None] = "b5d2e8f4a617"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCHEMA = "game_store"
+INDEX = "ix_web_events_session_id_timestamp"
+COLUMNS = '(session_id, "timestamp")'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX} ON ONLY {SCHEMA}.web_events {COLUMNS}",
+    )
+    partitions = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE pg_inherits.inhparent = CAST(:parent AS regclass) "
+                "ORDER BY child.relname",
+            ),
+            {"parent": f"{SCHEMA}.web_events"},
+        )
+        .scalars()
+        .all()
+    )
+    with op.get_context().autocommit_block():
+        for partition in partitions:
+            name = f"{partition}_session_id_timestamp_idx"
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f'ON {SCHEMA}."{partition}" {COLUMNS}',
+            )
+            op.execute(f"ALTER INDEX {SCHEMA}.{INDEX} ATTACH PARTITION {SCHEMA}.{name}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Drops the attached partition indexes too
+    op.drop_index(INDEX, table_name="web_events", schema=SCHEMA, if_exists=True)
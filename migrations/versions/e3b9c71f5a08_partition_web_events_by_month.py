@@ -0,0 +1,199 @@
+"""partition web events by month
+
+Revision ID: e3b9c71f5a08
+Revises: a4f08d6c2e51
+Create Date: 2026-10-18 14:06:52.771904
+
+The existing table becomes the `web_events_legacy` partition, covering every
+timestamp before the first monthly partition, so no rows are copied. It is
+expired by the partition maintenance job like any other partition.
+
+"""
+
+from collections.abc import Sequence
+from datetime import date
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e3b9c71f5a08"
+down_revision: Union[str, None] = "a4f08d6c2e51"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCHEMA = "game_store"
+MONTHS_AHEAD = 3
+INDEXES = {
+    "ix_game_store_web_events_id": (["id"], {}),
+    "ix_web_events_user_id_timestamp": (["user_id", "timestamp"], {}),
+    "ix_web_events_user_id_event_type_game_id": (
+        ["user_id", "event_type", "game_id"],
+        {"postgresql_include": ["timestamp", "time_spent"]},
+    ),
+    "ix_web_events_user_id_platform": (
+        ["user_id", "platform"],
+        {"postgresql_include": ["time_spent"]},
+    ),
+}
+
+
+def add_months(day: date, months: int) -> date:
+    year, month = divmod(day.month - 1 + months, 12)
+    return day.replace(year=day.year + year, month=month + 1)
+
+
+def web_events_columns() -> list[sa.Column]:
+    return [
+        sa.Column(
+            "id",
+            sa.Integer(),
+            server_default=sa.text(f"nextval('{SCHEMA}.web_events_id_seq')"),
+            nullable=False,
+        ),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("game_id", sa.Integer(), nullable=True),
+        sa.Column("event_type", sa.String(), nullable=False),
+        sa.Column("session_id", sa.String(), nullable=False),
+        sa.Column("time_spent", sa.Integer(), nullable=True),
+        sa.Column("referrer_page", sa.String(), nullable=True),
+        sa.Column("platform", sa.String(), nullable=True),
+        sa.Column("search_query", sa.String(), nullable=True),
+        sa.Column("filters_applied", sa.String(), nullable=True),
+        sa.Column(
+            "timestamp",
+            sa.DateTime(),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["game_id"],
+            [f"{SCHEMA}.games.id"],
+            name="web_events_game_id_fkey",
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            [f"{SCHEMA}.users.id"],
+            name="web_events_user_id_fkey",
+        ),
+    ]
+
+
+def own_sequence() -> None:
+    op.execute(
+        f"ALTER SEQUENCE {SCHEMA}.web_events_id_seq OWNED BY {SCHEMA}.web_events.id",
+    )
+
+
+def create_indexes() -> None:
+    for name, (columns, kwargs) in INDEXES.items():
+        op.create_index(name, "web_events", columns, schema=SCHEMA, **kwargs)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    boundary = add_months(date.today().replace(day=1), 1)
+
+    # Prepare the current table to become a partition without blocking writes:
+    # a unique index matching the new primary key and a CHECK that proves its
+    # range, so ATTACH PARTITION does not have to scan it
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS web_events_legacy_pkey "
+            f'ON {SCHEMA}.web_events (id, "timestamp")',
+        )
+        op.execute(
+            f"ALTER TABLE {SCHEMA}.web_events "
+            "DROP CONSTRAINT IF EXISTS web_events_legacy_range",
+        )
+        op.execute(
+            f"ALTER TABLE {SCHEMA}.web_events ADD CONSTRAINT web_events_legacy_range "
+            f"CHECK (\"timestamp\" < '{boundary}') NOT VALID",
+        )
+
+    # Events stored with a timestamp past the boundary go to the new partitions
+    op.execute(
+        "CREATE TEMPORARY TABLE web_events_ahead ON COMMIT DROP AS "
+        f"SELECT * FROM {SCHEMA}.web_events WHERE \"timestamp\" >= '{boundary}'",
+    )
+    op.execute(f"DELETE FROM {SCHEMA}.web_events WHERE \"timestamp\" >= '{boundary}'")
+    op.execute(
+        f"ALTER TABLE {SCHEMA}.web_events VALIDATE CONSTRAINT web_events_legacy_range",
+    )
+
+    op.rename_table("web_events", "web_events_legacy", schema=SCHEMA)
+    op.execute(
+        f"ALTER TABLE {SCHEMA}.web_events_legacy DROP CONSTRAINT web_events_pkey",
+    )
+    op.execute(
+        f"ALTER TABLE {SCHEMA}.web_events_legacy ADD CONSTRAINT web_events_legacy_pkey "
+        "PRIMARY KEY USING INDEX web_events_legacy_pkey",
+    )
+    for name in INDEXES:
+        op.execute(
+            f"ALTER INDEX {SCHEMA}.{name} "
+            f"RENAME TO {name.replace('web_events', 'web_events_legacy', 1)}",
+        )
+    for column in ("user_id", "game_id"):
+        op.execute(
+            f"ALTER TABLE {SCHEMA}.web_events_legacy RENAME CONSTRAINT "
+            f"web_events_{column}_fkey TO web_events_legacy_{column}_fkey",
+        )
+
+    op.create_table(
+        "web_events",
+        *web_events_columns(),
+        sa.PrimaryKeyConstraint("id", "timestamp"),
+        schema=SCHEMA,
+        postgresql_partition_by='RANGE ("timestamp")',
+    )
+    own_sequence()
+    create_indexes()
+
+    # Matching indexes and foreign keys of the legacy table are reused
+    op.execute(
+        f"ALTER TABLE {SCHEMA}.web_events ATTACH PARTITION {SCHEMA}.web_events_legacy "
+        f"FOR VALUES FROM (MINVALUE) TO ('{boundary}')",
+    )
+    op.execute(
+        f"ALTER TABLE {SCHEMA}.web_events_legacy "
+        "DROP CONSTRAINT web_events_legacy_range",
+    )
+
+    for offset in range(MONTHS_AHEAD):
+        lower = add_months(boundary, offset)
+        upper = add_months(lower, 1)
+        op.execute(
+            f"CREATE TABLE {SCHEMA}.web_events_p{lower:%Y_%m} "
+            f"PARTITION OF {SCHEMA}.web_events "
+            f"FOR VALUES FROM ('{lower}') TO ('{upper}')",
+        )
+    # Catches events no monthly partition covers yet
+    op.execute(
+        f"CREATE TABLE {SCHEMA}.web_events_default "
+        f"PARTITION OF {SCHEMA}.web_events DEFAULT",
+    )
+    op.execute(f"INSERT INTO {SCHEMA}.web_events SELECT * FROM web_events_ahead")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Rows of partitions already detached by the retention job are not restored
+    op.rename_table("web_events", "web_events_partitioned", schema=SCHEMA)
+    op.execute(
+        f"ALTER INDEX {SCHEMA}.web_events_pkey RENAME TO web_events_partitioned_pkey",
+    )
+    op.create_table(
+        "web_events",
+        *web_events_columns(),
+        sa.PrimaryKeyConstraint("id"),
+        schema=SCHEMA,
+    )
+    op.execute(
+        f"INSERT INTO {SCHEMA}.web_events "
+        f"SELECT * FROM {SCHEMA}.web_events_partitioned",
+    )
+    own_sequence()
+    op.drop_table("web_events_partitioned", schema=SCHEMA)
+    create_indexes()
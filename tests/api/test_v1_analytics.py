@@ -0,0 +1,93 @@
+from collections.abc import Generator
+from datetime import datetime, timedelta
+from typing import Any
+from unittest.mock import AsyncMock
+
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_analytics_engine
+from app.services.analytics import AnalyticsEngine
+from app.services.exceptions import InvalidReportRange, NoArchive
+
+REPORT = {
+    "watermark": "42@2026-02-01 00:00:00",
+    "since": "2026-01-01T00:00:00",
+    "until": "2026-02-01T00:00:00",
+    "data": [{"week": "2026-01-05", "genre_id": 1, "genre_name": "RPG", "views": 2}],
+}
+
+
+@pytest.fixture
+def mock_analytics(test_app: FastAPI) -> Generator[AsyncMock, Any, Any]:
+    analytics = AsyncMock(spec=AnalyticsEngine)
+    for report in ("top_genres", "platform_share", "conversion_funnel"):
+        getattr(analytics, report).return_value = orjson.dumps(REPORT).decode()
+    test_app.dependency_overrides[get_analytics_engine] = lambda: analytics
+    yield analytics
+
+
+class TestReports:
+    def test_report_json_is_returned_as_is(self, client: TestClient, mock_analytics):
+        response = client.get(
+            "/api/v1/analytics/top-genres",
+            params={"since": "2026-01-01", "until": "2026-02-01", "limit": 3},
+        )
+
+        assert response.status_code == 200
+        assert response.json() == REPORT
+        mock_analytics.top_genres.assert_awaited_once_with(
+            datetime(2026, 1, 1),
+            datetime(2026, 2, 1),
+            3,
+        )
+
+    def test_default_range_ends_at_midnight(self, client: TestClient, mock_analytics):
+        client.get("/api/v1/analytics/funnel")
+
+        since, until, game_id = mock_analytics.conversion_funnel.await_args.args
+        assert until.time() == datetime.min.time()
+        assert timedelta(0) < until - datetime.now() <= timedelta(days=1)
+        assert until - since == timedelta(days=28)
+        assert game_id is None
+
+    def test_empty_range_is_a_bad_request(self, client: TestClient, mock_analytics):
+        mock_analytics.platform_share.side_effect = InvalidReportRange("empty")
+
+        response = client.get(
+            "/api/v1/analytics/platform-share",
+            params={"since": "2026-02-01", "until": "2026-01-01"},
+        )
+
+        assert response.status_code == 400
+
+    def test_missing_archive_is_not_found(self, client: TestClient, mock_analytics):
+        mock_analytics.top_genres.side_effect = NoArchive("No event archive")
+
+        response = client.get("/api/v1/analytics/top-genres")
+
+        assert response.status_code == 404
+
+    def test_unknown_period_is_rejected(self, client: TestClient, mock_analytics):
+        response = client.get(
+            "/api/v1/analytics/platform-share",
+            params={"period": "year"},
+        )
+
+        assert response.status_code == 422
+        mock_analytics.platform_share.assert_not_awaited()
+
+    def test_time_zone_aware_bounds_are_rejected(
+        self,
+        client: TestClient,
+        mock_analytics,
+    ):
+        response = client.get(
+            "/api/v1/analytics/funnel",
+            params={"since": "2026-01-01T00:00:00+02:00"},
+        )
+
+        assert response.status_code == 422
+        mock_analytics.conversion_funnel.assert_not_awaited()
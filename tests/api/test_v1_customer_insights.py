@@ -0,0 +1,114 @@
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from fastapi.testclient import TestClient
+
+from app.services.insights_cache import insights_cache_key
+
+
+def insights_row(**overrides) -> SimpleNamespace:
+    row = {
+        "view_time_total": 128,
+        "view_time_count": 3,
+        "recent_event_count": 3,
+        "platform_usage": [
+            {
+                "platform": "PC",
+                "usage_count": 5,
+                "time_spent_total": 152,
+                "time_spent_count": 5,
+            },
+            {
+                "platform": "MOBILE",
+                "usage_count": 8,
+                "time_spent_total": 0,
+                "time_spent_count": 0,
+            },
+        ],
+        "filters": ["price_under_20", "genre_rpg", "price_under_20"],
+        "genres": [{"genre_id": 1, "genre_name": "RPG", "view_count": 4}],
+        "recent_interests": [
+            {
+                "game_id": 7,
+                "view_count": 2,
+                "last_viewed": datetime(2024, 1, 1, 12).isoformat(),
+                "genres": ["RPG"],
+            },
+        ],
+    }
+    row.update(overrides)
+    return SimpleNamespace(**row)
+
+
+class TestCustomerInsights:
+    def test_insights_are_computed_in_one_query(
+        self,
+        client: TestClient,
+        mock_postgres_session,
+    ):
+        result = MagicMock()
+        result.one.return_value = insights_row()
+        mock_postgres_session.execute.return_value = result
+
+        response = client.get("/api/v1/customer/insights", params={"user_id": 123})
+
+        assert response.status_code == 200
+        mock_postgres_session.execute.assert_called_once()
+        data = response.json()
+        assert data["user_id"] == 123
+        assert data["engagement_score"] == 30
+        assert data["preferences"] == {
+            "preferred_platform": "MOBILE",
+            "avg_viewing_time": 42,
+            "common_filters": ["price_under_20", "genre_rpg"],
+            "price_sensitive": True,
+            "preferred_genres": [
+                {"genre_id": 1, "genre_name": "RPG", "view_count": 4},
+            ],
+        }
+        assert data["platform_usage"] == [
+            {"platform": "PC", "usage_count": 5, "avg_time_spent": 30},
+            {"platform": "MOBILE", "usage_count": 8, "avg_time_spent": 0},
+        ]
+        assert data["recent_interests"][0]["game_id"] == 7
+
+    def test_user_without_events_gets_empty_insights(
+        self,
+        client: TestClient,
+        mock_postgres_session,
+    ):
+        result = MagicMock()
+        result.one.return_value = insights_row(
+            view_time_total=None,
+            view_time_count=None,
+            recent_event_count=0,
+            platform_usage=[],
+            filters=[],
+            genres=[],
+            recent_interests=[],
+        )
+        mock_postgres_session.execute.return_value = result
+
+        response = client.get("/api/v1/customer/insights", params={"user_id": 123})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["engagement_score"] == 0
+        assert data["preferences"]["preferred_platform"] == ""
+        assert data["platform_usage"] == []
+
+    def test_cached_insights_are_served_without_querying(
+        self,
+        client: TestClient,
+        mock_postgres_session,
+        mock_redis_client,
+    ):
+        cached = {insights_cache_key(123, 0): b'{"user_id":123}'}
+        mock_redis_client.get.side_effect = cached.get
+
+        response = client.get("/api/v1/customer/insights", params={"user_id": 123})
+
+        assert response.status_code == 200
+        assert response.json() == {"user_id": 123}
+        mock_postgres_session.execute.assert_not_called()
@@ -0,0 +1,68 @@
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import orjson
+from fastapi.testclient import TestClient
+
+ROW = (1, 123, None, "VIEW", "s-1", 30, "/home", None, None, None, datetime(2026, 1, 2))
+
+
+def event_batches(mock_postgres_session, batches: list[list[tuple]]) -> None:
+    async def partitions():
+        for batch in batches:
+            yield batch
+
+    result = MagicMock()
+    result.partitions = partitions
+    connection = MagicMock()
+    connection.stream = AsyncMock(return_value=result)
+    mock_postgres_session.connection.return_value = connection
+
+
+class TestExportEvents:
+    def test_streams_ndjson(self, client: TestClient, mock_postgres_session):
+        event_batches(mock_postgres_session, [[ROW, ROW], [ROW]])
+
+        response = client.get("/api/v1/events/export", params={"user_id": 123})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = response.content.splitlines()
+        assert len(lines) == 3
+        assert orjson.loads(lines[0])["session_id"] == "s-1"
+
+    def test_streams_csv_with_header(self, client: TestClient, mock_postgres_session):
+        event_batches(mock_postgres_session, [[ROW]])
+
+        response = client.get(
+            "/api/v1/events/export",
+            params={"session_id": "s-1", "format": "csv"},
+        )
+
+        assert response.headers["content-type"].startswith("text/csv")
+        assert 'filename="web_events.csv"' in response.headers["content-disposition"]
+        assert response.text.splitlines()[0].startswith("id,user_id,game_id")
+        assert len(response.text.splitlines()) == 2
+
+    def test_unfiltered_export_is_a_bad_request(
+        self,
+        client: TestClient,
+        mock_session_factory,
+    ):
+        response = client.get("/api/v1/events/export")
+
+        assert response.status_code == 400
+        mock_session_factory.assert_not_called()
+
+    def test_time_zone_aware_bounds_are_rejected(
+        self,
+        client: TestClient,
+        mock_session_factory,
+    ):
+        response = client.get(
+            "/api/v1/events/export",
+            params={"since": "2026-01-01T00:00:00Z"},
+        )
+
+        assert response.status_code == 422
+        mock_session_factory.assert_not_called()
@@ -0,0 +1,53 @@
+from unittest.mock import MagicMock
+
+from fastapi.testclient import TestClient
+
+from app.models.game_store import Genre
+from app.services.pagination import decode_cursor
+
+
+def genre_rows(mock_postgres_session, count: int) -> None:
+    result = MagicMock()
+    result.mappings.return_value.all.return_value = [
+        {"id": genre_id, "name": f"Genre {genre_id}", "description": "-"}
+        for genre_id in range(1, count + 1)
+    ]
+    mock_postgres_session.execute.return_value = result
+
+
+class TestReadGenres:
+    def test_full_page_links_to_the_next_one(
+        self,
+        client: TestClient,
+        mock_postgres_session,
+    ):
+        # One row more than the limit: there is a next page
+        genre_rows(mock_postgres_session, 3)
+
+        response = client.get("/api/v1/genres", params={"limit": 2, "sort": "name"})
+
+        body = response.json()
+        assert response.status_code == 200
+        assert [genre["id"] for genre in body["data"]] == [1, 2]
+        assert decode_cursor(
+            body["next_cursor"],
+            "name",
+            [Genre.name, Genre.id],
+        ) == ["Genre 2", 2]
+
+    def test_last_page_has_no_cursor(self, client: TestClient, mock_postgres_session):
+        genre_rows(mock_postgres_session, 2)
+
+        response = client.get("/api/v1/genres", params={"limit": 2})
+
+        assert response.json()["next_cursor"] is None
+
+    def test_invalid_cursor_is_a_bad_request(
+        self,
+        client: TestClient,
+        mock_postgres_session,
+    ):
+        response = client.get("/api/v1/genres", params={"cursor": "garbage"})
+
+        assert response.status_code == 400
+        mock_postgres_session.execute.assert_not_called()
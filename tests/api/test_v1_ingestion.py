@@ -1,19 +1,20 @@
+import json
 from datetime import datetime
 
 import pytest
-from fastapi import BackgroundTasks
+from fastapi import HTTPException
 from pydantic import ValidationError
 
 from app.api.v1.endpoints.ingestion import ingest_data
+from app.core.config import settings
 from app.schemas.ingestion import IngestionSchema
+from app.services.exceptions import QueueFull
 
 
 class TestIngestData:
     @pytest.mark.asyncio
     async def test_valid_ingestion_data_processed(self, mocker):
-        mock_client = mocker.AsyncMock()
-        pg_mock_client = mocker.AsyncMock()
-        mocker.patch("fastapi.background.BackgroundTasks.add_task")
+        queue_mock = mocker.AsyncMock()
 
         test_data = IngestionSchema(
             user_id=123,
@@ -24,30 +25,41 @@ class TestIngestData:
             referrer_page="/test-page",
         )
 
-        response = await ingest_data(
-            data=test_data,
-            background_tasks=BackgroundTasks,
-            redis_client=mock_client,
-            postgres_session=pg_mock_client,
-        )
+        response = await ingest_data(data=test_data, ingestion_queue=queue_mock)
 
         assert response.status == "accepted"
+        queue_mock.publish.assert_awaited_once_with([test_data])
 
     @pytest.mark.asyncio
     async def test_missing_required_fields(self, mocker):
-        mock_client = mocker.AsyncMock()
-        pg_mock_client = mocker.AsyncMock()
-        background_tasks = BackgroundTasks()
+        queue_mock = mocker.AsyncMock()
 
         invalid_data = {"game_id": 456, "genre": "test", "price": 9.99}
 
         with pytest.raises(ValidationError):
             await ingest_data(
                 data=IngestionSchema(**invalid_data),
-                background_tasks=background_tasks,
-                redis_client=mock_client,
-                postgres_session=pg_mock_client,
+                ingestion_queue=queue_mock,
             )
+        queue_mock.publish.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_full_queue_returns_503(self, mocker):
+        queue_mock = mocker.AsyncMock()
+        queue_mock.publish.side_effect = QueueFull("Ingestion stream is full")
+
+        test_data = IngestionSchema(
+            user_id=123,
+            event_type="VIEW",
+            session_id="test-session",
+            timestamp=datetime.now(),
+            referrer_page="/test-page",
+        )
+
+        with pytest.raises(HTTPException) as exc_info:
+            await ingest_data(data=test_data, ingestion_queue=queue_mock)
+
+        assert exc_info.value.status_code == 503
 
 
 class TestIngestDataEndpoint:
@@ -71,3 +83,114 @@ class TestIngestDataEndpoint:
 
         response = client.post("/api/v1/ingest", json=invalid_data)
         assert response.status_code == 422
+
+
+class TestIngestBatchEndpoint:
+    @staticmethod
+    def make_event(user_id: int = 123) -> dict:
+        return {
+            "user_id": user_id,
+            "timestamp": datetime.now().isoformat(),
+            "referrer_page": "/test-page",
+            "game_id": 456,
+            "event_type": "VIEW",
+            "session_id": "test-session",
+        }
+
+    def test_ingest_batch_json_array(self, client, mock_ingestion_queue):
+        events = [self.make_event(1), {"game_id": 456}, self.make_event(2)]
+
+        response = client.post("/api/v1/ingest/batch", json=events)
+
+        assert response.status_code == 202
+        body = response.json()
+        assert body["accepted"] == 2
+        assert body["rejected"] == 1
+        assert body["errors"][0]["index"] == 1
+        mock_ingestion_queue.publish.assert_awaited_once()
+        queued = mock_ingestion_queue.publish.call_args.args[0]
+        assert [event.user_id for event in queued] == [1, 2]
+
+    def test_ingest_batch_ndjson_stream(self, client, mock_ingestion_queue):
+        lines = [
+            json.dumps(self.make_event(1)),
+            "{not json",
+            "",
+            json.dumps(self.make_event(2)),
+        ]
+
+        response = client.post(
+            "/api/v1/ingest/batch",
+            content="\n".join(lines).encode("utf-8"),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+
+        assert response.status_code == 202
+        body = response.json()
+        assert body["accepted"] == 2
+        assert body["rejected"] == 1
+        assert body["errors"][0]["index"] == 1
+        assert body["errors"][0]["errors"][0]["type"] == "json_invalid"
+
+    def test_ingest_batch_rejects_non_array(self, client):
+        response = client.post("/api/v1/ingest/batch", json=self.make_event())
+
+        assert response.status_code == 422
+
+    def test_ingest_batch_rejects_malformed_json(self, client):
+        response = client.post(
+            "/api/v1/ingest/batch",
+            content=b"[{",
+            headers={"Content-Type": "application/json"},
+        )
+
+        assert response.status_code == 400
+
+    def test_ingest_batch_too_many_events(self, client, mocker, mock_ingestion_queue):
+        mocker.patch.object(settings, "INGEST_MAX_BATCH_EVENTS", 2)
+        events = [self.make_event(user_id) for user_id in (1, 2, 3)]
+
+        response = client.post("/api/v1/ingest/batch", json=events)
+
+        assert response.status_code == 413
+        mock_ingestion_queue.publish.assert_not_called()
+
+    def test_ingest_batch_body_too_large(self, client, mocker, mock_ingestion_queue):
+        mocker.patch.object(settings, "INGEST_MAX_BODY_BYTES", 100)
+        events = [self.make_event(user_id) for user_id in (1, 2)]
+
+        response = client.post("/api/v1/ingest/batch", json=events)
+
+        assert response.status_code == 413
+        mock_ingestion_queue.publish.assert_not_called()
+
+    def test_ingest_batch_chunked_body_too_large(self, client, mocker):
+        mocker.patch.object(settings, "INGEST_MAX_BODY_BYTES", 100)
+        body = json.dumps([self.make_event(user_id) for user_id in (1, 2)])
+
+        # No Content-Length, the limit is enforced while reading
+        response = client.post(
+            "/api/v1/ingest/batch",
+            content=iter([body[:80].encode(), body[80:].encode()]),
+            headers={"Content-Type": "application/json"},
+        )
+
+        assert response.status_code == 413
+
+    def test_ingest_batch_ndjson_line_too_large(
+        self,
+        client,
+        mocker,
+        mock_ingestion_queue,
+    ):
+        mocker.patch.object(settings, "INGEST_MAX_LINE_BYTES", 200)
+        line = json.dumps(self.make_event()).encode("utf-8")
+
+        response = client.post(
+            "/api/v1/ingest/batch",
+            content=iter([line + b"\n", b'{"referrer_page": "' + b"x" * 300]),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+
+        assert response.status_code == 413
+        mock_ingestion_queue.publish.assert_not_called()
@@ -0,0 +1,81 @@
+from collections.abc import Generator
+from typing import Any
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_recommender
+from app.services.recommendations import (
+    BASKET_SOURCES,
+    CoViewModel,
+    CoViewRecommender,
+)
+
+
+@pytest.fixture
+def recommender(test_app: FastAPI) -> Generator[CoViewRecommender, Any, Any]:
+    model = CoViewModel()
+    # Sessions viewing 123 and 7, 123 and 8, and 7 and 9
+    model.update(
+        BASKET_SOURCES[0],
+        (
+            np.array([0, 0, 1, 1, 2, 2]),
+            np.array([123, 7, 123, 8, 7, 9]),
+            np.arange(1, 7),
+        ),
+        upper=6,
+    )
+    recommender = CoViewRecommender(MagicMock())
+    recommender.index = model.neighbors(5)
+    test_app.dependency_overrides[get_recommender] = lambda: recommender
+    yield recommender
+
+
+class TestSimilarGames:
+    def test_similar_games(self, client: TestClient, recommender):
+        response = client.get("/api/v1/games/7/similar")
+
+        assert response.status_code == 200
+        assert [game["game_id"] for game in response.json()["data"]["games"]] == [
+            9,
+            123,
+        ]
+
+    def test_unknown_game_has_no_similar_games(self, client: TestClient, recommender):
+        response = client.get("/api/v1/games/404/similar")
+
+        assert response.status_code == 200
+        assert response.json()["data"]["games"] == []
+
+    def test_not_ready(self, client: TestClient, test_app: FastAPI):
+        test_app.dependency_overrides[get_recommender] = lambda: CoViewRecommender(
+            MagicMock(),
+        )
+
+        response = client.get("/api/v1/games/7/similar")
+
+        assert response.status_code == 503
+
+
+class TestUserRecommendations:
+    def test_recommends_from_the_last_viewed_games(
+        self,
+        client: TestClient,
+        recommender,
+    ):
+        # The mocked last viewed games of user 123 are [123]
+        response = client.get("/api/v1/users/123/recommendations")
+
+        assert response.status_code == 200
+        assert response.json()["data"]["games"] == [
+            {"game_id": 8, "score": 0.7071},
+            {"game_id": 7, "score": 0.5},
+        ]
+
+    def test_user_without_history(self, client: TestClient, recommender):
+        response = client.get("/api/v1/users/456/recommendations")
+
+        assert response.status_code == 404
@@ -1,13 +1,47 @@
 import json
-from datetime import datetime, timedelta
+from datetime import UTC, datetime, timedelta
 
+import fakeredis
 import pytest
 from fastapi import HTTPException
 
 from app.api.v1.endpoints.session_insights import get_session_analytics
 from app.schemas.ingestion import IngestionSchema
 from app.schemas.session_insights import SessionInsightsResponse
-from app.services.ingestion_service import get_session_insights, update_session_insights
+from app.services.ingestion_service import (
+    LAST_VIEWED_TTL_SECONDS,
+    MAX_GAMES_VIEWED,
+    MAX_LAST_VIEWED,
+    UPDATE_SESSION_INSIGHTS_SCRIPT,
+    get_session_insights,
+    last_viewed_key,
+    session_insights_keys,
+    update_session_insights,
+    update_session_insights_batch,
+)
+
+
+def mock_session_pipeline(mocker, results: list):
+    mock_pipeline = mocker.Mock()
+    mock_pipeline.execute = mocker.AsyncMock(return_value=results)
+    return mock_pipeline
+
+
+def view(game_id: int | None, session_id: str = "lua-session", **fields):
+    return IngestionSchema(
+        user_id=fields.pop("user_id", 123),
+        session_id=session_id,
+        event_type=fields.pop("event_type", "VIEW"),
+        game_id=game_id,
+        timestamp=datetime.now(),
+        referrer_page=fields.pop("referrer_page", "/home"),
+        **fields,
+    )
+
+
+@pytest.fixture
+def fake_redis() -> fakeredis.FakeAsyncRedis:
+    return fakeredis.FakeAsyncRedis()
 
 
 class TestSessionInsights:
@@ -24,10 +58,7 @@ class TestSessionInsights:
             "start_time": (datetime.now() - timedelta(minutes=30)).isoformat(),
             "last_activity": datetime.now().isoformat(),
             "page_views": "15",
-            "games_viewed": json.dumps([101, 102, 103]),
             "total_time_spent": "450",
-            "event_counts": json.dumps({"VIEW": 10, "CLICK": 5}),
-            "referrer_pages": json.dumps(["/home", "/games"]),
         }
 
         # Convert to bytes as Redis would return
@@ -35,15 +66,29 @@ class TestSessionInsights:
             k.encode("utf-8"): v.encode("utf-8") for k, v in session_data.items()
         }
 
-        mock_redis.exists.return_value = True
-        mock_redis.hgetall.return_value = session_data_bytes
+        mock_pipeline = mock_session_pipeline(
+            mocker,
+            [
+                session_data_bytes,
+                {b"VIEW": b"10", b"CLICK": b"5"},
+                [b"101", b"102", b"103"],
+                {b"/home", b"/games"},
+            ],
+        )
+        mock_redis.pipeline = mocker.Mock(return_value=mock_pipeline)
 
         # Act
         result = await get_session_insights(mock_redis, session_id)
 
         # Assert
-        mock_redis.exists.assert_called_once_with(f"session:insights:{session_id}")
-        mock_redis.hgetall.assert_called_once_with(f"session:insights:{session_id}")
+        session_key = f"session:insights:{session_id}"
+        mock_redis.pipeline.assert_called_once_with(transaction=False)
+        mock_pipeline.hgetall.assert_any_call(session_key)
+        mock_pipeline.hgetall.assert_any_call(f"{session_key}:events")
+        mock_pipeline.zrange.assert_called_once_with(f"{session_key}:games", 0, -1)
+        mock_pipeline.smembers.assert_called_once_with(f"{session_key}:referrers")
+        mock_pipeline.execute.assert_awaited_once()
+        mock_redis.exists.assert_not_called()
 
         assert result is not None
         assert result["user_id"] == "123"
@@ -52,9 +97,46 @@ class TestSessionInsights:
         assert result["games_viewed"] == [101, 102, 103]
         assert result["total_time_spent"] == 450
         assert result["event_counts"] == {"VIEW": 10, "CLICK": 5}
-        assert result["referrer_pages"] == ["/home", "/games"]
+        assert result["referrer_pages"] == ["/games", "/home"]
         assert "duration_seconds" in result
 
+    @pytest.mark.asyncio
+    async def test_get_session_insights_reads_legacy_json_fields(self, mocker):
+        # Arrange
+        session_id = "legacy-session"
+        mock_redis = mocker.AsyncMock()
+
+        # Session written before the native layout, not updated since
+        session_data = {
+            "user_id": "123",
+            "session_id": session_id,
+            "start_time": (datetime.now() - timedelta(minutes=30)).isoformat(),
+            "last_activity": datetime.now().isoformat(),
+            "page_views": "15",
+            "games_viewed": json.dumps([101, 102, 103]),
+            "total_time_spent": "450",
+            "event_counts": json.dumps({"VIEW": 10, "CLICK": 5}),
+            "referrer_pages": json.dumps(["/home", "/games"]),
+        }
+        session_data_bytes = {
+            k.encode("utf-8"): v.encode("utf-8") for k, v in session_data.items()
+        }
+        mock_redis.pipeline = mocker.Mock(
+            return_value=mock_session_pipeline(
+                mocker,
+                [session_data_bytes, {}, [], set()],
+            ),
+        )
+
+        # Act
+        result = await get_session_insights(mock_redis, session_id)
+
+        # Assert
+        assert result is not None
+        assert result["games_viewed"] == [101, 102, 103]
+        assert result["event_counts"] == {"VIEW": 10, "CLICK": 5}
+        assert result["referrer_pages"] == ["/home", "/games"]
+
     @pytest.mark.asyncio
     async def test_get_session_insights_returns_none_when_session_not_exists(
         self,
@@ -63,45 +145,24 @@ class TestSessionInsights:
         # Arrange
         session_id = "nonexistent-session"
         mock_redis = mocker.AsyncMock()
-        mock_redis.exists.return_value = False
+        mock_redis.pipeline = mocker.Mock(
+            return_value=mock_session_pipeline(mocker, [{}, {}, [], set()]),
+        )
 
         # Act
         result = await get_session_insights(mock_redis, session_id)
 
         # Assert
-        mock_redis.exists.assert_called_once_with(f"session:insights:{session_id}")
-        mock_redis.hgetall.assert_not_called()
+        mock_redis.pipeline.assert_called_once_with(transaction=False)
         assert result is None
 
     @pytest.mark.asyncio
-    async def test_update_session_insights_creates_new_session(self, mocker):
+    async def test_update_session_insights_runs_single_script_call(self, mocker):
         # Arrange
         session_id = "existing-session-123"
         mock_redis = mocker.AsyncMock()
-
-        # Mock session existence check
-        mock_redis.exists.return_value = True
-
-        # Mock the hget responses for different keys
-        async def mock_hget(_, field):
-            if field == "event_counts":
-                return json.dumps({"VIEW": 5, "CLICK": 2}).encode("utf-8")
-            elif field == "games_viewed":
-                return json.dumps([102, 103, 104]).encode("utf-8")
-            elif field == "referrer_pages":
-                return json.dumps(["/games", "/home"]).encode("utf-8")
-            return None
-
-        mock_redis.hget = mocker.AsyncMock(side_effect=mock_hget)
-
-        # Create a proper pipeline mock structure
-        mock_pipeline = mocker.AsyncMock()
-        mock_pipeline.hset = mocker.AsyncMock()
-        mock_pipeline.expire = mocker.AsyncMock()
-        mock_pipeline.execute = mocker.AsyncMock()
-
-        # Use regular Mock for pipeline() method (not async)
-        mock_redis.pipeline = mocker.Mock(return_value=mock_pipeline)
+        mock_script = mocker.AsyncMock(return_value=1)
+        mock_redis.register_script = mocker.Mock(return_value=mock_script)
 
         data = IngestionSchema(
             user_id=123,
@@ -117,105 +178,182 @@ class TestSessionInsights:
         await update_session_insights(mock_redis, data)
 
         # Assert
-        mock_redis.exists.assert_called_once_with(f"session:insights:{session_id}")
-        mock_redis.pipeline.assert_called_once()
-        mock_pipeline.hset.assert_called()
-        mock_pipeline.expire.assert_called_once()
-        mock_pipeline.execute.assert_called_once()
+        mock_redis.register_script.assert_called_once_with(
+            UPDATE_SESSION_INSIGHTS_SCRIPT,
+        )
+        mock_script.assert_awaited_once()
+        _, kwargs = mock_script.call_args
+        session_key = f"session:insights:{session_id}"
+        assert kwargs["keys"] == [
+            session_key,
+            f"{session_key}:events",
+            f"{session_key}:games",
+            f"{session_key}:referrers",
+            "last_viewed:123",
+        ]
+        args = kwargs["args"]
+        assert args[0] == 123
+        assert args[1] == session_id
+        assert args[3:] == [
+            "VIEW",
+            101,
+            30,
+            "/home",
+            10,
+            60 * 60 * 24,
+            10,
+            60 * 60 * 24 * 30,
+        ]
+
+        # No extra round trips outside the script
+        mock_redis.exists.assert_not_called()
+        mock_redis.hget.assert_not_called()
+        mock_redis.pipeline.assert_not_called()
 
     @pytest.mark.asyncio
-    async def test_update_session_insights_updates_existing_session(self, mocker):
+    async def test_update_session_insights_passes_empty_optional_fields(
+        self,
+        mocker,
+    ):
         # Arrange
-        session_id = "existing-session-123"
         mock_redis = mocker.AsyncMock()
-        mock_redis.exists.return_value = True
-
-        # Mock existing session data
-        mock_redis.hget.side_effect = [
-            # event_counts
-            json.dumps({"VIEW": 5}).encode("utf-8"),
-            # games_viewed
-            json.dumps([102, 103]).encode("utf-8"),
-            # referrer_pages
-            json.dumps(["/games"]).encode("utf-8"),
-        ]
-
-        mock_pipeline = mocker.AsyncMock()
-        mock_pipeline.execute = mocker.AsyncMock()
-        mock_redis.pipeline = mocker.Mock(return_value=mock_pipeline)
+        mock_script = mocker.AsyncMock(return_value=1)
+        mock_redis.register_script = mocker.Mock(return_value=mock_script)
 
         data = IngestionSchema(
             user_id=123,
-            session_id=session_id,
-            event_type="VIEW",
-            game_id=101,
+            session_id="session-without-game",
+            event_type="CLICK",
             timestamp=datetime.now(),
-            referrer_page="/home",
-            time_spent=30,
+            referrer_page="",
         )
 
         # Act
         await update_session_insights(mock_redis, data)
 
         # Assert
-        mock_redis.exists.assert_called_once_with(f"session:insights:{session_id}")
-        mock_redis.hget.assert_called()
-        mock_pipeline.hset.assert_called()
-        mock_pipeline.hincrby.assert_called()
-        mock_pipeline.expire.assert_called_once()
-        mock_pipeline.execute.assert_called_once()
+        _, kwargs = mock_script.call_args
+        assert kwargs["args"][3:7] == ["CLICK", "", 0, ""]
 
     @pytest.mark.asyncio
-    async def test_update_session_insights_limits_games_to_ten(self, mocker):
-        # Arrange
-        session_id = "session-with-many-games"
+    async def test_script_is_registered_once_per_client(self, mocker):
         mock_redis = mocker.AsyncMock()
-        mock_redis.exists.return_value = True
-
-        # Mock existing session with 10 games already
-        existing_games = [101, 102, 103, 104, 105, 106, 107, 108, 109, 110]
-        mock_redis.hget.side_effect = [
-            # event_counts
-            json.dumps({"VIEW": 10}).encode("utf-8"),
-            # games_viewed
-            json.dumps(existing_games).encode("utf-8"),
-            # referrer_pages
-            json.dumps(["/games"]).encode("utf-8"),
-        ]
+        mock_redis.register_script = mocker.Mock(
+            return_value=mocker.AsyncMock(return_value=1),
+        )
+        mock_redis.pipeline = mocker.Mock(
+            return_value=mock_session_pipeline(mocker, []),
+        )
 
-        mock_pipeline = mocker.AsyncMock()
-        mock_pipeline.execute = mocker.AsyncMock()
-        mock_redis.pipeline = mocker.Mock(return_value=mock_pipeline)
+        await update_session_insights(mock_redis, view(101))
+        await update_session_insights(mock_redis, view(102))
+        await update_session_insights_batch(mock_redis, [view(103), view(104)])
 
-        # New game view
-        data = IngestionSchema(
-            user_id=123,
-            session_id=session_id,
-            event_type="VIEW",
-            game_id=111,  # New game
-            timestamp=datetime.now(),
-            referrer_page="/games/111",
-            time_spent=30,
+        mock_redis.register_script.assert_called_once_with(
+            UPDATE_SESSION_INSIGHTS_SCRIPT,
         )
 
-        # Act
-        await update_session_insights(mock_redis, data)
 
-        # Assert
-        mock_redis.exists.assert_called_once_with(f"session:insights:{session_id}")
+class TestSessionInsightsScript:
+    """Runs the Lua script itself, on fakeredis with a Lua interpreter"""
+
+    @pytest.mark.asyncio
+    async def test_games_viewed_keep_first_view_order_without_duplicates(
+        self,
+        fake_redis,
+    ):
+        for game_id in (101, 102, 101, 103, 102):
+            await update_session_insights(fake_redis, view(game_id))
 
-        # Check that we're storing only 10 games (the most recent ones)
-        # The first game (101) should be dropped, and 111 should be added
-        expected_games = existing_games[1:] + [111]
+        session = await get_session_insights(fake_redis, "lua-session")
 
-        # Find the call to hset with games_viewed
-        for call in mock_pipeline.hset.call_args_list:
-            args, kwargs = call
-            if len(args) >= 3 and args[1] == "games_viewed":
-                stored_games = json.loads(args[2])
-                assert len(stored_games) == 10
-                assert stored_games == expected_games
-                break
+        assert session["games_viewed"] == [101, 102, 103]
+        assert session["page_views"] == 5
+        assert session["event_counts"] == {"VIEW": 5}
+
+    @pytest.mark.asyncio
+    async def test_games_viewed_are_capped_to_the_most_recent(self, fake_redis):
+        game_ids = list(range(1, MAX_GAMES_VIEWED + 3))
+
+        await update_session_insights_batch(
+            fake_redis,
+            [view(game_id) for game_id in game_ids],
+        )
+
+        session = await get_session_insights(fake_redis, "lua-session")
+        assert session["games_viewed"] == game_ids[-MAX_GAMES_VIEWED:]
+
+    @pytest.mark.asyncio
+    async def test_referrers_time_spent_and_other_events(self, fake_redis):
+        await update_session_insights(fake_redis, view(101, time_spent=30))
+        await update_session_insights(
+            fake_redis,
+            view(101, event_type="PURCHASE", referrer_page="/cart", time_spent=5),
+        )
+        await update_session_insights(fake_redis, view(None, referrer_page=""))
+
+        session = await get_session_insights(fake_redis, "lua-session")
+
+        assert session["referrer_pages"] == ["/cart", "/home"]
+        assert session["total_time_spent"] == 35
+        assert session["page_views"] == 2
+        assert session["event_counts"] == {"VIEW": 2, "PURCHASE": 1}
+        for key in session_insights_keys("lua-session"):
+            assert 0 < await fake_redis.ttl(key) <= 60 * 60 * 24
+
+    @pytest.mark.asyncio
+    async def test_legacy_json_fields_are_migrated(self, fake_redis):
+        session_key, events_key, games_key, referrers_key = session_insights_keys(
+            "lua-session",
+        )
+        await fake_redis.hset(
+            session_key,
+            mapping={
+                "user_id": "123",
+                "session_id": "lua-session",
+                "start_time": datetime.now(UTC).isoformat(),
+                "last_activity": datetime.now(UTC).isoformat(),
+                "page_views": "2",
+                "total_time_spent": "0",
+                "event_counts": json.dumps({"VIEW": 2, "CLICK": 1}),
+                "games_viewed": json.dumps([201, 202]),
+                "referrer_pages": json.dumps(["/legacy"]),
+            },
+        )
+
+        await update_session_insights(fake_redis, view(203))
+
+        assert not await fake_redis.hexists(session_key, "event_counts")
+        assert not await fake_redis.hexists(session_key, "games_viewed")
+        assert not await fake_redis.hexists(session_key, "referrer_pages")
+        session = await get_session_insights(fake_redis, "lua-session")
+        assert session["games_viewed"] == [201, 202, 203]
+        assert session["event_counts"] == {"VIEW": 3, "CLICK": 1}
+        assert session["referrer_pages"] == ["/home", "/legacy"]
+        assert session["page_views"] == 3
+
+    @pytest.mark.asyncio
+    async def test_last_viewed_is_most_recent_first_deduplicated(self, fake_redis):
+        for game_id in (101, 102, 103, 101):
+            await update_session_insights(fake_redis, view(game_id))
+
+        key = last_viewed_key(123)
+        assert await fake_redis.lrange(key, 0, -1) == [b"101", b"103", b"102"]
+        assert 0 < await fake_redis.ttl(key) <= LAST_VIEWED_TTL_SECONDS
+
+    @pytest.mark.asyncio
+    async def test_last_viewed_is_trimmed_across_sessions(self, fake_redis):
+        game_ids = list(range(1, MAX_LAST_VIEWED + 4))
+
+        await update_session_insights_batch(
+            fake_redis,
+            [view(game_id, session_id=f"s-{game_id}") for game_id in game_ids],
+        )
+
+        last_viewed = await fake_redis.lrange(last_viewed_key(123), 0, -1)
+        assert [int(game_id) for game_id in last_viewed] == game_ids[::-1][
+            :MAX_LAST_VIEWED
+        ]
 
 
 class TestSessionInsightsEndpoint:
@@ -274,7 +412,9 @@ class TestSessionInsightsEndpoint:
         )
 
         mock_redis = mocker.AsyncMock()
-        mock_redis.exists.return_value = False
+        mock_redis.pipeline = mocker.Mock(
+            return_value=mock_session_pipeline(mocker, [{}, {}, [], set()]),
+        )
 
         # Act & Assert
         with pytest.raises(HTTPException) as exc_info:
@@ -2,6 +2,7 @@ from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
+from fastapi.testclient import TestClient
 
 from app.schemas.user import User
 from app.services.user_service import get_user_by_id
@@ -10,18 +11,21 @@ from app.services.user_service import get_user_by_id
 class TestUser:
     @pytest.mark.asyncio
     async def test_user_returns_user_when_valid_user_id(self):
-        mock_user_model = MagicMock()
-        mock_user_model.id = 1
-        mock_user_model.username = "testuser"
-        mock_user_model.email = "test@example.com"
-        mock_user_model.created_at = datetime.now()
-        mock_user_model.is_active = True
+        mock_user_model = {
+            "id": 1,
+            "username": "testuser",
+            "email": "test@example.com",
+            "created_at": datetime.now(),
+            "is_active": True,
+            "orders": [],
+            "reviews": [],
+        }
 
         expected_user = User(
             id=1,
             username="testuser",
             email="test@example.com",
-            created_at=mock_user_model.created_at,
+            created_at=mock_user_model["created_at"],
             is_active=True,
             orders=[],
             reviews=[],
@@ -29,21 +33,41 @@ class TestUser:
 
         mock_session = AsyncMock()
         mock_result = MagicMock()
-        mock_scalars = MagicMock()
+        mock_mappings = MagicMock()
 
         mock_session.execute.return_value = mock_result
-        mock_result.scalars.return_value = mock_scalars
-        mock_scalars.first.return_value = mock_user_model
+        mock_result.mappings.return_value = mock_mappings
+        mock_mappings.first.return_value = mock_user_model
 
         # Act
         result = await get_user_by_id(user_id=1, postgres_session=mock_session)
 
         # Assert
         mock_session.execute.assert_called_once()
-        mock_result.scalars.assert_called_once()
-        mock_scalars.first.assert_called_once()
+        mock_result.mappings.assert_called_once()
+        mock_mappings.first.assert_called_once()
 
         assert result.id == expected_user.id
         assert result.username == expected_user.username
         assert result.email == expected_user.email
         assert result.created_at == expected_user.created_at
+
+
+class TestLastViewed:
+    def test_last_viewed_games_are_read_from_redis(
+        self,
+        client: TestClient,
+        mock_redis_client,
+        mock_postgres_session,
+    ):
+        response = client.get("/api/v1/users/123/last-viewed", params={"limit": 5})
+
+        assert response.status_code == 200
+        assert response.json()["data"] == {"last_viewed_games": ["123"]}
+        mock_redis_client.lrange.assert_awaited_once_with("last_viewed:123", 0, 4)
+        mock_postgres_session.execute.assert_not_called()
+
+    def test_user_without_views_returns_404(self, client: TestClient):
+        response = client.get("/api/v1/users/456/last-viewed")
+
+        assert response.status_code == 404
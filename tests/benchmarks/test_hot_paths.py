@@ -0,0 +1,210 @@
+"""
+Microbenchmarks of the per-event ingestion and insights hot paths.
+
+Skipped by the regular test run, run them and compare with the stored
+baseline with
+
+    pytest tests/benchmarks --benchmark-only --benchmark-compare
+
+and record a new baseline, on the same machine, with --benchmark-save=baseline.
+"""
+
+import asyncio
+from collections.abc import Callable, Coroutine, Iterator
+from datetime import datetime, timedelta
+from typing import Any
+
+import fakeredis
+import orjson
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.api.responses import json_response
+from app.models.game_store import WebEvents
+from app.schemas.customer_insights import (
+    CustomerInsightResponse,
+    GameRecommendation,
+    GenrePreference,
+    PlatformStats,
+    UserPreferences,
+)
+from app.schemas.ingestion import IngestionSchema, ingestion_adapter
+from app.schemas.response_base import PageResponse
+from app.schemas.session_insights import SessionInsights, SessionInsightsResponse
+from app.schemas.user import User, users_adapter
+from app.services.ingestion_service import (
+    get_session_insights,
+    update_session_insights,
+    update_session_insights_batch,
+)
+from tests.factories import make_event
+
+BATCH_SIZE = 500
+PAGE_SIZE = 100
+
+Run = Callable[[Coroutine[Any, Any, Any]], Any]
+
+
+@pytest.fixture
+def run() -> Iterator[Run]:
+    """Run coroutines on one event loop kept for the whole benchmark"""
+    with asyncio.Runner() as runner:
+        yield runner.run
+
+
+@pytest.fixture
+def fake_redis() -> fakeredis.FakeAsyncRedis:
+    return fakeredis.FakeAsyncRedis()
+
+
+@pytest.fixture
+def events() -> list[IngestionSchema]:
+    return [
+        make_event(user_id=index % 50, game_id=index % 200 + 1)
+        for index in range(BATCH_SIZE)
+    ]
+
+
+def customer_insights() -> CustomerInsightResponse:
+    now = datetime.now()
+    return CustomerInsightResponse(
+        user_id=123,
+        preferences=UserPreferences(
+            preferred_platform="PC",
+            avg_viewing_time=42,
+            common_filters=["price", "genre"],
+            price_sensitive=True,
+            preferred_genres=[
+                GenrePreference(genre_id=genre_id, genre_name="RPG", view_count=9)
+                for genre_id in range(5)
+            ],
+        ),
+        recent_interests=[
+            GameRecommendation(
+                game_id=game_id,
+                view_count=3,
+                last_viewed=now - timedelta(minutes=game_id),
+                genres=["RPG", "Adventure"],
+            )
+            for game_id in range(10)
+        ],
+        platform_usage=[
+            PlatformStats(platform=platform, usage_count=12, avg_time_spent=30)
+            for platform in ("PC", "PS5", "Switch")
+        ],
+        engagement_score=72,
+    )
+
+
+def user_rows() -> list[dict[str, Any]]:
+    # What fetch_page returns for USER_ROWS
+    return [
+        {
+            "id": user_id,
+            "username": f"user-{user_id}",
+            "email": f"user-{user_id}@example.com",
+            "created_at": datetime(2024, 1, 1) + timedelta(hours=user_id),
+            "is_active": True,
+            "orders": list(range(user_id, user_id + 5)),
+            "reviews": [user_id],
+        }
+        for user_id in range(PAGE_SIZE)
+    ]
+
+
+def users_page() -> PageResponse[User]:
+    return PageResponse[User](
+        status="success",
+        message="Users retrieved",
+        data=users_adapter.validate_python(user_rows()),
+    )
+
+
+class TestIngestionValidation:
+    def test_validate_event_json(self, benchmark):
+        payload = make_event().model_dump_json().encode("utf-8")
+
+        event = benchmark(ingestion_adapter.validate_json, payload)
+
+        assert event.user_id == 123
+
+    def test_validate_ndjson_batch(self, benchmark, events):
+        lines = [event.model_dump_json().encode("utf-8") for event in events]
+
+        def validate() -> list[IngestionSchema]:
+            return [ingestion_adapter.validate_json(line) for line in lines]
+
+        assert len(benchmark(validate)) == BATCH_SIZE
+
+
+class TestSessionInsights:
+    def test_update_session_insights(self, benchmark, run, fake_redis):
+        event = make_event()
+
+        benchmark(lambda: run(update_session_insights(fake_redis, event)))
+
+    def test_update_session_insights_batch(self, benchmark, run, fake_redis, events):
+        benchmark(lambda: run(update_session_insights_batch(fake_redis, events)))
+
+    def test_read_and_render_session_insights(self, benchmark, run, fake_redis):
+        for game_id in range(1, 11):
+            run(update_session_insights(fake_redis, make_event(game_id=game_id)))
+
+        def read() -> SessionInsightsResponse:
+            session = run(get_session_insights(fake_redis, "test-session"))
+            return SessionInsightsResponse.from_session_insights(
+                SessionInsights(**session),
+            )
+
+        assert benchmark(read).unique_games_viewed == 10
+
+
+class TestWebEventRows:
+    def test_insert_rows_from_events(self, benchmark, events):
+        # What write_web_events sends to the multi-row INSERT
+        rows = benchmark(lambda: [event.model_dump() for event in events])
+
+        assert len(rows) == BATCH_SIZE
+
+    def test_orm_objects_from_events(self, benchmark, events):
+        rows = benchmark(lambda: [WebEvents(**event.model_dump()) for event in events])
+
+        assert len(rows) == BATCH_SIZE
+
+
+class TestResponseRendering:
+    def test_orjson_render(self, benchmark):
+        insights = customer_insights()
+
+        benchmark(lambda: orjson.dumps(insights.model_dump(mode="json")))
+
+    def test_default_fastapi_render(self, benchmark):
+        # The path FastAPI takes for a response_model
+        insights = customer_insights()
+
+        benchmark(lambda: JSONResponse(jsonable_encoder(insights)).body)
+
+
+class TestPageRendering:
+    def test_validate_rows(self, benchmark):
+        rows = user_rows()
+
+        assert len(benchmark(users_adapter.validate_python, rows)) == PAGE_SIZE
+
+    def test_json_response_render(self, benchmark):
+        page = users_page()
+
+        benchmark(lambda: json_response(page).body)
+
+    def test_default_fastapi_render(self, benchmark):
+        page = users_page()
+        # Validated again against the response_model, then encoded
+        field = TypeAdapter(PageResponse[User])
+
+        benchmark(
+            lambda: JSONResponse(
+                jsonable_encoder(field.validate_python(page.model_dump())),
+            ).body,
+        )
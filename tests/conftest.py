@@ -9,8 +9,22 @@ from fastapi import FastAPI
 from fastapi.testclient import TestClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_pg_connection, get_redis_connection
+from app.api.deps import (
+    get_ingestion_queue,
+    get_pg_connection,
+    get_redis_connection,
+    get_session_factory,
+)
 from app.main import app
+from app.services.catalog_cache import catalog_cache
+from app.services.ingestion_queue import IngestionQueue
+
+
+@pytest.fixture(autouse=True)
+def empty_catalog_cache() -> Generator[None, Any, Any]:
+    catalog_cache.clear()
+    yield
+    catalog_cache.clear()
 
 
 @pytest.fixture
@@ -22,6 +36,21 @@ def mock_postgres_session() -> AsyncMock:
     return pg_mock_client
 
 
+@pytest.fixture
+def mock_session_factory(mock_postgres_session: AsyncMock) -> MagicMock:
+    context = MagicMock()
+    context.__aenter__ = AsyncMock(return_value=mock_postgres_session)
+    context.__aexit__ = AsyncMock(return_value=False)
+    return MagicMock(return_value=context)
+
+
+@pytest.fixture
+def mock_ingestion_queue() -> AsyncMock:
+    queue_mock = AsyncMock(spec=IngestionQueue)
+    queue_mock.publish = AsyncMock(return_value=None)
+    return queue_mock
+
+
 @pytest.fixture
 def mock_redis_client() -> AsyncMock:
     client_mock = AsyncMock(spec=redis.asyncio.Redis)
@@ -34,11 +63,11 @@ def mock_redis_client() -> AsyncMock:
     async def mock_hget(key: str, field: str) -> Optional[bytes]:
         if "session:insights:" in key:
             if field == "event_counts":
-                return json.dumps({"VIEW": 5, "CLICK": 2}).encode('utf-8')
+                return json.dumps({"VIEW": 5, "CLICK": 2}).encode("utf-8")
             elif field == "games_viewed":
-                return json.dumps([102, 103, 104]).encode('utf-8')
+                return json.dumps([102, 103, 104]).encode("utf-8")
             elif field == "referrer_pages":
-                return json.dumps(["/games", "/home"]).encode('utf-8')
+                return json.dumps(["/games", "/home"]).encode("utf-8")
         return None
 
     async def mock_hgetall(key: str) -> dict:
@@ -52,18 +81,23 @@ def mock_redis_client() -> AsyncMock:
                 "games_viewed": json.dumps([101, 102, 103]),
                 "total_time_spent": "450",
                 "event_counts": json.dumps({"VIEW": 10, "CLICK": 5}),
-                "referrer_pages": json.dumps(["/home", "/games"])
+                "referrer_pages": json.dumps(["/home", "/games"]),
+            }
+            return {
+                k.encode("utf-8"): v.encode("utf-8") for k, v in session_data.items()
             }
-            return {k.encode('utf-8'): v.encode('utf-8') for k, v in session_data.items()}
         return {}
 
     # Set up mock methods
     client_mock.lrange = AsyncMock(side_effect=mock_lrange)
     client_mock.hget = AsyncMock(side_effect=mock_hget)
     client_mock.hgetall = AsyncMock(side_effect=mock_hgetall)
+    client_mock.get = AsyncMock(return_value=None)
+    client_mock.set = AsyncMock(return_value=True)
     client_mock.exists = AsyncMock(return_value=True)
     client_mock.rpush = AsyncMock(return_value=True)
     client_mock.ltrim = AsyncMock(return_value=True)
+    client_mock.register_script = Mock(return_value=AsyncMock(return_value=1))
 
     pipeline_mock = MagicMock()
     pipeline_mock.execute = AsyncMock(return_value=[True])
@@ -89,11 +123,15 @@ def test_app(
     mock_redis_pool: AsyncMock,
     mock_redis_client: AsyncMock,
     mock_postgres_session: AsyncMock,
+    mock_session_factory: MagicMock,
+    mock_ingestion_queue: AsyncMock,
 ) -> Generator[FastAPI, Any, Any]:
     app.state.redis_pool = mock_redis_pool
 
     app.dependency_overrides[get_redis_connection] = lambda: mock_redis_client
     app.dependency_overrides[get_pg_connection] = lambda: mock_postgres_session
+    app.dependency_overrides[get_session_factory] = lambda: mock_session_factory
+    app.dependency_overrides[get_ingestion_queue] = lambda: mock_ingestion_queue
 
     try:
         yield app
@@ -0,0 +1,180 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.game_store import (
+    Game,
+    Genre,
+    PlatformType,
+    Publisher,
+    User,
+    UserEventAggregates,
+    UserGenreAggregates,
+    WebEvents,
+    game_genre,
+)
+from app.services.event_aggregates import (
+    backfill_event_aggregates,
+    upsert_event_aggregates,
+)
+from app.services.partition_maintenance import (
+    create_web_events_partitions,
+    expire_web_events_partitions,
+)
+
+USER_ID = 987_654_321
+GAME_ID = 987_654_321
+GENRE_IDS = (987_654_321, 987_654_322)
+
+
+async def seed_catalog(db_session: AsyncSession) -> None:
+    await db_session.execute(
+        insert(User).values(
+            id=USER_ID,
+            username="aggregates-test",
+            email="aggregates-test@example.com",
+            hashed_password="-",
+        ),
+    )
+    await db_session.execute(
+        insert(Genre),
+        [
+            {"id": genre_id, "name": f"genre-{genre_id}", "description": ""}
+            for genre_id in GENRE_IDS
+        ],
+    )
+    await db_session.execute(
+        insert(Publisher).values(id=GAME_ID, name="aggregates-test"),
+    )
+    await db_session.execute(
+        insert(Game).values(
+            id=GAME_ID,
+            title="aggregates-test",
+            description="",
+            price=1,
+            release_date=datetime.now(),
+            publisher_id=GAME_ID,
+            platform=PlatformType.OTHER,
+        ),
+    )
+    await db_session.execute(
+        insert(game_genre),
+        [{"game_id": GAME_ID, "genre_id": genre_id} for genre_id in GENRE_IDS],
+    )
+
+
+async def snapshot(db_session: AsyncSession) -> tuple[list, list]:
+    events = await db_session.execute(
+        select(
+            UserEventAggregates.platform,
+            UserEventAggregates.event_type,
+            UserEventAggregates.event_count,
+            UserEventAggregates.time_spent_total,
+            UserEventAggregates.time_spent_count,
+        )
+        .filter(UserEventAggregates.user_id == USER_ID)
+        .order_by(UserEventAggregates.platform, UserEventAggregates.event_type),
+    )
+    genres = await db_session.execute(
+        select(UserGenreAggregates.genre_id, UserGenreAggregates.view_count)
+        .filter(UserGenreAggregates.user_id == USER_ID)
+        .order_by(UserGenreAggregates.genre_id),
+    )
+    return events.all(), genres.all()
+
+
+@pytest.mark.asyncio
+async def test_incremental_upserts_match_backfill(db_session: AsyncSession):
+    await seed_catalog(db_session)
+
+    batches = [
+        [
+            {"platform": "PC", "event_type": "VIEW", "time_spent": 10},
+            {"platform": "PC", "event_type": "VIEW", "time_spent": None},
+            {"platform": None, "event_type": "PURCHASE", "time_spent": 5},
+        ],
+        [
+            {"platform": "PC", "event_type": "VIEW", "time_spent": 20},
+            {"platform": "mobile", "event_type": "VIEW", "time_spent": 7},
+        ],
+    ]
+    for batch in batches:
+        rows = [
+            {
+                "user_id": USER_ID,
+                "game_id": GAME_ID,
+                "session_id": "aggregates-test",
+                "timestamp": datetime.now(),
+                **row,
+            }
+            for row in batch
+        ]
+        await db_session.execute(insert(WebEvents), rows)
+        await upsert_event_aggregates(db_session, rows)
+
+    incremental = await snapshot(db_session)
+    await backfill_event_aggregates(db_session)
+    backfilled = await snapshot(db_session)
+
+    assert incremental == backfilled
+    events, genres = incremental
+    assert [tuple(row) for row in events] == [
+        ("", "PURCHASE", 1, 5, 1),
+        ("PC", "VIEW", 3, 30, 2),
+        ("mobile", "VIEW", 1, 7, 1),
+    ]
+    assert [tuple(row) for row in genres] == [(GENRE_IDS[0], 4), (GENRE_IDS[1], 4)]
+
+
+@pytest.mark.asyncio
+async def test_expired_partitions_leave_the_rollups(db_session: AsyncSession):
+    await seed_catalog(db_session)
+    await create_web_events_partitions(db_session, date(2099, 5, 1), months_ahead=1)
+    rows = [
+        {
+            "user_id": USER_ID,
+            "game_id": GAME_ID,
+            "session_id": "aggregates-test",
+            **row,
+        }
+        for row in [
+            # In web_events_p2099_05, which expires
+            {
+                "platform": "PC",
+                "event_type": "VIEW",
+                "time_spent": 10,
+                "timestamp": datetime(2099, 5, 10),
+            },
+            {
+                "platform": None,
+                "event_type": "PURCHASE",
+                "time_spent": 5,
+                "timestamp": datetime(2099, 5, 11),
+            },
+            # In web_events_p2099_06, which stays
+            {
+                "platform": "PC",
+                "event_type": "VIEW",
+                "time_spent": 20,
+                "timestamp": datetime(2099, 6, 10),
+            },
+        ]
+    ]
+    await db_session.execute(insert(WebEvents), rows)
+    await upsert_event_aggregates(db_session, rows)
+
+    await expire_web_events_partitions(
+        db_session,
+        date(2100, 7, 15),
+        retention_months=13,
+        action="drop",
+    )
+    expired = await snapshot(db_session)
+    await backfill_event_aggregates(db_session)
+
+    assert expired == await snapshot(db_session)
+    events, genres = expired
+    assert [tuple(row) for row in events] == [("PC", "VIEW", 1, 20, 1)]
+    assert [tuple(row) for row in genres] == [(GENRE_IDS[0], 1), (GENRE_IDS[1], 1)]
@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.game_store import (
+    Game,
+    Genre,
+    PlatformType,
+    Publisher,
+    User,
+    WebEvents,
+    game_genre,
+)
+from app.services.customer_insights_service import compute_customer_insights
+from app.services.event_aggregates import upsert_event_aggregates
+from app.services.event_archive import EventArchive, export_archive
+
+USER_ID = 987_654_700
+GAME_IDS = (987_654_700, 987_654_701)
+GENRE_IDS = (987_654_700, 987_654_701)
+
+
+async def seed_catalog(db_session: AsyncSession) -> None:
+    await db_session.execute(
+        insert(User).values(
+            id=USER_ID,
+            username="archive-test",
+            email="archive-test@example.com",
+            hashed_password="-",
+            is_active=True,
+        ),
+    )
+    await db_session.execute(
+        insert(Genre),
+        [
+            {"id": genre_id, "name": f"archive-{genre_id}", "description": ""}
+            for genre_id in GENRE_IDS
+        ],
+    )
+    await db_session.execute(
+        insert(Publisher).values(id=USER_ID, name="archive-test"),
+    )
+    await db_session.execute(
+        insert(Game),
+        [
+            {
+                "id": game_id,
+                "title": f"archive-{game_id}",
+                "description": "",
+                "price": 1,
+                "release_date": datetime(2001, 1, 1),
+                "publisher_id": USER_ID,
+                "platform": PlatformType.OTHER,
+            }
+            for game_id in GAME_IDS
+        ],
+    )
+    await db_session.execute(
+        insert(game_genre),
+        [
+            {"game_id": GAME_IDS[0], "genre_id": GENRE_IDS[0]},
+            {"game_id": GAME_IDS[0], "genre_id": GENRE_IDS[1]},
+            {"game_id": GAME_IDS[1], "genre_id": GENRE_IDS[1]},
+        ],
+    )
+
+
+async def add_events(db_session: AsyncSession, events: list[dict]) -> None:
+    rows = [
+        {"user_id": USER_ID, "session_id": "archive-test", **event} for event in events
+    ]
+    await db_session.execute(insert(WebEvents), rows)
+    await upsert_event_aggregates(db_session, rows)
+
+
+@pytest.mark.asyncio
+async def test_incremental_archive_answers_customer_insights(
+    db_session: AsyncSession,
+    tmp_path: Path,
+):
+    now = datetime.now().replace(microsecond=0)
+    await seed_catalog(db_session)
+    await add_events(
+        db_session,
+        [
+            {
+                "event_type": "VIEW",
+                "game_id": GAME_IDS[0],
+                "platform": "PC",
+                "time_spent": 30,
+                "filters_applied": "price_under_20",
+                "timestamp": now - timedelta(days=40),
+            },
+            {
+                "event_type": "VIEW",
+                "game_id": GAME_IDS[1],
+                "platform": "mobile",
+                "time_spent": None,
+                "timestamp": now - timedelta(days=1),
+            },
+        ],
+    )
+
+    first = await export_archive(db_session, tmp_path, batch_size=1)
+
+    await add_events(
+        db_session,
+        [
+            {
+                "event_type": "VIEW",
+                "game_id": GAME_IDS[1],
+                "platform": "PC",
+                "time_spent": 10,
+                "filters_applied": "genre_rpg",
+                "timestamp": now,
+            },
+            {"event_type": "PURCHASE", "game_id": GAME_IDS[1], "timestamp": now},
+        ],
+    )
+    second = await export_archive(db_session, tmp_path)
+    nothing_new = await export_archive(db_session, tmp_path)
+
+    assert first.rows == 2
+    assert len(first.files) == 2
+    assert second.rows == 2
+    assert second.exported_after == first.exported_through
+    assert nothing_new.rows == 0
+    assert nothing_new.exported_through == second.exported_through
+    archived = EventArchive(tmp_path).customer_insights(USER_ID)
+    live = await compute_customer_insights(db_session, USER_ID)
+    # PostgreSQL returns the platforms in no particular order
+    for insights in (archived, live):
+        insights.platform_usage.sort(key=lambda stats: stats.platform)
+    assert archived == live
+    assert archived.preferences.preferred_platform == "PC"
+    assert [genre.view_count for genre in archived.preferences.preferred_genres] == [
+        3,
+        1,
+    ]
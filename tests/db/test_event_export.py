@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+import orjson
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.game_store import User, WebEvents
+from app.services.event_export import EventExportFilter, export_events, export_query
+
+TEST_USER_ID = 987_654_600
+START = datetime(2026, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_export_streams_batches_in_timestamp_order(db_session: AsyncSession):
+    await db_session.execute(
+        insert(User).values(
+            id=TEST_USER_ID,
+            username="export-test",
+            email="export-test@example.com",
+            hashed_password="-",
+            is_active=True,
+        ),
+    )
+    await db_session.execute(
+        insert(WebEvents),
+        [
+            {
+                "user_id": TEST_USER_ID,
+                "event_type": "VIEW",
+                "session_id": f"export-test-{offset % 2}",
+                # Inserted newest first
+                "timestamp": START + timedelta(minutes=10 - offset),
+            }
+            for offset in range(5)
+        ],
+    )
+    query = export_query(
+        EventExportFilter(user_id=TEST_USER_ID, session_id="export-test-0"),
+    )
+
+    chunks = [chunk async for chunk in export_events(db_session, query, "ndjson", 2)]
+
+    rows = [orjson.loads(line) for chunk in chunks for line in chunk.splitlines()]
+    assert len(chunks) == 2
+    assert [row["timestamp"] for row in rows] == [
+        (START + timedelta(minutes=minutes)).isoformat() for minutes in (6, 8, 10)
+    ]
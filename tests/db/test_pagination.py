@@ -0,0 +1,59 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.game_store import User
+from app.services.pagination import encode_cursor
+from app.services.user_service import get_users
+
+FIRST_USER_ID = 987_654_400
+# Later than every real user so the pages only hold the test users
+CREATED_AT = datetime(2099, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_cursor_pages_walk_ties_without_gaps(db_session: AsyncSession):
+    await db_session.execute(
+        insert(User),
+        [
+            {
+                "id": FIRST_USER_ID + offset,
+                "username": f"pagination-test-{offset}",
+                "email": f"pagination-test-{offset}@example.com",
+                "hashed_password": "-",
+                # Pairs of users share a signup date
+                "created_at": CREATED_AT.replace(day=1 + offset // 2),
+            }
+            for offset in range(7)
+        ],
+    )
+    cursor = encode_cursor("created_at", [datetime(2098, 12, 31), 0])
+
+    seen = []
+    while cursor is not None:
+        page = await get_users(db_session, limit=3, cursor=cursor, sort="created_at")
+        seen.extend(user.id for user in page.items)
+        cursor = page.next_cursor
+
+    assert seen == [FIRST_USER_ID + offset for offset in range(7)]
+
+
+@pytest.mark.asyncio
+async def test_cursor_page_seeks_the_index(db_session: AsyncSession):
+    await db_session.execute(text("SET LOCAL enable_seqscan = off"))
+
+    result = await db_session.execute(
+        text(
+            "EXPLAIN SELECT * FROM game_store.users "
+            "WHERE (created_at, id) > (:created_at, :id) "
+            "ORDER BY created_at, id LIMIT 101",
+        ),
+        {"created_at": CREATED_AT, "id": FIRST_USER_ID},
+    )
+    plan = "\n".join(result.scalars())
+
+    assert "ix_users_created_at_id" in plan
+    assert "Index Cond" in plan
+    assert "Sort" not in plan
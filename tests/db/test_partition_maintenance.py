@@ -0,0 +1,72 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import insert, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.game_store import User, WebEvents
+from app.services.partition_maintenance import (
+    create_web_events_partitions,
+    expire_web_events_partitions,
+    list_web_events_partitions,
+)
+
+USER_ID = 987_654_323
+# Far enough ahead that no real partition covers it yet
+EVENT_TIMESTAMP = datetime(2099, 5, 10)
+
+
+@pytest.mark.asyncio
+async def test_new_partition_takes_rows_from_default(db_session: AsyncSession):
+    await db_session.execute(
+        insert(User).values(
+            id=USER_ID,
+            username="partitions-test",
+            email="partitions-test@example.com",
+            hashed_password="-",
+        ),
+    )
+    await db_session.execute(
+        insert(WebEvents).values(
+            user_id=USER_ID,
+            event_type="VIEW",
+            session_id="partitions-test",
+            timestamp=EVENT_TIMESTAMP,
+        ),
+    )
+
+    created = await create_web_events_partitions(
+        db_session,
+        date(2099, 5, 1),
+        months_ahead=1,
+    )
+    assert created == ["web_events_p2099_05", "web_events_p2099_06"]
+    assert await create_web_events_partitions(db_session, date(2099, 5, 1), 1) == []
+
+    partition = await db_session.scalar(
+        select(literal_column("tableoid::regclass::text")).where(
+            WebEvents.user_id == USER_ID,
+        ),
+    )
+    assert partition == "game_store.web_events_p2099_05"
+
+
+@pytest.mark.asyncio
+async def test_expired_partitions_are_detached(db_session: AsyncSession):
+    await create_web_events_partitions(db_session, date(2099, 5, 1), months_ahead=1)
+
+    expired = await expire_web_events_partitions(
+        db_session,
+        date(2100, 7, 15),
+        retention_months=13,
+        action="detach",
+    )
+
+    assert "web_events_p2099_05" in expired
+    assert "web_events_p2099_06" not in expired
+    names = [
+        partition.name for partition in await list_web_events_partitions(db_session)
+    ]
+    assert "web_events_p2099_05" not in names
+    assert "web_events_p2099_06" in names
+    assert "web_events_default" in names
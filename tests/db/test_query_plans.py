@@ -0,0 +1,168 @@
+"""
+Query plan regression tests for the customer insights queries.
+
+These run against a real PostgreSQL migrated to the latest revision and are
+skipped unless TEST_DATABASE_URL points at one, e.g.
+
+    TEST_DATABASE_URL=postgresql+asyncpg://postgres@localhost/game_store pytest
+"""
+
+import json
+from collections.abc import AsyncGenerator, Iterator
+from datetime import date, datetime, time, timedelta
+from typing import Any
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.game_store import User, WebEvents
+from app.services.customer_insights_service import (
+    ENGAGEMENT_WINDOW_DAYS,
+    calculate_engagement_score,
+    compute_customer_insights,
+    get_platform_usage,
+    get_recent_interests,
+    get_user_preferences,
+)
+from app.services.partition_maintenance import (
+    PARENT_TABLE,
+    list_web_events_partitions,
+    qualified,
+)
+
+USER_ID = 987_654_321
+STALE_PARTITION = "web_events_query_plan_stale"
+RECENT_PARTITION = "web_events_query_plan_recent"
+
+
+class ExplainingSession:
+    """Session wrapper that records the plan of every statement it executes"""
+
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+        self.plans: list[tuple[str, list[dict[str, Any]]]] = []
+
+    async def execute(self, statement: Any, *args: Any, **kwargs: Any) -> Any:
+        sql = str(
+            statement.compile(
+                dialect=postgresql.dialect(),
+                compile_kwargs={"literal_binds": True},
+            ),
+        )
+        result = await self._session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+        plan = result.scalar_one()
+        self.plans.append((sql, json.loads(plan) if isinstance(plan, str) else plan))
+        return await self._session.execute(statement, *args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._session, name)
+
+
+def iter_plan_nodes(node: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from iter_plan_nodes(child)
+
+
+def scanned_relations(plan: list[dict[str, Any]]) -> set[str]:
+    return {
+        node["Relation Name"]
+        for node in iter_plan_nodes(plan[0]["Plan"])
+        if "Relation Name" in node
+    }
+
+
+@pytest_asyncio.fixture
+async def explaining_session(
+    db_session: AsyncSession,
+) -> AsyncGenerator[ExplainingSession, None]:
+    # Make any plan that can only be answered by a full scan stand out
+    await db_session.execute(text("SET LOCAL enable_seqscan = off"))
+    await db_session.execute(
+        insert(User).values(
+            id=USER_ID,
+            username="query-plan-test",
+            email="query-plan-test@example.com",
+            hashed_password="-",
+        ),
+    )
+    await db_session.execute(
+        insert(WebEvents).values(
+            user_id=USER_ID,
+            event_type="VIEW",
+            session_id="query-plan-test",
+            platform="PC",
+            time_spent=30,
+            timestamp=datetime.now(),
+        ),
+    )
+    yield ExplainingSession(db_session)
+
+
+@pytest_asyncio.fixture
+async def split_partitions_session(
+    db_session: AsyncSession,
+) -> AsyncGenerator[ExplainingSession, None]:
+    """
+    Replace the web_events partitions, within the rolled back transaction, by
+    one ending two engagement windows ago and one holding everything after
+    """
+    for partition in await list_web_events_partitions(db_session):
+        await db_session.execute(
+            text(
+                f"ALTER TABLE {PARENT_TABLE.fullname} "
+                f"DETACH PARTITION {qualified(partition.name)}",
+            ),
+        )
+    cutoff = datetime.combine(
+        date.today() - timedelta(days=2 * ENGAGEMENT_WINDOW_DAYS),
+        time(),
+    )
+    for name, bounds in (
+        (STALE_PARTITION, f"FROM (MINVALUE) TO ('{cutoff}')"),
+        (RECENT_PARTITION, f"FROM ('{cutoff}') TO (MAXVALUE)"),
+    ):
+        await db_session.execute(
+            text(
+                f"CREATE TABLE {qualified(name)} "
+                f"PARTITION OF {PARENT_TABLE.fullname} FOR VALUES {bounds}",
+            ),
+        )
+    yield ExplainingSession(db_session)
+
+
+@pytest.mark.asyncio
+async def test_customer_insights_queries_use_web_events_indexes(
+    explaining_session: ExplainingSession,
+):
+    await get_user_preferences(explaining_session, USER_ID)
+    await get_recent_interests(explaining_session, USER_ID)
+    await get_platform_usage(explaining_session, USER_ID)
+    await calculate_engagement_score(explaining_session, USER_ID)
+    await compute_customer_insights(explaining_session, USER_ID)
+
+    assert explaining_session.plans
+    for sql, plan in explaining_session.plans:
+        # Partitions are scanned instead of the parent, match them all
+        seq_scans = [
+            node
+            for node in iter_plan_nodes(plan[0]["Plan"])
+            if node["Node Type"] == "Seq Scan"
+            and node.get("Relation Name", "").startswith("web_events")
+        ]
+        assert not seq_scans, f"Sequential scan on web_events for:\n{sql}"
+
+
+@pytest.mark.asyncio
+async def test_engagement_window_prunes_older_partitions(
+    split_partitions_session: ExplainingSession,
+):
+    await calculate_engagement_score(split_partitions_session, USER_ID)
+
+    [(sql, plan)] = split_partitions_session.plans
+    scanned = scanned_relations(plan)
+    assert RECENT_PARTITION in scanned, f"Recent partition not scanned for:\n{sql}"
+    assert STALE_PARTITION not in scanned, f"Stale partition scanned for:\n{sql}"
@@ -0,0 +1,90 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.game_store import (
+    Game,
+    Genre,
+    Order,
+    PlatformType,
+    Publisher,
+    User,
+    game_genre,
+)
+from app.services.game_service import get_games, load_game
+from app.services.pagination import encode_cursor
+from app.services.user_service import get_user_by_id
+
+TEST_ID = 987_654_500
+
+
+@pytest.mark.asyncio
+async def test_game_rows_carry_genres_and_nullable_columns(db_session: AsyncSession):
+    await db_session.execute(
+        insert(Publisher).values(id=TEST_ID, name="read-rows-test"),
+    )
+    await db_session.execute(
+        insert(Genre),
+        [
+            {"id": TEST_ID + offset, "name": f"read-rows-{offset}", "description": ""}
+            for offset in range(2)
+        ],
+    )
+    await db_session.execute(
+        insert(Game).values(
+            id=TEST_ID,
+            title="Read rows",
+            description="-",
+            price=10,
+            release_date=datetime(2001, 1, 1),
+            publisher_id=TEST_ID,
+            platform=PlatformType.OTHER,
+        ),
+    )
+    await db_session.execute(
+        insert(game_genre),
+        [{"game_id": TEST_ID, "genre_id": TEST_ID + offset} for offset in range(2)],
+    )
+
+    game = await load_game(db_session, TEST_ID)
+    page = await get_games(
+        db_session,
+        limit=1,
+        cursor=encode_cursor("id", [TEST_ID - 1]),
+    )
+
+    assert game.genres == ["read-rows-0", "read-rows-1"]
+    assert game.reviews == []
+    assert game.region is None
+    assert page.items == (game,)
+
+
+@pytest.mark.asyncio
+async def test_user_row_carries_order_ids(db_session: AsyncSession):
+    await db_session.execute(
+        insert(User).values(
+            id=TEST_ID,
+            username="read-rows-test",
+            email="read-rows-test@example.com",
+            hashed_password="-",
+        ),
+    )
+    await db_session.execute(
+        insert(Order),
+        [
+            {
+                "id": TEST_ID + offset,
+                "user_id": TEST_ID,
+                "total_amount": 5,
+                "updated_at": datetime(2001, 1, 1),
+            }
+            for offset in range(2)
+        ],
+    )
+
+    user = await get_user_by_id(TEST_ID, db_session)
+
+    assert user.orders == [TEST_ID, TEST_ID + 1]
+    assert user.reviews == []
@@ -0,0 +1,122 @@
+from contextlib import nullcontext
+from datetime import datetime
+
+import fakeredis
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.game_store import (
+    Game,
+    Order,
+    OrderItem,
+    PlatformType,
+    Publisher,
+    User,
+    WebEvents,
+)
+from app.services.recommendations import CoViewIndexBuilder, CoViewRecommender
+
+USER_ID = 987_654_800
+GAME_IDS = (987_654_800, 987_654_801, 987_654_802)
+
+
+async def seed_catalog(db_session: AsyncSession) -> None:
+    await db_session.execute(
+        insert(User).values(
+            id=USER_ID,
+            username="recommendations-test",
+            email="recommendations-test@example.com",
+            hashed_password="-",
+            is_active=True,
+        ),
+    )
+    await db_session.execute(
+        insert(Publisher).values(id=USER_ID, name="recommendations-test"),
+    )
+    await db_session.execute(
+        insert(Game),
+        [
+            {
+                "id": game_id,
+                "title": f"recommendations-{game_id}",
+                "description": "",
+                "price": 1,
+                "release_date": datetime(2001, 1, 1),
+                "publisher_id": USER_ID,
+                "platform": PlatformType.OTHER,
+            }
+            for game_id in GAME_IDS
+        ],
+    )
+
+
+async def add_views(db_session: AsyncSession, views: list[tuple[str, int]]) -> None:
+    await db_session.execute(
+        insert(WebEvents),
+        [
+            {
+                "user_id": USER_ID,
+                "session_id": session_id,
+                "event_type": "VIEW",
+                "game_id": game_id,
+                "timestamp": datetime.now(),
+            }
+            for session_id, game_id in views
+        ],
+    )
+
+
+def builder(
+    db_session: AsyncSession,
+    redis_client: fakeredis.FakeAsyncRedis,
+) -> CoViewIndexBuilder:
+    return CoViewIndexBuilder(lambda: nullcontext(db_session), redis_client, top_k=5)
+
+
+@pytest.mark.asyncio
+async def test_incremental_refresh_matches_a_full_build(db_session: AsyncSession):
+    first, second, third = GAME_IDS
+    await seed_catalog(db_session)
+    await add_views(
+        db_session,
+        [("recommendations-1", first), ("recommendations-1", second)],
+    )
+    published = fakeredis.FakeAsyncRedis()
+    incremental = builder(db_session, published)
+    await incremental.refresh()
+
+    # The same session goes on, a new one starts and an order is placed
+    await add_views(
+        db_session,
+        [("recommendations-1", third), ("recommendations-2", third)],
+    )
+    order_id = (
+        await db_session.execute(
+            insert(Order)
+            .values(user_id=USER_ID, total_amount=2, updated_at=datetime.now())
+            .returning(Order.id),
+        )
+    ).scalar_one()
+    await db_session.execute(
+        insert(OrderItem),
+        [
+            {"order_id": order_id, "game_id": game_id, "quantity": 1, "unit_price": 1}
+            for game_id in (first, third)
+        ],
+    )
+    await incremental.refresh()
+    full = builder(db_session, fakeredis.FakeAsyncRedis())
+    await full.refresh()
+
+    assert (incremental.model.counts != full.model.counts).nnz == 0
+    assert incremental.model.through == full.model.through
+
+    # The API side loads what the builder published
+    recommender = CoViewRecommender(published)
+    await recommender.reload()
+    assert [game.game_id for game in recommender.similar_games(first, 5)][:2] == [
+        third,
+        second,
+    ]
+    assert [game.game_id for game in recommender.recommend([second], 5)][0] == first
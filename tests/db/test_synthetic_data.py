@@ -0,0 +1,43 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.game_store import Game, User, UserEventAggregates, WebEvents
+from app.services.synthetic_data import DatasetSpec, load_synthetic_dataset
+
+
+@pytest.mark.asyncio
+async def test_dataset_is_copied_and_aggregated(db_session: AsyncSession):
+    spec = DatasetSpec(users=20, games=30, events=1_000, days=45, chunk_size=128)
+    users_before = await db_session.scalar(select(func.count()).select_from(User))
+
+    copied = await load_synthetic_dataset(db_session, spec, now=datetime.now())
+
+    assert copied["users"] == 20
+    assert copied["games"] == 30
+    assert copied["web_events"] == 1_000
+    assert await db_session.scalar(select(func.count()).select_from(User)) == (
+        users_before + 20
+    )
+    # Sequences moved past the copied ids
+    last_game_id = await db_session.scalar(select(func.max(Game.id)))
+    next_game_id = await db_session.scalar(
+        select(func.nextval(func.pg_get_serial_sequence("game_store.games", "id"))),
+    )
+    assert next_game_id == last_game_id + 1
+    synthetic_events = await db_session.scalar(
+        select(func.sum(UserEventAggregates.event_count)).filter(
+            UserEventAggregates.user_id > users_before,
+        ),
+    )
+    assert synthetic_events == 1_000
+    assert (
+        await db_session.scalar(
+            select(func.count())
+            .select_from(WebEvents)
+            .filter(WebEvents.session_id.like("synthetic-%")),
+        )
+        >= 1_000
+    )
@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from app.schemas.ingestion import IngestionSchema
+
+
+def make_event(
+    user_id: int = 123,
+    game_id: int | None = 456,
+    event_type: str = "VIEW",
+) -> IngestionSchema:
+    return IngestionSchema(
+        user_id=user_id,
+        game_id=game_id,
+        event_type=event_type,
+        session_id="test-session",
+        timestamp=datetime.now(),
+        referrer_page="/home",
+    )
@@ -1,97 +1,319 @@
-from locust import HttpUser, task, between
-from typing import List
+"""
+Load profiles for the ingestion and insights API.
+
+Traffic follows the shape of production: many users with many sessions each,
+game popularity following a Zipf distribution and bursts of bulk ingestion.
+Cardinalities, skew and the load shape are command line options, see
+`locust -f tests/load/locustfile.py --help` and tests/load/README.md.
+
+Headless runs exit with code 1 when the latency or error rate SLOs are missed:
+
+    locust -f tests/load/locustfile.py --config tests/load/locust.conf \\
+        --headless --load-shape step -u 500 -r 50
+"""
+
+import json
 import random
-import uuid
-import time
+from bisect import bisect
+from datetime import datetime
+from itertools import accumulate
 
-class CustomerInsightsUser(HttpUser):
-    # Wait between 1 and 3 seconds between tasks
-    wait_time = between(1, 3)
-    
-    # List of test user IDs from seed data
-    TEST_USER_IDS: List[int] = [1, 2, 3]  # retrogamer, collector, casual_player
+from locust import HttpUser, LoadTestShape, events, task
+from locust.env import Environment
+from locust.runners import WorkerRunner
+from loguru import logger
 
-    @task(1)
-    def get_customer_insights(self):
-        """Load test the customer insights endpoint"""
-        user_id = random.choice(self.TEST_USER_IDS)
-        with self.client.get(
-            f"/api/v1/customer/insights?user_id={user_id}",
-            name="/api/v1/customer/insights",
-            catch_response=True
-        ) as response:
-            if response.status_code == 200:
-                # Verify the response contains expected fields
-                data = response.json()
-                if all(key in data for key in ["preferences", "recent_interests", "platform_usage", "engagement_score"]):
-                    response.success()
-                else:
-                    response.failure("Response missing required fields")
-            else:
-                response.failure(f"Request failed with status code: {response.status_code}")
-
-
-class SessionInsightsUser(HttpUser):
-    wait_time = between(1, 2)
-    
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.session_ids = {}
-        
-    def on_start(self):
-        """Create session IDs for each test user"""
-        for user_id in [1, 2, 3]:
-            self.session_ids[user_id] = f"loadtest-{uuid.uuid4()}"
-    
-    @task(3)
-    def ingest_session_data(self):
-        """Load test the ingestion endpoint with session data"""
-        user_id = random.choice([1, 2, 3])
-        session_id = self.session_ids[user_id]
-        game_id = random.choice([1, 2, 3, 4, 5])
-        event_type = random.choice(["VIEW", "CLICK", "ADD_TO_CART", "WISHLIST"])
-        
-        data = {
+EVENT_TYPES = ["VIEW", "VIEW", "VIEW", "VIEW", "ADD_TO_CART", "WISHLIST", "PURCHASE"]
+
+
+@events.init_command_line_parser.add_listener
+def add_options(parser) -> None:
+    workload = parser.add_argument_group("Workload")
+    # Defaults match scripts/seed_data.sql, raise them on a bigger data set
+    workload.add_argument("--user-cardinality", type=int, default=3)
+    workload.add_argument("--game-cardinality", type=int, default=5)
+    workload.add_argument(
+        "--sessions-per-user",
+        type=int,
+        default=1_000,
+        help="Distinct sessions of each user, times --user-cardinality",
+    )
+    workload.add_argument(
+        "--user-skew",
+        type=float,
+        default=0.8,
+        help="Zipf exponent of user activity, 0 for uniform",
+    )
+    workload.add_argument(
+        "--game-skew",
+        type=float,
+        default=1.1,
+        help="Zipf exponent of game popularity, 0 for uniform",
+    )
+    workload.add_argument("--think-time-min", type=float, default=0.5)
+    workload.add_argument("--think-time-max", type=float, default=2.0)
+    workload.add_argument("--bulk-batch-size", type=int, default=200)
+
+    shape = parser.add_argument_group("Load shape, peaks at -u users spawned at -r")
+    shape.add_argument(
+        "--load-shape",
+        choices=["constant", "step", "spike", "soak"],
+        default="constant",
+    )
+    shape.add_argument("--step-count", type=int, default=5)
+    shape.add_argument("--step-duration", type=float, default=60)
+    shape.add_argument(
+        "--spike-baseline",
+        type=float,
+        default=0.2,
+        help="Users before and after the spike, as a share of -u",
+    )
+    shape.add_argument("--spike-start", type=float, default=120)
+    shape.add_argument("--spike-duration", type=float, default=60)
+    shape.add_argument("--spike-cooldown", type=float, default=120)
+    shape.add_argument("--soak-duration", type=float, default=4 * 60 * 60)
+
+    slo = parser.add_argument_group("SLOs checked at the end of the run, 0 skips")
+    slo.add_argument("--slo-p95-ms", type=float, default=100)
+    slo.add_argument("--slo-p99-ms", type=float, default=250)
+    slo.add_argument("--slo-error-rate", type=float, default=0.01)
+
+
+class ZipfSampler:
+    """
+    Draws ids 1..n with a probability proportional to 1 / rank**skew, id 1
+    being the most popular. A skew of 0 draws uniformly without a table.
+    """
+
+    def __init__(self, n: int, skew: float) -> None:
+        self._n = n
+        self._cumulative = (
+            list(accumulate(1 / rank**skew for rank in range(1, n + 1)))
+            if skew > 0
+            else []
+        )
+
+    def sample(self) -> int:
+        if not self._cumulative:
+            return random.randint(1, self._n)
+        point = random.random() * self._cumulative[-1]
+        return min(bisect(self._cumulative, point), self._n - 1) + 1
+
+
+class Workload:
+    """Random users, sessions and events following the configured skew"""
+
+    def __init__(self, options) -> None:
+        self.users = ZipfSampler(options.user_cardinality, options.user_skew)
+        self.games = ZipfSampler(options.game_cardinality, options.game_skew)
+        self.sessions_per_user = options.sessions_per_user
+
+    def session(self, user_id: int) -> str:
+        return f"load-{user_id}-{random.randrange(self.sessions_per_user)}"
+
+    def event(self, user_id: int, session_id: str) -> dict:
+        game_id = self.games.sample()
+        return {
             "user_id": user_id,
             "session_id": session_id,
-            "event_type": event_type,
+            "event_type": random.choice(EVENT_TYPES),
             "game_id": game_id,
-            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "timestamp": datetime.now().isoformat(timespec="milliseconds"),
             "referrer_page": f"/games/{game_id}",
-            "time_spent": random.randint(10, 300)
+            "time_spent": random.randint(5, 300),
         }
-        
+
+
+workload: Workload | None = None
+
+
+@events.init.add_listener
+def build_workload(environment: Environment, **kwargs) -> None:
+    global workload
+    if environment.parsed_options is not None:
+        workload = Workload(environment.parsed_options)
+
+
+@events.quitting.add_listener
+def check_slos(environment: Environment, **kwargs) -> None:
+    """Fail the run when the aggregated latency or error rate misses its SLO"""
+    if isinstance(environment.runner, WorkerRunner):
+        return
+    options = environment.parsed_options
+    total = environment.stats.total
+    if not total.num_requests:
+        return
+
+    checks = [
+        (
+            "p95 latency (ms)",
+            total.get_response_time_percentile(0.95),
+            options.slo_p95_ms,
+        ),
+        (
+            "p99 latency (ms)",
+            total.get_response_time_percentile(0.99),
+            options.slo_p99_ms,
+        ),
+        ("error rate", total.fail_ratio, options.slo_error_rate),
+    ]
+    missed = [
+        f"{name} {value:.3f} > {limit}"
+        for name, value, limit in checks
+        if limit and value > limit
+    ]
+    if missed:
+        logger.error(f"SLOs missed: {', '.join(missed)}")
+        environment.process_exit_code = 1
+    else:
+        logger.info(f"SLOs met over {total.num_requests} requests")
+
+
+class WorkloadUser(HttpUser):
+    """A shopper browsing as one user, switching sessions now and then"""
+
+    abstract = True
+
+    def wait_time(self) -> float:
+        options = self.environment.parsed_options
+        return random.uniform(options.think_time_min, options.think_time_max)
+
+    def on_start(self) -> None:
+        self.user_id = workload.users.sample()
+        self.session_id = workload.session(self.user_id)
+
+    def expect(self, response, status_code: int) -> None:
+        if response.status_code == status_code:
+            response.success()
+        else:
+            response.failure(f"Status {response.status_code}: {response.text[:200]}")
+
+
+class BrowsingUser(WorkloadUser):
+    """Ingests events one by one and reads the session and last viewed games"""
+
+    weight = 8
+
+    @task(8)
+    def ingest_event(self) -> None:
+        if random.random() < 0.05:
+            self.session_id = workload.session(self.user_id)
         with self.client.post(
             "/api/v1/ingest",
-            json=data,
+            json=workload.event(self.user_id, self.session_id),
             name="/api/v1/ingest",
-            catch_response=True
+            catch_response=True,
+        ) as response:
+            self.expect(response, 202)
+
+    @task(2)
+    def session_insights(self) -> None:
+        with self.client.get(
+            f"/api/v1/sessions/{self.session_id}/insights",
+            name="/api/v1/sessions/{session_id}/insights",
+            catch_response=True,
         ) as response:
-            if response.status_code == 202:
+            # The session may not be written yet with the stream backend
+            if response.status_code == 404:
                 response.success()
             else:
-                response.failure(f"Ingestion failed with status code: {response.status_code}")
-    
+                self.expect(response, 200)
+
     @task(1)
-    def get_session_insights(self):
-        """Load test the session insights endpoint"""
-        user_id = random.choice([1, 2, 3])
-        session_id = self.session_ids[user_id]
-        
+    def last_viewed(self) -> None:
         with self.client.get(
-            f"/api/v1/analytics/sessions/{session_id}/insights",
-            name="/api/v1/analytics/sessions/insights",
-            catch_response=True
+            f"/api/v1/users/{self.user_id}/last-viewed",
+            name="/api/v1/users/{user_id}/last-viewed",
+            catch_response=True,
         ) as response:
-            if response.status_code == 200:
-                data = response.json()
-                if all(key in data for key in ["session_id", "user_id", "page_views", "unique_games_viewed", "event_breakdown"]):
-                    response.success()
-                else:
-                    response.failure("Response missing required fields")
-            elif response.status_code == 404 and "not found" in response.text:
-                # This might happen if we try to get insights before any data is ingested
-                # We'll mark it as a success for the load test
+            if response.status_code == 404:
                 response.success()
             else:
-                response.failure(f"Request failed with status code: {response.status_code}")
+                self.expect(response, 200)
+
+
+class InsightsUser(WorkloadUser):
+    """Reads customer insights, skewed towards the most active users"""
+
+    weight = 2
+
+    @task
+    def customer_insights(self) -> None:
+        with self.client.get(
+            f"/api/v1/customer/insights?user_id={workload.users.sample()}",
+            name="/api/v1/customer/insights",
+            catch_response=True,
+        ) as response:
+            self.expect(response, 200)
+
+
+class BulkIngestUser(WorkloadUser):
+    """Replays batches of events as NDJSON, like a backfill or an SDK flush"""
+
+    weight = 1
+
+    @task
+    def ingest_batch(self) -> None:
+        batch_size = self.environment.parsed_options.bulk_batch_size
+        lines = []
+        for _ in range(batch_size):
+            user_id = workload.users.sample()
+            event = workload.event(user_id, workload.session(user_id))
+            lines.append(json.dumps(event))
+        with self.client.post(
+            "/api/v1/ingest/batch",
+            data="\n".join(lines),
+            headers={"Content-Type": "application/x-ndjson"},
+            name="/api/v1/ingest/batch",
+            catch_response=True,
+        ) as response:
+            if response.status_code == 202 and response.json()["rejected"]:
+                response.failure(f"{response.json()['rejected']} events rejected")
+            else:
+                self.expect(response, 202)
+
+
+class ConfigurableLoadShape(LoadTestShape):
+    """
+    Users over time for --load-shape, peaking at -u users spawned at -r/s:
+
+    - constant: -u users until --run-time
+    - step: --step-count equal steps of --step-duration seconds up to -u
+    - spike: --spike-baseline of -u, -u during --spike-duration, baseline again
+    - soak: ramp up to -u and hold it for --soak-duration seconds
+    """
+
+    use_common_options = True
+
+    def tick(self) -> tuple[int, float] | None:
+        options = self.runner.environment.parsed_options
+        users = options.num_users or 1
+        spawn_rate = options.spawn_rate or 1
+        run_time = self.get_run_time()
+
+        if options.load_shape == "step":
+            step = int(run_time // options.step_duration)
+            if step >= options.step_count:
+                return None
+            return round(users * (step + 1) / options.step_count), spawn_rate
+
+        if options.load_shape == "spike":
+            baseline = max(round(users * options.spike_baseline), 1)
+            spike_end = options.spike_start + options.spike_duration
+            if run_time >= spike_end + options.spike_cooldown:
+                return None
+            if options.spike_start <= run_time < spike_end:
+                # Arrive all at once, that is the point of a spike
+                return users, max(spawn_rate, users)
+            return baseline, spawn_rate
+
+        if options.load_shape == "soak":
+            ramp_up = users / spawn_rate
+            if run_time >= ramp_up + options.soak_duration:
+                return None
+            return users, spawn_rate
+
+        # Locust leaves stopping at --run-time to the shape
+        if options.run_time and run_time >= options.run_time:
+            return None
+        return users, spawn_rate
@@ -0,0 +1,218 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import orjson
+import pyarrow.parquet as pq
+import pytest
+
+from app.services.analytics import AnalyticsEngine
+from app.services.event_archive import (
+    DIMENSIONS,
+    EVENTS_DIR,
+    MANIFEST_FILE,
+    WEB_EVENTS_SCHEMA,
+    ArchiveManifest,
+    MonthlyPartWriter,
+    arrow_table,
+    part_name,
+)
+from app.services.event_export import EXPORT_NAMES, csv_chunk
+from app.services.exceptions import InvalidReportRange, NoArchive
+
+MONDAY = datetime(2026, 1, 5, 10)
+SINCE = datetime(2026, 1, 1)
+UNTIL = datetime(2026, 2, 1)
+
+DIMENSION_ROWS = {
+    "games": [(1, "Quest", 19.99, 1, None), (2, "Shooter", 9.99, 1, None)],
+    "genres": [(1, "RPG"), (2, "FPS")],
+    "game_genre": [(1, 1), (2, 2)],
+}
+
+
+def event_row(
+    event_id: int,
+    game_id: int,
+    event_type: str,
+    session_id: str,
+    platform: str | None,
+    timestamp: datetime,
+) -> tuple:
+    return (
+        event_id,
+        123,
+        game_id,
+        event_type,
+        session_id,
+        30,
+        "/home",
+        platform,
+        None,
+        None,
+        timestamp,
+    )
+
+
+EVENTS = [
+    event_row(1, 1, "VIEW", "s-1", "PC", MONDAY),
+    event_row(2, 1, "ADD_TO_CART", "s-1", "PC", MONDAY + timedelta(minutes=1)),
+    event_row(3, 1, "PURCHASE", "s-1", "PC", MONDAY + timedelta(minutes=2)),
+    event_row(4, 2, "VIEW", "s-2", "PS5", MONDAY + timedelta(days=1)),
+    event_row(5, 1, "VIEW", "s-2", "PS5", MONDAY + timedelta(days=1)),
+    # In the cart before being viewed, not a conversion
+    event_row(6, 2, "ADD_TO_CART", "s-3", None, MONDAY + timedelta(days=7)),
+    event_row(7, 2, "VIEW", "s-3", None, MONDAY + timedelta(days=7, minutes=1)),
+]
+
+
+def write_archive(root: Path, events: list[tuple], exported_at: datetime) -> None:
+    for name, (_, schema) in DIMENSIONS.items():
+        pq.write_table(
+            arrow_table(DIMENSION_ROWS[name], schema), root / f"{name}.parquet"
+        )
+    first, last = events[0][0], events[-1][0]
+    parts = MonthlyPartWriter(root / EVENTS_DIR, part_name(first, last))
+    (root / EVENTS_DIR).mkdir(exist_ok=True)
+    parts.write(arrow_table(events, WEB_EVENTS_SCHEMA))
+    parts.close()
+    parts.publish()
+    (root / MANIFEST_FILE).write_text(
+        ArchiveManifest(
+            exported_through=last,
+            exported_at=exported_at,
+        ).model_dump_json(),
+    )
+
+
+@pytest.fixture
+def engine(tmp_path: Path):
+    write_archive(tmp_path, EVENTS, datetime(2026, 2, 1))
+    analytics = AnalyticsEngine(tmp_path, threads=1)
+    yield analytics
+    analytics.close()
+
+
+class TestReports:
+    @pytest.mark.asyncio
+    async def test_top_genres_per_week(self, engine: AnalyticsEngine):
+        report = orjson.loads(await engine.top_genres(SINCE, UNTIL, limit=1))
+
+        assert report["watermark"].startswith("7@")
+        assert report["data"] == [
+            {"week": "2026-01-05", "genre_id": 1, "genre_name": "RPG", "views": 2},
+            {"week": "2026-01-12", "genre_id": 2, "genre_name": "FPS", "views": 1},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_platform_share_skips_events_without_a_platform(
+        self,
+        engine: AnalyticsEngine,
+    ):
+        report = orjson.loads(await engine.platform_share(SINCE, UNTIL, "month"))
+
+        assert report["data"] == [
+            {"period": "2026-01-01", "platform": "PC", "events": 3, "share": 0.6},
+            {"period": "2026-01-01", "platform": "PS5", "events": 2, "share": 0.4},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_funnel_steps_follow_each_other(self, engine: AnalyticsEngine):
+        report = orjson.loads(await engine.conversion_funnel(SINCE, UNTIL))
+
+        assert report["data"] == {
+            "viewed": 3,
+            "added_to_cart": 1,
+            "purchased": 1,
+            "view_to_cart_rate": 0.3333,
+            "cart_to_purchase_rate": 1.0,
+        }
+
+    @pytest.mark.asyncio
+    async def test_funnel_of_one_game(self, engine: AnalyticsEngine):
+        report = orjson.loads(await engine.conversion_funnel(SINCE, UNTIL, game_id=2))
+
+        assert report["data"]["viewed"] == 2
+        assert report["data"]["added_to_cart"] == 0
+        assert report["data"]["view_to_cart_rate"] == 0
+
+    @pytest.mark.asyncio
+    async def test_the_range_is_half_open(self, engine: AnalyticsEngine):
+        report = orjson.loads(
+            await engine.platform_share(MONDAY, MONDAY + timedelta(minutes=2), "day"),
+        )
+
+        assert report["data"][0]["events"] == 2
+
+    @pytest.mark.asyncio
+    async def test_empty_range_is_rejected(self, engine: AnalyticsEngine):
+        with pytest.raises(InvalidReportRange):
+            await engine.top_genres(UNTIL, SINCE)
+
+    @pytest.mark.asyncio
+    async def test_missing_archive(self, tmp_path: Path):
+        analytics = AnalyticsEngine(tmp_path / "missing")
+
+        with pytest.raises(NoArchive):
+            await analytics.top_genres(SINCE, UNTIL)
+
+
+class TestCaching:
+    @pytest.mark.asyncio
+    async def test_reports_are_cached_until_the_archive_moves(
+        self,
+        tmp_path: Path,
+        engine: AnalyticsEngine,
+    ):
+        first = await engine.top_genres(SINCE, UNTIL)
+
+        assert await engine.top_genres(SINCE, UNTIL) == first
+        assert len(engine.cache) == 1
+
+        write_archive(
+            tmp_path,
+            [event_row(8, 2, "VIEW", "s-4", "PC", MONDAY)],
+            datetime(2026, 2, 2),
+        )
+        moved = orjson.loads(await engine.top_genres(SINCE, UNTIL))
+
+        assert moved["watermark"].startswith("8@")
+        assert moved["data"][0]["views"] == 2
+        assert len(engine.cache) == 2
+
+    @pytest.mark.asyncio
+    async def test_rows_past_the_manifest_are_ignored(
+        self,
+        tmp_path: Path,
+        engine: AnalyticsEngine,
+    ):
+        # Published by a run that has not moved the manifest yet
+        parts = MonthlyPartWriter(tmp_path / EVENTS_DIR, part_name(8, 8))
+        parts.write(
+            arrow_table(
+                [event_row(8, 1, "VIEW", "s-4", "PC", MONDAY)], WEB_EVENTS_SCHEMA
+            ),
+        )
+        parts.close()
+        parts.publish()
+
+        report = orjson.loads(await engine.top_genres(SINCE, UNTIL, limit=1))
+
+        assert report["data"][0]["views"] == 2
+
+
+@pytest.mark.asyncio
+async def test_reports_read_csv_exports(tmp_path: Path):
+    (tmp_path / EVENTS_DIR).mkdir()
+    (tmp_path / EVENTS_DIR / "export.csv").write_bytes(
+        csv_chunk([EXPORT_NAMES]) + csv_chunk(EVENTS),
+    )
+    for name, (_, schema) in DIMENSIONS.items():
+        (tmp_path / f"{name}.csv").write_bytes(
+            csv_chunk([schema.names]) + csv_chunk(DIMENSION_ROWS[name]),
+        )
+    analytics = AnalyticsEngine(tmp_path, threads=1)
+
+    report = orjson.loads(await analytics.conversion_funnel(SINCE, UNTIL))
+
+    assert report["data"]["purchased"] == 1
+    analytics.close()
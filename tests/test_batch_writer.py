@@ -0,0 +1,271 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy.exc import IntegrityError
+
+from app.services.batch_writer import (
+    WebEventBatchWriter,
+    write_web_events,
+    write_web_events_isolating_rejects,
+)
+from app.services.exceptions import WriterClosed
+from tests.factories import make_event
+
+
+@pytest.fixture(autouse=True)
+def upsert_aggregates_mock(mocker) -> AsyncMock:
+    return mocker.patch(
+        "app.services.batch_writer.upsert_event_aggregates",
+        new_callable=AsyncMock,
+    )
+
+
+def inserted_batches(session: AsyncMock) -> list[list[dict]]:
+    return [call.args[1] for call in session.execute.call_args_list]
+
+
+class TestWriteWebEvents:
+    @pytest.mark.asyncio
+    async def test_writes_all_events_with_one_commit(self, mock_postgres_session):
+        events = [make_event(user_id) for user_id in (1, 2, 3)]
+
+        await write_web_events(mock_postgres_session, events)
+
+        mock_postgres_session.execute.assert_called_once()
+        mock_postgres_session.commit.assert_called_once()
+        rows = inserted_batches(mock_postgres_session)[0]
+        assert [row["user_id"] for row in rows] == [1, 2, 3]
+
+    @pytest.mark.asyncio
+    async def test_aggregates_are_updated_before_commit(
+        self,
+        mock_postgres_session,
+        upsert_aggregates_mock,
+    ):
+        calls = []
+        upsert_aggregates_mock.side_effect = lambda *args: calls.append("upsert")
+        mock_postgres_session.commit.side_effect = lambda: calls.append("commit")
+
+        await write_web_events(mock_postgres_session, [make_event(1), make_event(2)])
+
+        session, rows = upsert_aggregates_mock.call_args.args
+        assert session is mock_postgres_session
+        assert rows == inserted_batches(mock_postgres_session)[0]
+        assert calls == ["upsert", "commit"]
+
+    @pytest.mark.asyncio
+    async def test_empty_batch_is_a_noop(self, mock_postgres_session):
+        await write_web_events(mock_postgres_session, [])
+
+        mock_postgres_session.execute.assert_not_called()
+        mock_postgres_session.commit.assert_not_called()
+
+
+def reject_user(session: AsyncMock, user_id: int) -> None:
+    """Make every INSERT holding an event of `user_id` fail like a bad FK"""
+
+    def execute(statement, rows):
+        if any(row["user_id"] == user_id for row in rows):
+            raise IntegrityError("INSERT", rows, Exception("unknown user"))
+
+    session.execute.side_effect = execute
+
+
+def committed_users(session: AsyncMock) -> list[int]:
+    """Users of the INSERTs that were followed by a commit"""
+    users = []
+    batch = []
+    for name, args, _ in session.mock_calls:
+        if name == "execute":
+            batch = [row["user_id"] for row in args[1]]
+        elif name == "commit":
+            users.extend(batch)
+    return users
+
+
+class TestWriteWebEventsIsolatingRejects:
+    @pytest.mark.asyncio
+    async def test_only_rejected_event_is_left_out(
+        self,
+        mock_session_factory,
+        mock_postgres_session,
+    ):
+        reject_user(mock_postgres_session, 3)
+        events = [make_event(user_id) for user_id in range(1, 7)]
+
+        rejected = await write_web_events_isolating_rejects(
+            mock_session_factory,
+            events,
+        )
+
+        assert rejected == [events[2]]
+        assert sorted(committed_users(mock_postgres_session)) == [1, 2, 4, 5, 6]
+
+    @pytest.mark.asyncio
+    async def test_other_errors_are_raised(
+        self,
+        mock_session_factory,
+        mock_postgres_session,
+    ):
+        mock_postgres_session.execute.side_effect = ConnectionError("db down")
+
+        with pytest.raises(ConnectionError):
+            await write_web_events_isolating_rejects(
+                mock_session_factory,
+                [make_event(1), make_event(2)],
+            )
+
+        mock_postgres_session.execute.assert_called_once()
+
+
+class TestWebEventBatchWriter:
+    @pytest.mark.asyncio
+    async def test_flushes_when_batch_size_is_reached(
+        self,
+        mock_session_factory,
+        mock_postgres_session,
+    ):
+        writer = WebEventBatchWriter(
+            mock_session_factory, batch_size=2, flush_interval=60
+        )
+        writer.start()
+
+        for user_id in (1, 2, 3, 4):
+            await writer.put(make_event(user_id))
+        await writer.stop()
+
+        batches = inserted_batches(mock_postgres_session)
+        assert [[row["user_id"] for row in batch] for batch in batches] == [
+            [1, 2],
+            [3, 4],
+        ]
+
+    @pytest.mark.asyncio
+    async def test_flushes_partial_batch_after_interval(
+        self,
+        mock_session_factory,
+        mock_postgres_session,
+    ):
+        writer = WebEventBatchWriter(
+            mock_session_factory,
+            batch_size=100,
+            flush_interval=0.01,
+        )
+        writer.start()
+
+        await writer.put(make_event())
+        await asyncio.sleep(0.05)
+
+        assert len(inserted_batches(mock_postgres_session)) == 1
+        await writer.stop()
+
+    @pytest.mark.asyncio
+    async def test_stop_flushes_buffered_events(
+        self, mock_session_factory, mock_postgres_session
+    ):
+        writer = WebEventBatchWriter(
+            mock_session_factory, batch_size=100, flush_interval=60
+        )
+        writer.start()
+
+        for user_id in (1, 2, 3):
+            await writer.put(make_event(user_id))
+        await writer.stop()
+
+        rows = [
+            row for batch in inserted_batches(mock_postgres_session) for row in batch
+        ]
+        assert [row["user_id"] for row in rows] == [1, 2, 3]
+        assert writer.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_put_after_stop_raises(self, mock_session_factory):
+        writer = WebEventBatchWriter(mock_session_factory)
+        writer.start()
+        await writer.stop()
+
+        with pytest.raises(WriterClosed):
+            await writer.put(make_event())
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_does_not_stop_writer(
+        self,
+        mock_session_factory,
+        mock_postgres_session,
+    ):
+        mock_postgres_session.execute.side_effect = [Exception("db down"), None]
+        writer = WebEventBatchWriter(
+            mock_session_factory, batch_size=1, flush_interval=60
+        )
+        writer.start()
+
+        await writer.put(make_event(1))
+        await writer.put(make_event(2))
+        await writer.stop()
+
+        assert mock_postgres_session.execute.call_count == 2
+        mock_postgres_session.commit.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_committed_batch_invalidates_cached_insights(
+        self,
+        mocker,
+        mock_session_factory,
+        mock_postgres_session,
+    ):
+        bump_mock = mocker.patch(
+            "app.services.batch_writer.bump_insights_versions",
+            new_callable=AsyncMock,
+        )
+        mock_postgres_session.execute.side_effect = [Exception("db down"), None]
+        redis_client = AsyncMock()
+        writer = WebEventBatchWriter(
+            mock_session_factory,
+            batch_size=1,
+            flush_interval=60,
+            redis_client=redis_client,
+        )
+        writer.start()
+
+        await writer.put(make_event(1))
+        await writer.put(make_event(2))
+        await writer.stop()
+
+        bump_mock.assert_awaited_once_with(redis_client, [2])
+
+    @pytest.mark.asyncio
+    async def test_rejected_event_does_not_drop_its_batch(
+        self,
+        mocker,
+        mock_session_factory,
+        mock_postgres_session,
+    ):
+        bump_mock = mocker.patch(
+            "app.services.batch_writer.bump_insights_versions",
+            new_callable=AsyncMock,
+        )
+        reject_user(mock_postgres_session, 2)
+        labels = {"reason": "rejected"}
+        dropped = REGISTRY.get_sample_value("app_ingest_events_dropped_total", labels)
+        writer = WebEventBatchWriter(
+            mock_session_factory,
+            batch_size=3,
+            flush_interval=60,
+            redis_client=AsyncMock(),
+        )
+        writer.start()
+
+        await writer.put_many([make_event(1), make_event(2), make_event(3)])
+        await writer.stop()
+
+        assert sorted(committed_users(mock_postgres_session)) == [1, 3]
+        assert sorted(bump_mock.call_args.args[1]) == [1, 3]
+        assert (
+            REGISTRY.get_sample_value(
+                "app_ingest_events_dropped_total",
+                labels,
+            )
+            == (dropped or 0) + 1
+        )
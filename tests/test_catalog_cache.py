@@ -0,0 +1,175 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import orjson
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.schemas.genre import GenreUpdate
+from app.services.catalog_cache import CatalogCache, TTLCache, catalog_cache
+from app.services.genre_service import get_genre, get_genres, update_genre
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def genre_row(genre_id: int = 1, name: str = "RPG") -> SimpleNamespace:
+    return SimpleNamespace(id=genre_id, name=name, description="")
+
+
+def scalar_result(value) -> MagicMock:
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = value
+    result.scalars.return_value = [value]
+    result.mappings.return_value.all.return_value = [vars(value)]
+    return result
+
+
+class TestTTLCache:
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        cache = TTLCache("test", maxsize=10, ttl=5, clock=clock)
+        cache.set("a", 1)
+
+        clock.now = 4.9
+        assert cache.get("a") == 1
+        clock.now = 5
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TTLCache("test", maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    @pytest.mark.asyncio
+    async def test_get_many_or_load_loads_missing_keys_at_once(self):
+        cache = TTLCache("test", maxsize=10, ttl=60)
+        cache.set(1, ["RPG"])
+        load = AsyncMock(return_value={2: [], 3: ["Puzzle"]})
+
+        found = await cache.get_many_or_load([1, 2, 3, 4], load)
+
+        load.assert_awaited_once_with([2, 3, 4])
+        assert found == {1: ["RPG"], 2: [], 3: ["Puzzle"]}
+        assert cache.get(2) == []
+        assert cache.get(4) is None
+
+    @pytest.mark.asyncio
+    async def test_value_loaded_across_an_invalidation_is_not_stored(self):
+        cache = TTLCache("test", maxsize=10, ttl=60)
+
+        async def load() -> str:
+            cache.pop("a")
+            return "stale"
+
+        assert await cache.get_or_load("a", load) == "stale"
+        assert cache.get("a") is None
+        assert await cache.get_or_load("a", AsyncMock(return_value="fresh")) == "fresh"
+        assert cache.get("a") == "fresh"
+
+    @pytest.mark.asyncio
+    async def test_many_loaded_across_an_invalidation_are_not_stored(self):
+        cache = TTLCache("test", maxsize=10, ttl=60)
+
+        async def load(keys: list) -> dict:
+            cache.clear()
+            return {key: ["RPG"] for key in keys}
+
+        assert await cache.get_many_or_load([1, 2], load) == {1: ["RPG"], 2: ["RPG"]}
+        assert len(cache) == 0
+
+
+class TestCatalogCache:
+    @pytest.mark.asyncio
+    async def test_invalidate_drops_locally_and_broadcasts(self):
+        redis_mock = AsyncMock()
+        cache = CatalogCache(channel="catalog")
+        cache.connect(redis_mock)
+        cache.genres.set(1, "RPG")
+        cache.genre_lists.set((0, 100), ("RPG",))
+        cache.game_genres.set(7, ["RPG"])
+
+        await cache.invalidate("genre", 1)
+
+        assert len(cache.genres) == len(cache.genre_lists) == 0
+        assert len(cache.game_genres) == 0
+        redis_mock.publish.assert_awaited_once_with(
+            "catalog",
+            orjson.dumps({"entity": "genre", "id": 1}),
+        )
+
+    def test_genre_change_drops_games_embedding_genre_names(self):
+        cache = CatalogCache()
+        cache.games.set(7, "game")
+        cache.game_lists.set((0, 100), ("game",))
+        cache.publishers.set(3, "publisher")
+
+        cache.drop("genre", 1)
+
+        assert len(cache.games) == len(cache.game_lists) == 0
+        assert cache.publishers.get(3) == "publisher"
+
+    @pytest.mark.asyncio
+    async def test_failed_broadcast_is_not_raised(self):
+        redis_mock = AsyncMock()
+        redis_mock.publish.side_effect = RedisConnectionError("redis down")
+        cache = CatalogCache()
+        cache.connect(redis_mock)
+        cache.games.set(7, "game")
+
+        await cache.invalidate("game", 7)
+
+        assert cache.games.get(7) is None
+
+    def test_apply_drops_entries_of_other_workers_changes(self):
+        cache = CatalogCache()
+        cache.publishers.set(3, "publisher")
+        cache.games.set(7, "game")
+
+        cache.apply(b'{"entity": "publisher", "id": 3}')
+        cache.apply(b"{not json")
+
+        assert cache.publishers.get(3) is None
+        assert cache.games.get(7) == "game"
+
+
+class TestCachedGenreService:
+    @pytest.mark.asyncio
+    async def test_genre_is_loaded_once(self, mock_postgres_session):
+        mock_postgres_session.execute.return_value = scalar_result(genre_row())
+
+        first = await get_genre(mock_postgres_session, 1)
+        second = await get_genre(mock_postgres_session, 1)
+
+        assert first == second
+        assert first.name == "RPG"
+        mock_postgres_session.execute.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_update_invalidates_cached_genre_and_lists(
+        self,
+        mock_postgres_session,
+    ):
+        row = genre_row()
+        mock_postgres_session.execute.return_value = scalar_result(row)
+        await get_genre(mock_postgres_session, 1)
+        await get_genres(mock_postgres_session)
+
+        await update_genre(mock_postgres_session, 1, GenreUpdate(name="Action"))
+
+        assert catalog_cache.genres.get(1) is None
+        assert catalog_cache.genre_lists.get(("id", 0, None, 100)) is None
+        assert (await get_genre(mock_postgres_session, 1)).name == "Action"
@@ -0,0 +1,110 @@
+import asyncio
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.schemas.customer_insights import (
+    GameRecommendation,
+    GenrePreference,
+    PlatformStats,
+)
+from app.services import customer_insights_service
+from app.services.customer_insights_service import (
+    compute_customer_insights_concurrently,
+)
+
+
+class SessionTracker:
+    """Session factory stand-in that records how many sessions are open"""
+
+    def __init__(self) -> None:
+        self.open = 0
+        self.max_open = 0
+        self.created = 0
+
+    def __call__(self) -> MagicMock:
+        context = MagicMock()
+        context.__aenter__ = AsyncMock(side_effect=self._enter)
+        context.__aexit__ = AsyncMock(side_effect=self._exit)
+        return context
+
+    async def _enter(self) -> AsyncMock:
+        self.created += 1
+        self.open += 1
+        self.max_open = max(self.max_open, self.open)
+        return AsyncMock()
+
+    async def _exit(self, *args) -> bool:
+        self.open -= 1
+        return False
+
+
+def slow_query(result):
+    async def query(db, user_id):
+        await asyncio.sleep(0.01)
+        return result
+
+    return query
+
+
+@pytest.fixture
+def sub_queries(mocker) -> None:
+    results = {
+        "get_user_platform_preferences": ("PC", 4),
+        "get_user_filters": ["price_under_20"],
+        "get_average_viewing_time": 42,
+        "get_genre_preferences": [
+            GenrePreference(genre_id=1, genre_name="RPG", view_count=3),
+        ],
+        "get_recent_interests": [
+            GameRecommendation(
+                game_id=7,
+                view_count=3,
+                last_viewed=datetime(2024, 1, 1),
+                genres=["RPG"],
+            ),
+        ],
+        "get_platform_usage": [
+            PlatformStats(platform="PC", usage_count=4, avg_time_spent=42),
+        ],
+        "calculate_engagement_score": 40,
+    }
+    for name, result in results.items():
+        mocker.patch.object(customer_insights_service, name, slow_query(result))
+
+
+class TestComputeCustomerInsightsConcurrently:
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("sub_queries")
+    async def test_each_sub_query_uses_its_own_session(self):
+        sessions = SessionTracker()
+
+        insights = await compute_customer_insights_concurrently(
+            sessions,
+            user_id=123,
+            max_connections=7,
+        )
+
+        assert sessions.created == 7
+        assert sessions.max_open > 1
+        assert sessions.open == 0
+        assert insights.user_id == 123
+        assert insights.preferences.preferred_platform == "PC"
+        assert insights.preferences.price_sensitive is True
+        assert insights.engagement_score == 40
+        assert insights.recent_interests[0].game_id == 7
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("sub_queries")
+    async def test_open_sessions_are_capped_per_request(self):
+        sessions = SessionTracker()
+
+        await compute_customer_insights_concurrently(
+            sessions,
+            user_id=123,
+            max_connections=2,
+        )
+
+        assert sessions.created == 7
+        assert sessions.max_open == 2
@@ -0,0 +1,66 @@
+from app.services.event_aggregates import event_aggregate_rows, game_view_rows
+
+
+def make_row(**overrides) -> dict:
+    row = {
+        "user_id": 1,
+        "game_id": 10,
+        "event_type": "VIEW",
+        "time_spent": 30,
+    }
+    row.update(overrides)
+    return row
+
+
+class TestEventAggregateRows:
+    def test_folds_rows_per_user_platform_and_event_type(self):
+        rows = [
+            make_row(),
+            make_row(time_spent=10),
+            make_row(time_spent=None),
+            make_row(event_type="PURCHASE"),
+            make_row(user_id=2, platform="mobile"),
+        ]
+
+        assert event_aggregate_rows(rows) == [
+            {
+                "user_id": 1,
+                "platform": "",
+                "event_type": "PURCHASE",
+                "event_count": 1,
+                "time_spent_total": 30,
+                "time_spent_count": 1,
+            },
+            {
+                "user_id": 1,
+                "platform": "",
+                "event_type": "VIEW",
+                "event_count": 3,
+                "time_spent_total": 40,
+                "time_spent_count": 2,
+            },
+            {
+                "user_id": 2,
+                "platform": "mobile",
+                "event_type": "VIEW",
+                "event_count": 1,
+                "time_spent_total": 30,
+                "time_spent_count": 1,
+            },
+        ]
+
+    def test_empty_batch_has_no_aggregates(self):
+        assert event_aggregate_rows([]) == []
+
+
+class TestGameViewRows:
+    def test_counts_views_of_games_only(self):
+        rows = [
+            make_row(game_id=11),
+            make_row(),
+            make_row(),
+            make_row(game_id=None),
+            make_row(event_type="PURCHASE"),
+        ]
+
+        assert game_view_rows(rows) == [(1, 10, 2), (1, 11, 1)]
@@ -0,0 +1,97 @@
+from datetime import datetime
+from pathlib import Path
+
+import pyarrow.parquet as pq
+import pytest
+
+from app.services.event_archive import (
+    EVENTS_DIR,
+    WEB_EVENTS_SCHEMA,
+    EventArchive,
+    MonthlyPartWriter,
+    arrow_table,
+    part_name,
+    remove_unfinished_parts,
+)
+from app.services.event_export import EXPORT_NAMES
+from app.services.exceptions import NoArchive
+
+
+def event_row(event_id: int, timestamp: datetime) -> tuple:
+    return (
+        event_id,
+        123,
+        456,
+        "VIEW",
+        f"session-{event_id}",
+        30,
+        "/home",
+        "PC",
+        None,
+        None,
+        timestamp,
+    )
+
+
+def test_schema_follows_the_export_columns():
+    assert tuple(WEB_EVENTS_SCHEMA.names) == EXPORT_NAMES
+
+
+class TestMonthlyPartWriter:
+    def test_rows_are_split_by_month_and_published_together(self, tmp_path: Path):
+        parts = MonthlyPartWriter(tmp_path, part_name(1, 3))
+        parts.write(
+            arrow_table(
+                [
+                    event_row(1, datetime(2026, 9, 30, 23, 59)),
+                    event_row(2, datetime(2026, 10, 1)),
+                    event_row(3, datetime(2026, 10, 2)),
+                ],
+                WEB_EVENTS_SCHEMA,
+            ),
+        )
+        parts.close()
+
+        assert list(tmp_path.glob("month=*/part-*")) == []
+        published = parts.publish()
+
+        assert [path.relative_to(tmp_path).as_posix() for path in published] == [
+            "month=2026-09/part-000000000001-000000000003.parquet",
+            "month=2026-10/part-000000000001-000000000003.parquet",
+        ]
+        assert pq.read_table(published[1])["id"].to_pylist() == [2, 3]
+
+    def test_low_cardinality_columns_are_dictionary_encoded(self, tmp_path: Path):
+        parts = MonthlyPartWriter(tmp_path, part_name(1, 2))
+        parts.write(
+            arrow_table(
+                [event_row(event_id, datetime(2026, 10, 1)) for event_id in (1, 2)],
+                WEB_EVENTS_SCHEMA,
+            ),
+        )
+        parts.close()
+        (path,) = parts.publish()
+
+        row_group = pq.ParquetFile(path).metadata.row_group(0)
+        dictionary_columns = {
+            row_group.column(index).path_in_schema
+            for index in range(row_group.num_columns)
+            if row_group.column(index).has_dictionary_page
+        }
+        assert dictionary_columns == {"event_type", "platform", "referrer_page"}
+
+
+def test_files_past_the_manifest_are_removed(tmp_path: Path):
+    month = tmp_path / EVENTS_DIR / "month=2026-10"
+    month.mkdir(parents=True)
+    for name in (part_name(1, 10), part_name(11, 20), f".{part_name(21, 30)}"):
+        (month / name).touch()
+
+    remove_unfinished_parts(tmp_path, exported_through=10)
+
+    assert [path.name for path in month.iterdir()] == [part_name(1, 10)]
+
+
+def test_reading_a_missing_archive_raises(tmp_path: Path):
+    with pytest.raises(NoArchive):
+        EventArchive(tmp_path).customer_insights(123)
@@ -0,0 +1,58 @@
+import csv
+import io
+from datetime import datetime
+
+import orjson
+import pytest
+
+from app.services.event_export import (
+    EXPORT_NAMES,
+    EventExportFilter,
+    csv_chunk,
+    export_query,
+    ndjson_chunk,
+)
+from app.services.exceptions import InvalidExportFilter
+
+ROW = (1, 123, None, "VIEW", "s-1", 30, "/home", None, None, None, datetime(2026, 1, 2))
+
+
+class TestExportQuery:
+    @pytest.mark.parametrize(
+        "filters",
+        [
+            EventExportFilter(),
+            EventExportFilter(since=datetime(2026, 2, 1), until=datetime(2026, 1, 1)),
+        ],
+    )
+    def test_rejects_unfiltered_or_empty_range(self, filters):
+        with pytest.raises(InvalidExportFilter):
+            export_query(filters)
+
+    def test_time_range_is_half_open(self):
+        query = export_query(
+            EventExportFilter(since=datetime(2026, 1, 1), until=datetime(2026, 2, 1)),
+        )
+
+        where = str(query.whereclause)
+        assert "web_events.timestamp >= :timestamp_1" in where
+        assert "web_events.timestamp < :timestamp_2" in where
+
+
+class TestEncoding:
+    def test_ndjson_line_per_row(self):
+        lines = ndjson_chunk([ROW, ROW]).splitlines()
+
+        assert len(lines) == 2
+        assert orjson.loads(lines[0]) == {
+            **dict(zip(EXPORT_NAMES, ROW, strict=True)),
+            "timestamp": "2026-01-02T00:00:00",
+        }
+
+    def test_csv_nulls_are_empty_fields(self):
+        chunk = csv_chunk([EXPORT_NAMES, ROW]).decode("utf-8")
+
+        header, row = csv.reader(io.StringIO(chunk))
+        assert header == list(EXPORT_NAMES)
+        assert row[2] == ""
+        assert row[-1] == "2026-01-02 00:00:00"
@@ -0,0 +1,249 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, Mock
+
+import fakeredis
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.schemas.ingestion import IngestionSchema
+from app.services.exceptions import QueueFull
+from app.services.ingestion_queue import (
+    ENQUEUE_EVENTS_SCRIPT,
+    IngestionQueue,
+    IngestionStreamConsumer,
+    InlineIngestionQueue,
+    RedisStreamQueue,
+)
+from tests.factories import make_event
+
+
+@pytest.fixture
+def redis_mock() -> AsyncMock:
+    client_mock = AsyncMock()
+    client_mock.register_script = Mock(return_value=AsyncMock(return_value=1))
+    pipeline_mock = MagicMock()
+    pipeline_mock.execute = AsyncMock(return_value=[])
+    client_mock.pipeline = Mock(return_value=pipeline_mock)
+    return client_mock
+
+
+def test_backend_without_publish_cannot_be_created():
+    class Incomplete(IngestionQueue):
+        pass
+
+    with pytest.raises(TypeError, match="publish"):
+        Incomplete()
+
+
+class TestRedisStreamQueue:
+    @pytest.mark.asyncio
+    async def test_publish_appends_events_in_one_call(self, redis_mock):
+        script_mock = AsyncMock(return_value=2)
+        redis_mock.register_script = Mock(return_value=script_mock)
+        queue = RedisStreamQueue(redis_mock, stream="events", max_pending=100)
+        events = [make_event(1), make_event(2)]
+
+        await queue.publish(events)
+
+        redis_mock.register_script.assert_called_once_with(ENQUEUE_EVENTS_SCRIPT)
+        script_mock.assert_awaited_once()
+        _, kwargs = script_mock.call_args
+        assert kwargs["keys"] == ["events"]
+        assert kwargs["args"][0] == 100
+        assert [
+            IngestionSchema.model_validate_json(payload).user_id
+            for payload in kwargs["args"][1:]
+        ] == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_publish_raises_when_stream_is_full(self, redis_mock):
+        redis_mock.register_script = Mock(return_value=AsyncMock(return_value=0))
+        queue = RedisStreamQueue(redis_mock, stream="events", max_pending=1)
+
+        with pytest.raises(QueueFull):
+            await queue.publish([make_event()])
+
+
+class TestInlineIngestionQueue:
+    @pytest.mark.asyncio
+    async def test_publish_processes_events_in_process(self, redis_mock):
+        event_writer = AsyncMock()
+        queue = InlineIngestionQueue(redis_mock, event_writer)
+
+        await queue.publish([make_event(1), make_event(2)])
+        await queue.close()
+
+        event_writer.put_many.assert_awaited_once()
+        event_writer.stop.assert_awaited_once()
+
+
+class TestIngestionStreamConsumer:
+    @staticmethod
+    def make_entry(entry_id: bytes, event: IngestionSchema) -> tuple:
+        return entry_id, {b"event": event.model_dump_json().encode("utf-8")}
+
+    @pytest.mark.asyncio
+    async def test_process_commits_before_acknowledging(
+        self,
+        redis_mock,
+        mock_session_factory,
+        mock_postgres_session,
+    ):
+        calls = []
+        mock_postgres_session.commit.side_effect = lambda: calls.append("commit")
+        pipeline_mock = redis_mock.pipeline.return_value
+        pipeline_mock.xack.side_effect = lambda *args: calls.append("ack")
+        consumer = IngestionStreamConsumer(
+            redis_mock,
+            mock_session_factory,
+            consumer_name="worker-1",
+            stream="events",
+            group="writers",
+        )
+        entries = [
+            self.make_entry(b"1-0", make_event(1)),
+            self.make_entry(b"2-0", make_event(2, game_id=None)),
+        ]
+
+        await consumer.process(entries)
+
+        rows = mock_postgres_session.execute.call_args_list[0].args[1]
+        assert [row["user_id"] for row in rows] == [1, 2]
+        assert calls == ["commit", "ack"]
+        pipeline_mock.xack.assert_called_once_with("events", "writers", b"1-0", b"2-0")
+        pipeline_mock.xdel.assert_called_once_with("events", b"1-0", b"2-0")
+
+    @pytest.mark.asyncio
+    async def test_failed_commit_leaves_entries_pending(
+        self,
+        redis_mock,
+        mock_session_factory,
+        mock_postgres_session,
+    ):
+        mock_postgres_session.commit.side_effect = Exception("db down")
+        consumer = IngestionStreamConsumer(
+            redis_mock,
+            mock_session_factory,
+            consumer_name="worker-1",
+        )
+
+        with pytest.raises(Exception, match="db down"):
+            await consumer.process([self.make_entry(b"1-0", make_event())])
+
+        redis_mock.pipeline.return_value.xack.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_malformed_entries_are_acknowledged(
+        self,
+        redis_mock,
+        mock_session_factory,
+        mock_postgres_session,
+    ):
+        consumer = IngestionStreamConsumer(
+            redis_mock,
+            mock_session_factory,
+            consumer_name="worker-1",
+            stream="events",
+            group="writers",
+        )
+
+        await consumer.process(
+            [
+                (b"1-0", {b"event": b"{not json"}),
+                self.make_entry(b"2-0", make_event()),
+            ],
+        )
+
+        rows = mock_postgres_session.execute.call_args_list[0].args[1]
+        assert len(rows) == 1
+        pipeline_mock = redis_mock.pipeline.return_value
+        pipeline_mock.xack.assert_called_once_with(
+            "events",
+            "writers",
+            b"1-0",
+            b"2-0",
+        )
+        dead_letter, fields = pipeline_mock.xadd.call_args.args
+        assert dead_letter == "ingestion:events:dead"
+        assert fields[b"entry_id"] == b"1-0"
+        assert fields[b"reason"] == "malformed"
+
+
+class TestPoisonEntries:
+    @pytest.fixture
+    def redis_client(self) -> fakeredis.FakeAsyncRedis:
+        return fakeredis.FakeAsyncRedis()
+
+    @staticmethod
+    def make_consumer(redis_client, session_factory, **kwargs):
+        return IngestionStreamConsumer(
+            redis_client,
+            session_factory,
+            consumer_name="worker-1",
+            stream="events",
+            group="writers",
+            dead_letter_stream="events:dead",
+            **kwargs,
+        )
+
+    @staticmethod
+    async def publish(redis_client, *events) -> None:
+        for event in events:
+            await redis_client.xadd("events", {"event": event.model_dump_json()})
+
+    @pytest.mark.asyncio
+    async def test_rejected_event_is_dead_lettered_and_others_written(
+        self,
+        redis_client,
+        mock_session_factory,
+        mock_postgres_session,
+    ):
+        def execute(statement, rows=()):
+            if any(row["user_id"] == 2 for row in rows):
+                raise IntegrityError("INSERT", rows, Exception("unknown user"))
+
+        mock_postgres_session.execute.side_effect = execute
+        consumer = self.make_consumer(redis_client, mock_session_factory)
+        await consumer.ensure_group()
+        await self.publish(redis_client, make_event(1), make_event(2), make_event(3))
+        [(_, entries)] = await redis_client.xreadgroup(
+            "writers", "worker-1", {"events": ">"}
+        )
+
+        await consumer.process(entries)
+
+        [(_, dead)] = await redis_client.xrange("events:dead")
+        assert IngestionSchema.model_validate_json(dead[b"event"]).user_id == 2
+        assert dead[b"reason"] == b"rejected"
+        assert dead[b"entry_id"] == entries[1][0]
+        assert await redis_client.xlen("events") == 0
+        assert (await redis_client.xpending("events", "writers"))["pending"] == 0
+        assert mock_postgres_session.commit.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_entry_delivered_too_often_is_dead_lettered(
+        self,
+        redis_client,
+        mock_session_factory,
+        mock_postgres_session,
+    ):
+        consumer = self.make_consumer(
+            redis_client,
+            mock_session_factory,
+            max_deliveries=2,
+        )
+        await consumer.ensure_group()
+        await self.publish(redis_client, make_event(1))
+        # Three deliveries that each failed before being acknowledged
+        await redis_client.xreadgroup("writers", "worker-1", {"events": ">"})
+        for _ in range(2):
+            await redis_client.xreadgroup("writers", "worker-1", {"events": "0"})
+
+        stop = asyncio.Event()
+        stop.set()
+        await consumer.run(stop)
+
+        [(_, dead)] = await redis_client.xrange("events:dead")
+        assert dead[b"reason"] == b"max_deliveries"
+        assert await redis_client.xlen("events") == 0
+        mock_postgres_session.execute.assert_not_called()
@@ -0,0 +1,125 @@
+from unittest.mock import AsyncMock, MagicMock, Mock
+
+import orjson
+import pytest
+import redis.asyncio
+from prometheus_client import REGISTRY
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.core.config import settings
+from app.schemas.customer_insights import CustomerInsightResponse, UserPreferences
+from app.services.insights_cache import (
+    INSIGHTS_CACHE_NAME,
+    INSIGHTS_VERSION_TTL_SECONDS,
+    bump_insights_versions,
+    get_or_compute_insights,
+    insights_cache_key,
+    insights_version_key,
+)
+
+
+def make_insights(user_id: int = 123) -> CustomerInsightResponse:
+    return CustomerInsightResponse(
+        user_id=user_id,
+        preferences=UserPreferences(
+            preferred_platform="PC",
+            avg_viewing_time=30,
+            common_filters=[],
+            price_sensitive=False,
+            preferred_genres=[],
+        ),
+        recent_interests=[],
+        platform_usage=[],
+        engagement_score=10,
+    )
+
+
+def cache_count(metric: str) -> float:
+    return REGISTRY.get_sample_value(metric, {"cache_name": INSIGHTS_CACHE_NAME}) or 0
+
+
+@pytest.fixture
+def redis_mock() -> AsyncMock:
+    client_mock = AsyncMock(spec=redis.asyncio.Redis)
+    client_mock.get = AsyncMock(return_value=None)
+    client_mock.set = AsyncMock(return_value=True)
+    pipeline_mock = MagicMock()
+    pipeline_mock.execute = AsyncMock(return_value=[])
+    client_mock.pipeline = Mock(return_value=pipeline_mock)
+    return client_mock
+
+
+class TestGetOrComputeInsights:
+    @pytest.mark.asyncio
+    async def test_miss_computes_and_stores_under_current_version(self, redis_mock):
+        cached = {insights_version_key(123): b"4"}
+        redis_mock.get.side_effect = cached.get
+        compute = AsyncMock(return_value=make_insights())
+        misses = cache_count("app_cache_misses_total")
+
+        payload = await get_or_compute_insights(redis_mock, 123, compute, ttl=60)
+
+        compute.assert_awaited_once()
+        assert orjson.loads(payload)["engagement_score"] == 10
+        redis_mock.set.assert_awaited_once_with(
+            insights_cache_key(123, 4),
+            payload,
+            ex=60,
+        )
+        assert cache_count("app_cache_misses_total") == misses + 1
+
+    @pytest.mark.asyncio
+    async def test_hit_skips_compute(self, redis_mock):
+        payload = orjson.dumps(make_insights().model_dump(mode="json"))
+        cached = {insights_cache_key(123, 0): payload}
+        redis_mock.get.side_effect = cached.get
+        compute = AsyncMock()
+        hits = cache_count("app_cache_hits_total")
+
+        assert await get_or_compute_insights(redis_mock, 123, compute) == payload
+
+        compute.assert_not_awaited()
+        redis_mock.set.assert_not_awaited()
+        assert cache_count("app_cache_hits_total") == hits + 1
+
+    @pytest.mark.asyncio
+    async def test_redis_errors_fall_back_to_compute(self, redis_mock):
+        redis_mock.get.side_effect = RedisConnectionError("redis down")
+        compute = AsyncMock(return_value=make_insights())
+
+        payload = await get_or_compute_insights(redis_mock, 123, compute)
+
+        assert orjson.loads(payload)["user_id"] == 123
+        redis_mock.set.assert_not_awaited()
+
+
+class TestBumpInsightsVersions:
+    @pytest.mark.asyncio
+    async def test_each_user_is_bumped_once_in_one_round_trip(self, redis_mock):
+        await bump_insights_versions(redis_mock, [2, 1, 2])
+
+        pipeline_mock = redis_mock.pipeline.return_value
+        assert [call.args for call in pipeline_mock.incr.call_args_list] == [
+            (insights_version_key(1),),
+            (insights_version_key(2),),
+        ]
+        pipeline_mock.execute.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_version_counters_expire_after_the_cached_entries(
+        self,
+        redis_mock,
+    ):
+        await bump_insights_versions(redis_mock, [1])
+
+        pipeline_mock = redis_mock.pipeline.return_value
+        pipeline_mock.expire.assert_called_once_with(
+            insights_version_key(1), INSIGHTS_VERSION_TTL_SECONDS
+        )
+        assert INSIGHTS_VERSION_TTL_SECONDS >= settings.INSIGHTS_CACHE_TTL
+
+    @pytest.mark.asyncio
+    async def test_no_users_no_round_trip(self, redis_mock):
+        await bump_insights_versions(redis_mock, [])
+
+        redis_mock.pipeline.assert_not_called()
@@ -0,0 +1,172 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY, Counter, Gauge, values
+from prometheus_client.values import MultiProcessValue
+
+from app.metrics import (
+    REQUEST_DURATION,
+    UNMATCHED_ENDPOINT,
+    PrometheusMiddleware,
+    metrics_registry,
+    observe_ingest_lag,
+    setup_metrics,
+    track_ingest_stage,
+)
+
+
+def record_in_processes(mocker, tmp_path, pids: list[int]) -> None:
+    """Write the same counter and live gauge from several fake worker pids"""
+    mocker.patch.dict("os.environ", {"PROMETHEUS_MULTIPROC_DIR": str(tmp_path)})
+    for pid in pids:
+        mocker.patch.object(values, "ValueClass", MultiProcessValue(lambda p=pid: p))
+        Counter("worker_events_total", "Events", registry=None).inc(2)
+        Gauge(
+            "worker_in_flight",
+            "In flight",
+            registry=None,
+            multiprocess_mode="livesum",
+        ).set(1)
+
+
+class TestMetricsRegistry:
+    def test_single_process_uses_default_registry(self, mocker):
+        mocker.patch.dict("os.environ", clear=True)
+
+        assert metrics_registry() is REGISTRY
+
+    def test_multiprocess_registry_aggregates_workers(self, mocker, tmp_path):
+        record_in_processes(mocker, tmp_path, [101, 102, 103])
+
+        registry = metrics_registry()
+
+        assert registry is not REGISTRY
+        assert registry.get_sample_value("worker_events_total") == 6
+        assert registry.get_sample_value("worker_in_flight") == 3
+
+
+class TestSetupMetrics:
+    def test_multiprocess_mode_serves_aggregate_without_binding_port(
+        self,
+        mocker,
+        tmp_path,
+    ):
+        record_in_processes(mocker, tmp_path, [101, 102])
+        start_server = mocker.patch("app.metrics.start_http_server")
+
+        app = setup_metrics(FastAPI(), metrics_endpoint=True, metrics_port=8001)
+        response = TestClient(app).get("/metrics")
+
+        start_server.assert_not_called()
+        assert "worker_events_total 4.0" in response.text
+
+    def test_single_process_starts_metrics_server(self, mocker):
+        mocker.patch.dict("os.environ", clear=True)
+        start_server = mocker.patch("app.metrics.start_http_server")
+
+        setup_metrics(FastAPI(), metrics_endpoint=False, metrics_port=8001)
+
+        start_server.assert_called_once_with(8001, registry=REGISTRY)
+
+
+def sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestPrometheusMiddleware:
+    @staticmethod
+    def make_client() -> TestClient:
+        app = FastAPI()
+        app.add_middleware(PrometheusMiddleware)
+
+        @app.post("/middleware-test/items/{item_id}")
+        async def create_item(item_id: int, request: Request) -> dict:
+            await request.body()
+            return {"id": item_id}
+
+        @app.get("/middleware-test/stream")
+        def stream() -> StreamingResponse:
+            return StreamingResponse(iter([b"abc", b"defg"]))
+
+        return TestClient(app)
+
+    def test_requests_are_labelled_by_route_template(self):
+        endpoint = "/middleware-test/items/{item_id}"
+        labels = {"method": "POST", "endpoint": endpoint}
+        before = {
+            name: sample(name, **labels)
+            for name in (
+                "app_request_duration_seconds_count",
+                "app_request_size_bytes_sum",
+                "app_response_size_bytes_sum",
+            )
+        }
+        client = self.make_client()
+
+        for item_id in (1, 22):
+            client.post(f"/middleware-test/items/{item_id}", content=b"12345")
+
+        assert sample("app_request_duration_seconds_count", **labels) == (
+            before["app_request_duration_seconds_count"] + 2
+        )
+        assert sample("app_request_size_bytes_sum", **labels) == (
+            before["app_request_size_bytes_sum"] + 10
+        )
+        # {"id":1} and {"id":22}
+        assert sample("app_response_size_bytes_sum", **labels) == (
+            before["app_response_size_bytes_sum"] + 17
+        )
+        assert sample("app_requests_total", status="200", **labels) >= 2
+
+    def test_streamed_response_size_is_counted(self):
+        labels = {"method": "GET", "endpoint": "/middleware-test/stream"}
+        before = sample("app_response_size_bytes_sum", **labels)
+
+        self.make_client().get("/middleware-test/stream")
+
+        assert sample("app_response_size_bytes_sum", **labels) == before + 7
+
+    def test_unmatched_paths_share_one_label(self):
+        labels = {"method": "GET", "endpoint": UNMATCHED_ENDPOINT, "status": "404"}
+        before = sample("app_requests_total", **labels)
+        client = self.make_client()
+
+        client.get("/middleware-test/nothing/1")
+        client.get("/middleware-test/nothing/2")
+
+        assert sample("app_requests_total", **labels) == before + 2
+
+    def test_buckets_resolve_sub_millisecond_latencies(self):
+        assert REQUEST_DURATION._upper_bounds[0] < 0.001
+
+
+class TestIngestionMetrics:
+    def test_stage_counts_failures_and_releases_in_flight_events(self):
+        stage = {"stage": "metrics-test"}
+        failures = sample("app_ingest_stage_failures_total", **stage)
+
+        with pytest.raises(ValueError):
+            with track_ingest_stage("metrics-test", events=3):
+                assert sample("app_ingest_in_flight_events", **stage) == 3
+                raise ValueError("redis down")
+
+        assert sample("app_ingest_in_flight_events", **stage) == 0
+        assert sample("app_ingest_stage_failures_total", **stage) == failures + 1
+        assert sample("app_ingest_stage_duration_seconds_count", **stage) == 1
+
+    def test_lag_is_measured_from_event_timestamp(self):
+        count = sample("app_ingest_lag_seconds_count")
+        within_a_minute = sample("app_ingest_lag_seconds_bucket", le="60.0")
+
+        observe_ingest_lag(
+            [datetime.now() - timedelta(seconds=30), datetime.now() + timedelta(1)],
+        )
+
+        assert sample("app_ingest_lag_seconds_count") == count + 2
+        # Both land below a minute, the future timestamp counts as no lag
+        assert sample("app_ingest_lag_seconds_bucket", le="60.0") == (
+            within_a_minute + 2
+        )
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import pytest
+
+from app.models.game_store import User
+from app.services.exceptions import InvalidCursor
+from app.services.pagination import decode_cursor, encode_cursor, fetch_page
+from app.services.user_service import USER_SORTS
+
+COLUMNS = [User.created_at, User.id]
+
+
+class TestCursor:
+    def test_round_trip_restores_column_types(self):
+        created_at = datetime(2026, 1, 2, 3, 4, 5, 678)
+
+        cursor = encode_cursor("created_at", [created_at, 42])
+
+        assert decode_cursor(cursor, "created_at", COLUMNS) == [created_at, 42]
+
+    @pytest.mark.parametrize(
+        "cursor",
+        [
+            encode_cursor("username", ["alice", 42]),
+            encode_cursor("created_at", [42]),
+            encode_cursor("created_at", ["yesterday", 42]),
+            "not a cursor",
+            "",
+        ],
+    )
+    def test_rejects_cursor_of_other_sort_or_malformed(self, cursor):
+        with pytest.raises(InvalidCursor):
+            decode_cursor(cursor, "created_at", COLUMNS)
+
+
+@pytest.mark.asyncio
+async def test_cursor_cannot_be_combined_with_skip(mock_postgres_session):
+    with pytest.raises(InvalidCursor):
+        await fetch_page(
+            mock_postgres_session,
+            User.__table__.select(),
+            USER_SORTS,
+            "id",
+            limit=10,
+            skip=20,
+            cursor=encode_cursor("id", [5]),
+        )
+
+    mock_postgres_session.execute.assert_not_called()
@@ -0,0 +1,78 @@
+from datetime import date, datetime
+
+import pytest
+
+from app.services.partition_maintenance import (
+    Partition,
+    add_months,
+    month_start,
+    parse_partition,
+    partition_name,
+)
+
+
+class TestMonths:
+    def test_add_months_rolls_over_years(self):
+        assert add_months(datetime(2026, 11, 1), 3) == datetime(2027, 2, 1)
+        assert add_months(datetime(2026, 1, 1), -1) == datetime(2025, 12, 1)
+        assert add_months(datetime(2026, 1, 1), -13) == datetime(2024, 12, 1)
+
+    def test_partition_name_uses_lower_bound_month(self):
+        assert partition_name(month_start(date(2026, 3, 17))) == "web_events_p2026_03"
+
+
+class TestParsePartition:
+    def test_range_bounds(self):
+        partition = parse_partition(
+            "web_events_p2026_03",
+            "FOR VALUES FROM ('2026-03-01 00:00:00') TO ('2026-04-01 00:00:00')",
+        )
+
+        assert partition == Partition(
+            name="web_events_p2026_03",
+            lower=datetime(2026, 3, 1),
+            upper=datetime(2026, 4, 1),
+        )
+
+    def test_unbounded_lower(self):
+        partition = parse_partition(
+            "web_events_legacy",
+            "FOR VALUES FROM (MINVALUE) TO ('2026-03-01 00:00:00')",
+        )
+
+        assert partition.lower is None
+        assert partition.upper == datetime(2026, 3, 1)
+
+    def test_default(self):
+        assert parse_partition("web_events_default", "DEFAULT").is_default
+
+    def test_unexpected_bound(self):
+        with pytest.raises(ValueError, match="Unexpected bound"):
+            parse_partition("web_events_x", "FOR VALUES IN (1)")
+
+
+class TestOverlaps:
+    @pytest.mark.parametrize(
+        ("lower", "upper", "expected"),
+        [
+            (datetime(2026, 2, 1), datetime(2026, 3, 1), False),
+            (datetime(2026, 3, 1), datetime(2026, 4, 1), True),
+            (datetime(2026, 3, 15), datetime(2026, 4, 15), True),
+            (datetime(2026, 4, 1), datetime(2026, 5, 1), False),
+        ],
+    )
+    def test_half_open_ranges(self, lower, upper, expected):
+        partition = Partition(
+            name="web_events_p2026_03",
+            lower=datetime(2026, 3, 1),
+            upper=datetime(2026, 4, 1),
+        )
+
+        assert partition.overlaps(lower, upper) is expected
+
+    def test_unbounded_and_default(self):
+        legacy = Partition(name="web_events_legacy", upper=datetime(2026, 3, 1))
+        default = Partition(name="web_events_default", is_default=True)
+
+        assert legacy.overlaps(datetime(1970, 1, 1), datetime(1970, 2, 1))
+        assert not default.overlaps(datetime(2026, 3, 1), datetime(2026, 4, 1))
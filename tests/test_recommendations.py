@@ -0,0 +1,178 @@
+from unittest.mock import MagicMock
+
+import fakeredis
+import numpy as np
+import pytest
+
+from app.services.exceptions import RecommendationsNotReady
+from app.services.recommendations import (
+    BASKET_SOURCES,
+    INDEX_KEY,
+    MAX_BASKET_GAMES,
+    PURCHASE_WEIGHT,
+    CoViewModel,
+    CoViewRecommender,
+    NeighborIndex,
+)
+
+VIEWS, ORDER_ITEMS = BASKET_SOURCES
+
+
+def baskets(*rows: tuple[int, int, int]) -> tuple[np.ndarray, ...]:
+    """(basket number, game id, first row id) rows as read_baskets returns them"""
+    return tuple(np.array(column, dtype=np.int64) for column in zip(*rows, strict=True))
+
+
+def counts(model: CoViewModel) -> dict[tuple[int, int], float]:
+    dense = model.counts.toarray()
+    return {
+        (int(model.game_ids[row]), int(model.game_ids[column])): float(
+            dense[row, column]
+        )
+        for row, column in zip(*dense.nonzero(), strict=True)
+    }
+
+
+class TestCoViewModel:
+    def test_sessions_count_each_pair_once(self):
+        model = CoViewModel()
+        model.update(VIEWS, baskets((0, 10, 1), (0, 20, 2), (1, 10, 3)), upper=4)
+
+        assert counts(model) == {
+            (10, 10): 2,
+            (10, 20): 1,
+            (20, 10): 1,
+            (20, 20): 1,
+        }
+        assert model.through == {"web_events": 4}
+
+    def test_incremental_updates_match_a_full_build(self):
+        incremental = CoViewModel()
+        # Session 0 views games 10 and 20, then 30 in the second update
+        incremental.update(VIEWS, baskets((0, 10, 1), (0, 20, 2)), upper=2)
+        incremental.update(
+            VIEWS,
+            baskets((0, 10, 1), (0, 20, 2), (0, 30, 3), (1, 30, 4), (1, 40, 5)),
+            upper=5,
+        )
+        full = CoViewModel()
+        full.update(
+            VIEWS,
+            baskets((0, 10, 1), (0, 20, 2), (0, 30, 3), (1, 30, 4), (1, 40, 5)),
+            upper=5,
+        )
+
+        assert counts(incremental) == counts(full)
+        assert counts(full)[(10, 30)] == 1
+        assert counts(full)[(30, 30)] == 2
+
+    def test_orders_weigh_more_than_sessions(self):
+        model = CoViewModel()
+        model.update(ORDER_ITEMS, baskets((0, 10, 1), (0, 20, 2)), upper=2)
+
+        assert counts(model)[(10, 20)] == PURCHASE_WEIGHT
+        assert model.through == {"order_items": 2}
+
+    def test_crawler_sessions_are_left_out(self):
+        model = CoViewModel()
+        crawl = [(0, game_id, game_id) for game_id in range(1, MAX_BASKET_GAMES + 2)]
+        model.update(VIEWS, baskets(*crawl, (1, 1, 1000), (1, 2, 1001)), upper=1001)
+
+        assert counts(model)[(1, 2)] == 1
+        assert (3, 4) not in counts(model)
+
+
+def session_model() -> CoViewModel:
+    model = CoViewModel()
+    model.update(
+        VIEWS,
+        baskets((0, 1, 1), (0, 2, 2), (1, 1, 3), (1, 3, 4), (2, 2, 5), (2, 3, 6)),
+        upper=6,
+    )
+    return model
+
+
+class TestNeighborIndex:
+    def test_neighbors_by_cosine_similarity(self):
+        model = CoViewModel()
+        model.update(
+            VIEWS,
+            baskets(
+                (0, 1, 1),
+                (0, 2, 2),
+                (0, 3, 3),
+                (1, 1, 4),
+                (1, 2, 5),
+                (2, 3, 6),
+                (2, 4, 7),
+            ),
+            upper=7,
+        )
+
+        index = model.neighbors(top_k=2)
+
+        # 2 shares both sessions of 1, 3 one of its two sessions
+        assert index.similar(1, 10) == [(2, 1.0), (3, 0.5)]
+        # Tied with 1, 2 is cut by top_k
+        assert index.similar(3, 10) == [(4, 0.7071), (1, 0.5)]
+        assert index.similar(3, 1) == [(4, 0.7071)]
+        assert index.similar(99, 10) == []
+
+    def test_round_trips_through_bytes(self):
+        index = session_model().neighbors(top_k=5)
+
+        loaded = NeighborIndex.from_bytes(index.to_bytes())
+
+        assert len(loaded) == 3
+        assert loaded.top_k == 5
+        assert loaded.similar(1, 10) == index.similar(1, 10)
+
+
+class TestCoViewRecommender:
+    @pytest.fixture
+    def recommender(self) -> CoViewRecommender:
+        recommender = CoViewRecommender(MagicMock())
+        recommender.index = session_model().neighbors(5)
+        return recommender
+
+    def test_similar_games(self, recommender: CoViewRecommender):
+        games = recommender.similar_games(1, limit=5)
+
+        assert [game.game_id for game in games] == [2, 3]
+        assert games[0].score == 0.5
+
+    def test_recommendations_leave_out_the_given_games(
+        self,
+        recommender: CoViewRecommender,
+    ):
+        games = recommender.recommend([1, 2], limit=5)
+
+        assert [(game.game_id, game.score) for game in games] == [(3, 1.0)]
+
+    def test_not_ready_before_the_first_refresh(self):
+        recommender = CoViewRecommender(MagicMock())
+
+        with pytest.raises(RecommendationsNotReady):
+            recommender.similar_games(1, limit=5)
+
+    @pytest.mark.asyncio
+    async def test_reloads_only_a_new_published_index(self):
+        redis_client = fakeredis.FakeAsyncRedis()
+        recommender = CoViewRecommender(redis_client)
+
+        await recommender.reload()
+        assert recommender.index is None
+
+        index = session_model().neighbors(5)
+        await redis_client.hset(
+            INDEX_KEY,
+            mapping={"version": "web_events=6", "index": index.to_bytes()},
+        )
+        await recommender.reload()
+        loaded = recommender.index
+
+        assert recommender.version == "web_events=6"
+        assert [game.game_id for game in recommender.similar_games(1, 5)] == [2, 3]
+
+        await recommender.reload()
+        assert recommender.index is loaded
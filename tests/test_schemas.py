@@ -1,7 +1,9 @@
 import datetime
 
 import pytest
+from pydantic import ValidationError
 
+from app.schemas.game import GameCreate, GameInDB, GameUpdate
 from app.schemas.ingestion import IngestionSchema
 
 
@@ -51,3 +53,55 @@ class TestIngestionSchema:
             IngestionSchema(timestamp=timestamp, referrer_page="/home")
 
         assert "validation error" in str(excinfo.value)
+
+
+GAME = {
+    "title": "Quest",
+    "description": "",
+    "price": 19.99,
+    "release_date": "2001-01-01",
+    "publisher_id": 1,
+    "platform": "PC",
+    "stock": 1,
+    "is_digital": False,
+    "is_active": True,
+    "region": "PAL",
+    "condition_rating": 9,
+    "has_original_box": True,
+    "has_manual": True,
+    "is_rare": False,
+    "collector_value": 30.0,
+    "serial_number": "SN-1",
+    "special_edition": False,
+    "genres": ["RPG"],
+    "reviews": [],
+}
+
+
+class TestGameSchemas:
+    @pytest.mark.parametrize("schema", [GameCreate, GameUpdate])
+    def test_requests_require_the_collector_fields(self, schema):
+        game = {**GAME}
+        del game["region"]
+
+        with pytest.raises(ValidationError, match="region"):
+            schema(**game)
+
+    @pytest.mark.parametrize("schema", [GameCreate, GameUpdate])
+    def test_requests_take_the_release_date_as_a_string(self, schema):
+        with pytest.raises(ValidationError, match="release_date"):
+            schema(**{**GAME, "release_date": datetime.datetime(2001, 1, 1)})
+
+    def test_rows_with_null_collector_columns_are_valid(self):
+        game = GameInDB.model_validate(
+            {
+                **GAME,
+                "id": 1,
+                "release_date": datetime.datetime(2001, 1, 1),
+                "region": None,
+                "condition_rating": None,
+            },
+        )
+
+        assert game.region is None
+        assert game.model_dump(mode="json")["release_date"] == "2001-01-01T00:00:00"
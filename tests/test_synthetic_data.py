@@ -0,0 +1,71 @@
+from collections import Counter
+from datetime import datetime
+from itertools import groupby
+
+from app.services.synthetic_data import (
+    WEB_EVENTS_COLUMNS,
+    DatasetSpec,
+    chunked,
+    game_genre_records,
+    table_random,
+    web_event_records,
+)
+
+NOW = datetime(2026, 3, 15, 12)
+SPEC = DatasetSpec(users=50, games=200, events=5_000, days=30, seed=7)
+
+
+def generate_events(spec: DatasetSpec = SPEC) -> list[dict]:
+    records = web_event_records(
+        table_random(spec.seed, "web_events"),
+        spec,
+        range(1, spec.users + 1),
+        range(1, spec.games + 1),
+        NOW,
+    )
+    return [dict(zip(WEB_EVENTS_COLUMNS, record, strict=True)) for record in records]
+
+
+class TestWebEventRecords:
+    def test_same_seed_generates_same_events(self):
+        assert generate_events() == generate_events()
+        assert generate_events() != generate_events(SPEC.model_copy(update={"seed": 8}))
+
+    def test_generates_exactly_the_requested_events_in_window(self):
+        events = generate_events()
+
+        assert len(events) == SPEC.events
+        assert all(1 <= event["user_id"] <= SPEC.users for event in events)
+        assert min(event["timestamp"] for event in events) >= datetime(2026, 2, 13, 12)
+
+    def test_activity_and_popularity_are_skewed(self):
+        events = generate_events()
+        users = Counter(event["user_id"] for event in events)
+        games = Counter(event["game_id"] for event in events if event["game_id"])
+
+        assert users[1] > 5 * users[SPEC.users]
+        assert games.most_common(1)[0][0] == 1
+
+    def test_actions_follow_a_view_of_the_game_in_the_session(self):
+        events = generate_events()
+
+        for _, session in groupby(events, key=lambda event: event["session_id"]):
+            viewed = set()
+            for event in session:
+                if event["event_type"] == "VIEW":
+                    viewed.add(event["game_id"])
+                else:
+                    assert event["game_id"] in viewed
+
+
+def test_games_get_distinct_genres():
+    links = list(
+        game_genre_records(table_random(0, "game_genre"), range(1, 101), range(1, 11))
+    )
+
+    assert len(set(links)) == len(links)
+    assert {game_id for game_id, _ in links} == set(range(1, 101))
+
+
+def test_chunked_keeps_the_remainder():
+    assert [len(chunk) for chunk in chunked(((i,) for i in range(7)), 3)] == [3, 3, 1]